@@ -316,7 +316,25 @@ export const fetchApplications = async (userId: string) => {
           });
 
           if (response.ok) {
-            apiData = await response.json();
+            // The API returns a page at a time; X-Next-Cursor is set while more pages follow
+            let pages = await response.json();
+            let cursor = response.headers.get('X-Next-Cursor');
+            while (cursor) {
+              url.searchParams.set('cursor', cursor);
+              const next = await fetch(url.toString(), {
+                method: 'GET',
+                headers: {
+                  'Accept': 'application/json',
+                  'Content-Type': 'application/json'
+                }
+              });
+              if (!next.ok) {
+                throw new Error(`API returned status ${next.status} for the next page`);
+              }
+              pages = pages.concat(await next.json());
+              cursor = next.headers.get('X-Next-Cursor');
+            }
+            apiData = pages;
             console.log(`[FETCH] Successfully fetched ${apiData.length} applications from API: ${endpoint} for user ${userId}`);
             break;
           } else {
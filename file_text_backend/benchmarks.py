@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+# benchmarks.py - Local performance checks for the file text backend
+#
+# Each scenario runs in-process, through Flask's test client or a local
+# threaded server, on generated sample resumes (no network, no API keys):
+#   python benchmarks.py extract [--resumes 40]
+#   python benchmarks.py pdf [--pdf-pages 300]
+#   python benchmarks.py cache [--resumes 40] [--repeats 4]
+#   python benchmarks.py load
+#   python benchmarks.py csv [--csv-mb 200]
+import io
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+# Configure logging before the API module does, so runs do not append to backend.log
+logging.basicConfig(level=logging.WARNING, handlers=[logging.StreamHandler()])
+
+import extract_text_api as api  # noqa: E402
+from extraction_cache import ExtractionCache, content_key  # noqa: E402
+
+_SKILLS = ["Python", "JavaScript", "React", "Node.js", "Docker", "Kubernetes", "AWS", "SQL",
+           "Django", "Flask", "TypeScript", "Go", "Terraform", "GraphQL", "Figma", "Excel"]
+
+# ── Sample resume corpus ──────────────────────────────────────
+def _resume_text(rnd: random.Random, jobs: int) -> str:
+    lines = [f"Candidate {rnd.randrange(10**6)}", "Software Engineer", "", "SKILLS",
+             ", ".join(rnd.sample(_SKILLS, 6)), "", "EXPERIENCE"]
+    for j in range(jobs):
+        lines.append(f"Engineer, Company {rnd.randrange(500)}, {2012 + j}-{2013 + j}")
+        lines.extend(f"- Shipped feature {rnd.randrange(10**4)} used by {rnd.randrange(1, 90)}k users, "
+                     f"cutting latency by {rnd.randrange(5, 60)}%" for _ in range(4))
+    lines += ["", "EDUCATION", "BSc Computer Science, State University"]
+    return "\n".join(lines)
+
+def _pdf(text: str, photo: bool, rnd: random.Random) -> bytes:
+    doc = api.fitz.open()
+    lines = text.split("\n")
+    for start in range(0, len(lines), 45):
+        page = doc.new_page()
+        page.insert_text((56, 56), "\n".join(lines[start:start + 45]), fontsize=9)
+        if photo and start == 0:
+            # a noisy headshot, so the upload is over werkzeug's 500KB spooling limit
+            pix = api.fitz.Pixmap(api.fitz.csRGB, 480, 480, rnd.randbytes(480 * 480 * 3), False)
+            page.insert_image(api.fitz.Rect(450, 40, 560, 150), stream=pix.tobytes("png"))
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def _docx(text: str) -> bytes:
+    document = api.docx.Document()
+    for line in text.split("\n"):
+        document.add_paragraph(line)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+def _csv(rnd: random.Random, rows: int) -> bytes:
+    lines = ["skill,years,last_used"]
+    lines += [f"{rnd.choice(_SKILLS)},{rnd.randrange(1, 12)},{rnd.randrange(2015, 2026)}" for _ in range(rows)]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+def _resume_corpus(count: int, seed: int = 7) -> List[Tuple[str, str, bytes]]:
+    """(kind, filename, bytes); every resume of a kind shares one filename, like real uploads"""
+    rnd = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        text = _resume_text(rnd, rnd.randrange(2, 9))
+        kind = ("pdf", "pdf+photo", "docx", "csv", "txt")[i % 5]
+        if kind == "pdf":
+            corpus.append((kind, "resume.pdf", _pdf(text, False, rnd)))
+        elif kind == "pdf+photo":
+            corpus.append((kind, "resume.pdf", _pdf(text, True, rnd)))
+        elif kind == "docx":
+            corpus.append((kind, "resume.docx", _docx(text)))
+        elif kind == "csv":
+            corpus.append((kind, "skills.csv", _csv(rnd, 200)))
+        else:
+            corpus.append((kind, "resume.txt", text.encode("utf-8")))
+    return corpus
+
+# ── The handler before in-memory extraction, kept as the baseline ─────
+def _legacy_app():
+    """/extract-text as it was: save to /tmp/{filename}, extract from disk, delete"""
+    from flask import Flask, request, jsonify
+
+    legacy = Flask("legacy_extract")
+    legacy.logger.setLevel(logging.CRITICAL)  # collisions are counted, not logged
+
+    @legacy.route("/extract-text", methods=["POST"])
+    def extract_text():
+        file = request.files["file"]
+        filename = file.filename.lower()
+        temp_path = f"/tmp/{file.filename}"
+        os.makedirs("/tmp", exist_ok=True)
+        file.save(temp_path)
+        try:
+            extractor = api.EXTRACTORS.get(os.path.splitext(filename)[1])
+            if extractor is None:
+                return jsonify({"error": "Unsupported file type"}), 400
+            text = extractor(temp_path)
+        finally:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        return jsonify({"text": text})
+
+    return legacy
+
+def _post(client, filename: str, data: bytes) -> Tuple[float, Dict[str, Any]]:
+    started = time.perf_counter()
+    r = client.post("/extract-text", data={"file": (io.BytesIO(data), filename)},
+                    content_type="multipart/form-data")
+    elapsed = time.perf_counter() - started
+    if r.status_code != 200:
+        raise SystemExit(f"{filename}: HTTP {r.status_code} {r.get_data(as_text=True)[:200]}")
+    return elapsed, r.get_json()
+
+def _timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+def _temp_files() -> int:
+    return len(os.listdir(tempfile.gettempdir()))
+
+def bench_extract(args: argparse.Namespace) -> None:
+    """Upload-to-text latency per resume type: temp file per upload (before) vs. in memory (after)"""
+    api.extraction_cache = ExtractionCache(memory_bytes=0, disk_dir="")  # time parsing, not cache hits
+    api.extract_executor = None  # parse in the request thread, as both handlers did
+    corpus = _resume_corpus(args.resumes)
+    apps = {"temp file": _legacy_app().test_client(), "in memory": api.app.test_client()}
+    print(f"🧪 {len(corpus)} sample resumes, {args.rounds} rounds each")
+
+    kinds = sorted({kind for kind, _, _ in corpus})
+    times: Dict[Tuple[str, str], List[float]] = {}
+    texts: Dict[str, List[str]] = {}
+    for label, client in apps.items():
+        texts[label] = []
+        for _ in range(args.rounds):
+            for kind, filename, data in corpus:
+                elapsed, body = _post(client, filename, data)
+                times.setdefault((label, kind), []).append(elapsed)
+                texts[label].append(body["text"])
+    if texts["temp file"] != texts["in memory"]:
+        raise SystemExit("in-memory extraction returned different text")
+    for kind in kinds:
+        size = sum(len(d) for k, _, d in corpus if k == kind) // sum(1 for k, _, _ in corpus if k == kind)
+        row = []
+        for label in apps:
+            samples = sorted(times[(label, kind)])
+            row.append(f"{label} p50 {samples[len(samples) // 2] * 1000:6.2f} ms")
+        print(f"   {kind:<10} ~{size / 1024:6.0f} KiB   " + "   ".join(row))
+
+    # Concurrent uploads sharing a filename: the temp-file path lets them overwrite each other
+    print("🧪 8 threads uploading different resumes named resume.txt")
+    for label, client in apps.items():
+        wrong = 0
+        lock = threading.Lock()
+
+        def worker(n: int) -> None:
+            nonlocal wrong
+            mine = client.application.test_client()
+            for i in range(25):
+                expected = f"resume {n}-{i} " * 2000
+                r = mine.post("/extract-text", data={"file": (io.BytesIO(expected.encode("utf-8")), "resume.txt")},
+                              content_type="multipart/form-data")
+                if r.status_code != 200 or r.get_json().get("text") != expected:
+                    with lock:
+                        wrong += 1
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        print(f"   {label:<10} {wrong} of 200 uploads failed or got another upload's text")
+
+    # Uploads over the spill threshold still work and leave nothing behind
+    saved = api.EXTRACT_SPILL_BYTES
+    api.EXTRACT_SPILL_BYTES = 64 * 1024
+    try:
+        before = _temp_files()
+        big = [(f, d) for k, f, d in corpus if k == "pdf+photo"][:3]
+        for filename, data in big:
+            _, body = _post(apps["in memory"], filename, data)
+        print(f"🧪 spill threshold 64 KiB: {len(big)} large PDFs extracted from spooled files, "
+              f"temp files left behind: {_temp_files() - before}")
+    finally:
+        api.EXTRACT_SPILL_BYTES = saved
+
+def _long_pdf(pages: int, seed: int = 11) -> bytes:
+    rnd = random.Random(seed)
+    doc = api.fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        page.insert_text((40, 40), _resume_text(rnd, 4), fontsize=7)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def _legacy_pdf_text(data: bytes) -> str:
+    """extract_pdf_text as it was: one string grown page by page, in one thread"""
+    doc = api.fitz.open(stream=data, filetype="pdf")
+    text = ""
+    for page in doc:
+        text += page.get_text()
+    return text
+
+def bench_pdf(args: argparse.Namespace) -> None:
+    """PDF pages/second: the old += loop vs. list + join vs. page ranges on 1..N pool processes"""
+    import pdf_extract
+
+    data = _long_pdf(args.pdf_pages)
+    print(f"🧪 {args.pdf_pages}-page PDF ({len(data) / 1024:.0f} KiB), best of 3, {os.cpu_count()} CPU(s)")
+    expected = _legacy_pdf_text(data)
+    everything = {"max_pages": args.pdf_pages, "max_chars": len(expected) + 1}
+
+    def report(label: str, run) -> None:
+        best = min(_timed(run) for _ in range(3))
+        print(f"   {label:<26} {best * 1000:8.1f} ms  {args.pdf_pages / best:8.0f} pages/s")
+
+    report("+= loop (before)", lambda: _legacy_pdf_text(data))
+    if pdf_extract.extract_pdf(data, workers=1, **everything) != expected:
+        raise SystemExit("list + join returned different text")
+    report("list + join, 1 process", lambda: pdf_extract.extract_pdf(data, workers=1, **everything))
+    for workers in sorted({2, 4, os.cpu_count() or 1} - {1}):
+        with pdf_extract.page_pool(workers) as pool:
+            run = lambda: pdf_extract.extract_pdf(data, workers=workers, executor=pool, **everything)
+            if run() != expected:  # also starts the pool processes
+                raise SystemExit(f"{workers} workers returned different text")
+            report(f"page ranges, {workers} processes", run)
+
+    started = time.perf_counter()
+    capped = pdf_extract.extract_pdf(data, workers=1)
+    print(f"🧪 default caps (PDF_MAX_PAGES={pdf_extract.PDF_MAX_PAGES}, PDF_MAX_CHARS={pdf_extract.PDF_MAX_CHARS}): "
+          f"{(time.perf_counter() - started) * 1000:.1f} ms, {len(capped)} of {len(expected)} characters")
+
+def bench_cache(args: argparse.Namespace) -> None:
+    """Onboarding re-uploads: extraction cache hit rate, parser calls and latency, then a restart"""
+    rnd = random.Random(5)
+    corpus = _resume_corpus(args.resumes)
+    uploads = [doc for doc in corpus for _ in range(args.repeats)]
+    rnd.shuffle(uploads)
+
+    calls = {"n": 0}
+    originals = dict(api.EXTRACTORS)
+
+    def counting(extractor):
+        def run(source):
+            calls["n"] += 1
+            return extractor(source)
+        return run
+
+    client = api.app.test_client()
+    api.extract_executor = None  # parser calls are counted in this process
+    print(f"🧪 {len(corpus)} resumes uploaded {args.repeats} times each, shuffled")
+    with tempfile.TemporaryDirectory() as disk_dir:
+        api.EXTRACTORS.update({ext: counting(fn) for ext, fn in originals.items()})
+        try:
+            for label, cache in (("no cache", ExtractionCache(memory_bytes=0, disk_dir="")),
+                                 ("memory + disk", ExtractionCache(disk_dir=disk_dir)),
+                                 ("after restart", ExtractionCache(disk_dir=disk_dir))):
+                api.extraction_cache = cache
+                calls["n"] = 0
+                first, repeat = [], []
+                seen = set()
+                started = time.perf_counter()
+                for kind, filename, data in uploads:
+                    elapsed, _ = _post(client, filename, data)
+                    (repeat if id(data) in seen else first).append(elapsed)
+                    seen.add(id(data))
+                total = time.perf_counter() - started
+                stats = cache.stats()
+                p50 = lambda xs: sorted(xs)[len(xs) // 2] * 1000 if xs else 0.0
+                print(f"   {label:<14} {total * 1000:8.1f} ms total  parser calls {calls['n']:>4}  "
+                      f"p50 first {p50(first):5.2f} ms repeat {p50(repeat):5.2f} ms  "
+                      f"hit rate {stats['hit_rate']:.2f} (disk {stats['disk_hits']})  "
+                      f"{stats['bytes_saved'] / 1024:8.0f} KiB not re-parsed")
+        finally:
+            api.EXTRACTORS.update(originals)
+
+        cache = ExtractionCache(disk_dir=disk_dir, disk_bytes=256 * 1024)
+        for kind, filename, data in corpus:
+            cache.put(content_key(data, os.path.splitext(filename)[1], "bench"), "x" * 40000)
+        print(f"🧪 disk tier capped at 256 KiB after {len(corpus)} x 40 KB texts: "
+              f"{cache.stats()['disk_bytes'] / 1024:.0f} KiB on disk")
+
+# Peak RSS from VmHWM: ru_maxrss would carry over the (larger) benchmark process it was forked from
+_CSV_RUN = """
+import re, time
+started = time.perf_counter()
+{setup}
+text = {call}
+seconds = time.perf_counter() - started
+with open("/proc/self/status") as f:
+    print(seconds, re.search(r"VmHWM:\\s+(\\d+)", f.read()).group(1), len(text))
+"""
+
+def _csv_run(path: str, legacy: bool, caps: str = "") -> Tuple[float, float, int]:
+    """(seconds incl. imports, peak RSS MiB, characters) of extracting `path` in a fresh interpreter"""
+    import subprocess
+
+    if legacy:  # extract_csv_text as it was
+        setup, call = "import pandas as pd", f"pd.read_csv({path!r}).to_string(index=False)"
+    else:
+        setup, call = "from csv_extract import extract_csv", f"extract_csv({path!r}{caps})"
+    out = subprocess.run([sys.executable, "-c", _CSV_RUN.format(setup=setup, call=call)],
+                         capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    seconds, rss_kib, chars = out.stdout.split()
+    return float(seconds), int(rss_kib) / 1024, int(chars)
+
+def bench_csv(args: argparse.Namespace) -> None:
+    """CSV extraction: pandas DataFrame + to_string vs. streaming rows, each in a fresh process"""
+    import subprocess
+    import importlib.util
+    from csv_extract import extract_csv
+
+    has_pandas = importlib.util.find_spec("pandas") is not None  # no longer a requirement
+    for module in (["pandas"] if has_pandas else []) + ["csv_extract"]:
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+        print(f"🧪 interpreter start + import {module}: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    rnd = random.Random(5)
+    print("🧪 200-row skills.csv, first lines:")
+    print("\n".join("   " + line for line in extract_csv(_csv(rnd, 200)).split("\n")[:3]))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mb in (args.csv_mb // 10, args.csv_mb):
+            path = os.path.join(tmp, f"{mb}mb.csv")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("skill,years,last_used,notes\n")
+                row = 0
+                while f.tell() < mb * 1024 * 1024:
+                    f.writelines(f"{rnd.choice(_SKILLS)},{row % 12},{2015 + row % 11},\"used at job {row}, daily\"\n"
+                                 for row in range(row, row + 10000))
+                    row += 10000
+            print(f"🧪 {mb} MB CSV, {row} rows")
+            runs = [("streaming (after)", False, "")]
+            if mb == args.csv_mb // 10:  # pandas on the large file needs several GiB
+                if has_pandas:
+                    runs.insert(0, ("pandas (before)", True, ""))
+                runs.append(("streaming, no caps", False, ", max_rows=10**9, max_chars=10**10"))
+            for label, legacy, caps in runs:
+                seconds, rss, chars = _csv_run(path, legacy, caps)
+                print(f"   {label:<18} {seconds * 1000:8.0f} ms  peak RSS {rss:7.1f} MiB  {chars:>11} characters")
+
+def _serve_app() -> Tuple[Any, str]:
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # no access log per upload
+    server = make_server("127.0.0.1", 0, api.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def bench_load(args: argparse.Namespace) -> None:
+    """Threaded server under concurrent uploads: parsing in-process vs. 1..N worker processes"""
+    import requests
+    from extract_pool import ExtractionExecutor
+
+    api.extraction_cache = ExtractionCache(memory_bytes=0, disk_dir="")  # every upload is parsed
+    docs = [("resume.pdf", _long_pdf(30, seed=n)) for n in range(8)]
+    server, base_url = _serve_app()
+    clients, per_client = 16, 6
+
+    def load() -> Dict[str, Any]:
+        health: List[float] = []
+        statuses: Dict[int, int] = {}
+        done = threading.Event()
+        lock = threading.Lock()
+
+        def client(n: int) -> None:
+            with requests.Session() as http:
+                for i in range(per_client):
+                    filename, data = docs[(n + i) % len(docs)]
+                    r = http.post(f"{base_url}/extract-text", files={"file": (filename, data)})
+                    with lock:
+                        statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+        def probe() -> None:
+            with requests.Session() as http:
+                while not done.is_set():
+                    started = time.perf_counter()
+                    http.get(f"{base_url}/health")
+                    health.append(time.perf_counter() - started)
+                    time.sleep(0.01)
+
+        prober = threading.Thread(target=probe)
+        prober.start()
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        prober.join()
+        health.sort()
+        return {"docs_per_s": clients * per_client / elapsed, "statuses": statuses,
+                "health_p50": health[len(health) // 2], "health_max": health[-1]}
+
+    print(f"🧪 {clients} clients x {per_client} uploads of 30-page PDFs, {os.cpu_count()} CPU(s)")
+    try:
+        modes = [("in the server process", None)]
+        modes += [(f"{n} worker process{'es' if n > 1 else ''}", n) for n in sorted({1, 2, 4, os.cpu_count() or 1})]
+        for label, workers in modes:
+            executor = ExtractionExecutor(workers=workers, queue_depth=clients) if workers else None
+            if executor:
+                executor.run(_timed, int)  # start the workers before timing
+            api.extract_executor = executor
+            try:
+                r = load()
+            finally:
+                if executor:
+                    executor.stop()
+            print(f"   {label:<22} {r['docs_per_s']:7.1f} docs/s  /health p50 {r['health_p50'] * 1000:6.1f} ms "
+                  f"max {r['health_max'] * 1000:7.1f} ms  statuses {r['statuses']}")
+
+        # Saturation: one worker and a queue of two turn the rest away with a Retry-After
+        executor = ExtractionExecutor(workers=1, queue_depth=2)
+        api.extract_executor = executor
+        retry_after: List[str] = []
+
+        def burst(n: int) -> None:
+            r = requests.post(f"{base_url}/extract-text", files={"file": docs[n % len(docs)]})
+            if r.status_code == 503:
+                retry_after.append(r.headers.get("Retry-After"))
+
+        threads = [threading.Thread(target=burst, args=(n,)) for n in range(12)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        print(f"🧪 12 simultaneous uploads, 1 worker + queue of 2: {len(retry_after)} got 503, "
+              f"Retry-After {sorted(set(retry_after))}")
+
+        # Timeout: the job is cancelled by replacing its worker, and the next job still runs
+        executor.timeout = 0.01
+        r = requests.post(f"{base_url}/extract-text", files={"file": ("long.pdf", _long_pdf(300))})
+        executor.timeout = 30
+        after = requests.post(f"{base_url}/extract-text", files={"file": docs[0]})
+        print(f"🧪 300-page PDF with a 10 ms timeout -> {r.status_code}; next upload -> {after.status_code}; "
+              f"pool {executor.stats()}")
+        executor.stop()
+    finally:
+        server.shutdown()
+
+SCENARIOS = {
+    "extract": bench_extract,
+    "pdf": bench_pdf,
+    "cache": bench_cache,
+    "load": bench_load,
+    "csv": bench_csv,
+}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="File text backend local benchmarks")
+    parser.add_argument("scenario", choices=list(SCENARIOS))
+    parser.add_argument("--resumes", type=int, default=40, help="sample resumes in the corpus")
+    parser.add_argument("--rounds", type=int, default=5, help="times each resume is uploaded")
+    parser.add_argument("--pdf-pages", type=int, default=300, help="pages in the long PDF")
+    parser.add_argument("--repeats", type=int, default=4, help="uploads of each resume in the cache scenario")
+    parser.add_argument("--csv-mb", type=int, default=200, help="size of the large CSV in the csv scenario")
+    args = parser.parse_args(argv)
+    SCENARIOS[args.scenario](args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+# conftest.py - Shared pytest setup for the file text backend
+#
+# Configure logging before extract_text_api does, so test runs do not append
+# to backend.log, and keep the extraction cache's disk tier off unless a test
+# asks for one. Extraction workers import extract_text_api on their own, so
+# the tests also run from a temporary directory where their backend.log lands.
+import os
+import logging
+import tempfile
+
+logging.basicConfig(level=logging.WARNING, handlers=[logging.StreamHandler()])
+os.environ.setdefault("EXTRACT_CACHE_DIR", "")
+os.chdir(tempfile.mkdtemp(prefix="file-text-backend-tests-"))
+
+import pytest
+
+@pytest.fixture
+def api(monkeypatch):
+    """extract_text_api parsing in the request thread with an empty, memory-only extraction cache"""
+    import extract_text_api
+    from extraction_cache import ExtractionCache
+
+    monkeypatch.setattr(extract_text_api, "extract_executor", None)
+    monkeypatch.setattr(extract_text_api, "extraction_cache", ExtractionCache(disk_dir=""))
+    return extract_text_api
@@ -0,0 +1,102 @@
+# csv_extract.py - CSV text extraction for /extract-text
+#
+# Rows are read one at a time with the csv module and written out as the
+# right-aligned, space-separated table DataFrame.to_string(index=False) used
+# to produce, without loading the file into a DataFrame (or importing pandas).
+# The upload is read twice: once for the column widths, once to write the
+# lines. Cells pandas read as missing are printed as NaN, and unnamed or
+# repeated header names are renamed the way pandas does it. CSV_MAX_ROWS and
+# CSV_MAX_CHARS cap how much of one upload is read, so memory stays bounded
+# however large the file is.
+import io
+import os
+import csv
+import logging
+from itertools import islice
+from typing import List, Optional, Tuple
+
+from extract_pool import UnreadableUpload
+
+CSV_MAX_ROWS = int(os.getenv("CSV_MAX_ROWS", "10000"))
+CSV_MAX_CHARS = int(os.getenv("CSV_MAX_CHARS", "500000"))
+
+# pandas' default na_values
+NA_VALUES = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"])
+
+def _open(source):
+    """Text stream over a path or bytes-like upload (a leading BOM is dropped)"""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "r", encoding="utf-8-sig", errors="replace", newline="")
+    return io.TextIOWrapper(io.BytesIO(source), encoding="utf-8-sig", errors="replace", newline="")
+
+def _records(f):
+    return (row for row in csv.reader(f) if row)  # blank lines are skipped, as pandas did
+
+def _header(row: List[str]) -> List[str]:
+    """Column names as pandas gives them: "Unnamed: i" for blanks, "name.1" for repeats"""
+    names: List[str] = []
+    for i, name in enumerate(row):
+        name = name or f"Unnamed: {i}"
+        unique, n = name, 0
+        while unique in names:
+            n += 1
+            unique = f"{name}.{n}"
+        names.append(unique)
+    return names
+
+def _cells(row: List[str], columns: int) -> List[str]:
+    cells = ["NaN" if cell in NA_VALUES else cell for cell in row]
+    return cells + ["NaN"] * (columns - len(cells))
+
+def _line(cells: List[str], widths: List[int]) -> str:
+    return " ".join(cell.rjust(widths[i]) for i, cell in enumerate(cells))
+
+def _widths(source, max_rows: int) -> Optional[Tuple[List[str], List[int]]]:
+    """Header and column widths over the first `max_rows` rows, or None for an empty file"""
+    with _open(source) as f:
+        records = _records(f)
+        header = next(records, None)
+        if header is None:
+            return None
+        header = _header(header)
+        widths = [len(name) for name in header]
+        for row in islice(records, max_rows):
+            if len(row) > len(widths):
+                widths += [0] * (len(row) - len(widths))
+            for i, cell in enumerate(_cells(row, len(widths))):
+                widths[i] = max(widths[i], len(cell))
+        if next(records, None) is not None:
+            logging.info(f"CSV has more than {max_rows} rows, extracting the first {max_rows}")
+    return header, widths
+
+def extract_csv(source, max_rows: int = CSV_MAX_ROWS, max_chars: int = CSV_MAX_CHARS) -> str:
+    """Text of the header and first `max_rows` rows of a CSV (path or bytes), at most `max_chars` characters.
+
+    Raises UnreadableUpload when the csv module cannot parse the file (a field
+    over csv.field_size_limit(), say).
+    """
+    try:
+        table = _widths(source, max_rows)
+        if table is None:
+            return ""
+        header, widths = table
+        parts = [_line(header + [""] * (len(widths) - len(header)), widths)]
+        total = len(parts[0])
+        with _open(source) as f:
+            records = _records(f)
+            next(records)
+            for row in islice(records, max_rows):
+                line = _line(_cells(row, len(widths)), widths)
+                parts.append(line)
+                total += len(line) + 1
+                if total >= max_chars:
+                    break
+    except csv.Error as e:
+        raise UnreadableUpload(f"Could not read CSV: {e}") from e
+    text = "\n".join(parts)
+    if len(text) > max_chars:
+        logging.info(f"CSV text cut at {max_chars} characters")
+        text = text[:max_chars]
+    return text
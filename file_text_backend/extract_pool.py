@@ -0,0 +1,169 @@
+# extract_pool.py - Bounded pool of extraction worker processes
+#
+# Parsing PDFs and DOCX files is CPU-bound and holds the GIL, so running it in
+# the Flask process stalls every other request. ExtractionExecutor keeps
+# EXTRACT_WORKERS long-lived worker processes; a request thread hands a job to
+# an idle one and waits on its pipe without holding the GIL. At most
+# EXTRACT_QUEUE_DEPTH further jobs wait for a worker; beyond that run() raises
+# Saturated straight away, with a Retry-After estimate. A job still running
+# after its timeout is cancelled by killing its worker, which is replaced.
+import os
+import math
+import queue
+import threading
+import time
+import multiprocessing
+from typing import Any, Callable, Dict, Optional
+
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+EXTRACT_QUEUE_DEPTH = int(os.getenv("EXTRACT_QUEUE_DEPTH", "16"))
+EXTRACT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT", "30"))
+
+class Saturated(Exception):
+    """Every worker is busy and the queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Extraction queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+class ExtractionTimeout(Exception):
+    pass
+
+class ExtractionError(Exception):
+    """The job raised in the worker, or the worker died running it"""
+
+class UnreadableUpload(Exception):
+    """The upload itself is malformed; a worker sends it back as is, not as an ExtractionError"""
+
+def _serve(conn) -> None:
+    """Worker process loop: run (fn, args) jobs from the pipe and send back (ok, result)"""
+    while True:
+        try:
+            fn, args = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send((True, fn(*args)))
+        except UnreadableUpload as e:
+            conn.send((False, e))
+        except Exception as e:
+            conn.send((False, f"{type(e).__name__}: {e}"))
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+class ExtractionExecutor:
+    """Runs extraction jobs on worker processes; safe to call from many request threads"""
+
+    def __init__(self, workers: int = EXTRACT_WORKERS, queue_depth: int = EXTRACT_QUEUE_DEPTH,
+                 timeout: float = EXTRACT_TIMEOUT):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        # forkserver/spawn, not fork: the Flask server that owns the pool is threaded
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._context = multiprocessing.get_context(method)
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._started = False
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._avg_seconds = 1.0  # moving average of job run time, for Retry-After
+        self._stats = {"completed": 0, "failed": 0, "rejected": 0, "timeouts": 0, "restarts": 0}
+
+    def start(self) -> None:
+        with self._lock:
+            if not self._started:
+                for _ in range(self.workers):
+                    self._idle.put(_Worker(self._context))
+                self._started = True
+
+    def stop(self) -> None:
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().kill()
+                except queue.Empty:
+                    break
+            self._started = False
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up"""
+        with self._lock:
+            waves = max(1, self._in_flight) / max(1, self.workers)
+            return max(1, math.ceil(self._avg_seconds * waves))
+
+    def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+        """Run fn(*args) on a worker and return its result.
+
+        Raises Saturated when the queue is full, ExtractionTimeout when the job
+        (waiting included) takes longer than `timeout`, ExtractionError when it
+        raised or its worker died, and passes UnreadableUpload on from the job.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise Saturated(self.retry_after())
+        self.start()
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._lock:
+            self._in_flight += 1
+        try:
+            try:
+                worker = self._idle.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                self._count("timeouts")
+                raise ExtractionTimeout("Timed out waiting for an extraction worker")
+            return self._run_on(worker, fn, args, deadline)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def _run_on(self, worker: _Worker, fn, args, deadline: float) -> Any:
+        started = time.monotonic()
+        try:
+            worker.conn.send((fn, args))
+            if not worker.conn.poll(max(0.0, deadline - started)):
+                worker = self._replace(worker)
+                self._count("timeouts")
+                raise ExtractionTimeout("Extraction timed out")
+            ok, value = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            worker = self._replace(worker)
+            self._count("failed")
+            raise ExtractionError(f"Extraction worker died: {e}")
+        finally:
+            self._idle.put(worker)
+        with self._lock:
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.monotonic() - started)
+        if not ok:
+            self._count("failed")
+            if isinstance(value, UnreadableUpload):
+                raise value
+            raise ExtractionError(value)
+        self._count("completed")
+        return value
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        self._count("restarts")
+        return _Worker(self._context)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, workers=self.workers, queue_depth=self.queue_depth,
+                        in_flight=self._in_flight, avg_seconds=round(self._avg_seconds, 3))
@@ -1,12 +1,19 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, request, jsonify
+import io
 import logging
 import os
 import json
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# These read their settings from the environment
+from extraction_cache import extraction_cache, content_key
+from extract_pool import ExtractionExecutor, Saturated, ExtractionTimeout, UnreadableUpload, EXTRACT_WORKERS
+from csv_extract import extract_csv, CSV_MAX_ROWS, CSV_MAX_CHARS
+
 # Set up logging to file and console
 logging.basicConfig(
     level=logging.INFO,
@@ -17,13 +24,27 @@ logging.basicConfig(
     ]
 )
 
+# Uploads up to this size are extracted from memory; larger ones are spooled to a temp file
+EXTRACT_SPILL_BYTES = int(os.getenv("EXTRACT_SPILL_BYTES", str(20 * 1024 * 1024)))
+
+class UploadRequest(Request):
+    """Keeps uploads up to EXTRACT_SPILL_BYTES in memory (werkzeug spools anything over 500KB)"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is None or total_content_length > EXTRACT_SPILL_BYTES:
+            # a uniquely named file, removed when the request closes it
+            return tempfile.NamedTemporaryFile("wb+", suffix=os.path.splitext(filename or "")[1])
+        return io.BytesIO()
+
 app = Flask(__name__)
+app.request_class = UploadRequest
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 
 # Try to import optional dependencies
 try:
     import fitz  # PyMuPDF
+    from pdf_extract import extract_pdf, PDF_MAX_PAGES, PDF_MAX_CHARS
     PYMUPDF_AVAILABLE = True
 except ImportError:
     logging.warning("PyMuPDF (fitz) not available. PDF extraction will be limited.")
@@ -36,13 +57,6 @@ except ImportError:
     logging.warning("python-docx not available. DOCX extraction will be limited.")
     DOCX_AVAILABLE = False
 
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    logging.warning("pandas not available. CSV extraction will be limited.")
-    PANDAS_AVAILABLE = False
-
 try:
     from openai import OpenAI
     OPENAI_AVAILABLE = True
@@ -53,33 +67,84 @@ except ImportError:
     logging.warning("openai not available. AI analysis will be limited.")
     OPENAI_AVAILABLE = False
 
-def extract_pdf_text(file_path):
+# Extractors take a file path or the upload's bytes (bytes, bytearray or memoryview)
+def _is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+def _as_file(source):
+    return source if _is_path(source) else io.BytesIO(source)
+
+def extract_pdf_text(source):
     if not PYMUPDF_AVAILABLE:
         return "PDF extraction not available. PyMuPDF not installed."
     
-    doc = fitz.open(file_path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text
+    return extract_pdf(source)
 
-def extract_docx_text(file_path):
+def extract_docx_text(source):
     if not DOCX_AVAILABLE:
         return "DOCX extraction not available. python-docx not installed."
     
-    doc = docx.Document(file_path)
+    doc = docx.Document(_as_file(source))
     return "\n".join([para.text for para in doc.paragraphs])
 
-def extract_csv_text(file_path):
-    if not PANDAS_AVAILABLE:
-        return "CSV extraction not available. pandas not installed."
-    
-    df = pd.read_csv(file_path)
-    return df.to_string(index=False)
+def extract_csv_text(source):
+    return extract_csv(source)
+
+def extract_txt_text(source):
+    if _is_path(source):
+        with open(source, "r", encoding="utf-8") as f:
+            return f.read()
+    return str(source, "utf-8")
 
-def extract_txt_text(file_path):
-    with open(file_path, "r", encoding="utf-8") as f:
-        return f.read()
+EXTRACTORS = {
+    ".pdf": extract_pdf_text,
+    ".docx": extract_docx_text,
+    ".csv": extract_csv_text,
+    ".txt": extract_txt_text,
+}
+
+# Bump when an extractor's output changes, so texts cached by the old one are not served
+EXTRACTOR_VERSION = "2"
+
+def _extractor_version(ext):
+    """Cache key part for `ext`; None when its library is missing (placeholder texts are not cached)"""
+    available = {".pdf": PYMUPDF_AVAILABLE, ".docx": DOCX_AVAILABLE}.get(ext, True)
+    if not available:
+        return None
+    if ext == ".pdf":
+        return f"{EXTRACTOR_VERSION}:{PDF_MAX_PAGES}:{PDF_MAX_CHARS}"
+    if ext == ".csv":
+        return f"{EXTRACTOR_VERSION}:csv2:{CSV_MAX_ROWS}:{CSV_MAX_CHARS}"
+    return EXTRACTOR_VERSION
+
+# Parsing runs on worker processes so it does not hold the GIL of the server;
+# EXTRACT_WORKERS=0 parses in the request thread instead
+extract_executor = ExtractionExecutor() if EXTRACT_WORKERS > 0 else None
+
+def _extract_job(ext, source):
+    """Runs in an extraction worker; documents already spread over the workers, so PDF pages are read serially"""
+    if ext == ".pdf" and PYMUPDF_AVAILABLE:
+        return extract_pdf(source, workers=1)
+    return EXTRACTORS[ext](source)
+
+def _run_extractor(ext, source):
+    if extract_executor is None:
+        return EXTRACTORS[ext](source)
+    if isinstance(source, memoryview):
+        source = source.tobytes()  # sent to the worker over a pipe
+    return extract_executor.run(_extract_job, ext, source)
+
+def _extract_cached(ext, upload, size, source):
+    """Text of an upload (bytes-like or file for hashing, `source` for the extractor), cached by content"""
+    version = _extractor_version(ext)
+    if version is None:
+        return _run_extractor(ext, source)
+    key = content_key(upload, ext, version)
+    text = extraction_cache.get(key, size)
+    if text is None:
+        text = _run_extractor(ext, source)
+        extraction_cache.put(key, text)
+    return text
 
 def get_real_jobs():
     try:
@@ -123,9 +188,10 @@ def health_check():
         "dependencies": {
             "pymupdf": PYMUPDF_AVAILABLE,
             "docx": DOCX_AVAILABLE,
-            "pandas": PANDAS_AVAILABLE,
             "openai": OPENAI_AVAILABLE
-        }
+        },
+        "extract_cache": extraction_cache.stats(),
+        "extract_pool": extract_executor.stats() if extract_executor else None
     })
 
 @app.route('/extract-text', methods=['POST'])
@@ -133,33 +199,33 @@ def extract_text():
     try:
         file = request.files['file']
         filename = file.filename.lower()
-        temp_path = f"/tmp/{file.filename}"
-        
-        # Ensure /tmp directory exists
-        os.makedirs("/tmp", exist_ok=True)
-        
-        file.save(temp_path)
-        logging.info(f"Saved file {filename} to {temp_path}")
+        ext = os.path.splitext(filename)[1]
+        if ext not in EXTRACTORS:
+            return jsonify({"error": "Unsupported file type"}), 400
 
+        # UploadRequest gave the upload a BytesIO, or a named temp file if it is very large
+        stream = file.stream
         try:
-            if filename.endswith('.pdf'):
-                text = extract_pdf_text(temp_path)
-            elif filename.endswith('.docx'):
-                text = extract_docx_text(temp_path)
-            elif filename.endswith('.csv'):
-                text = extract_csv_text(temp_path)
-            elif filename.endswith('.txt'):
-                text = extract_txt_text(temp_path)
+            if isinstance(stream, io.BytesIO):
+                with stream.getbuffer() as upload:
+                    logging.info(f"Extracting {filename} from memory ({upload.nbytes} bytes)")
+                    text = _extract_cached(ext, upload, upload.nbytes, upload)
             else:
-                return jsonify({"error": "Unsupported file type"}), 400
+                stream.flush()
+                logging.info(f"Extracting {filename} from spooled file {stream.name}")
+                text = _extract_cached(ext, stream, os.fstat(stream.fileno()).st_size, stream.name)
+        except Saturated as e:
+            logging.warning(f"Rejected {filename}: {str(e)}")
+            return jsonify({"error": str(e)}), 503, {"Retry-After": str(e.retry_after)}
+        except ExtractionTimeout as e:
+            logging.error(f"Error extracting text: {str(e)}")
+            return jsonify({"error": str(e)}), 504
+        except UnreadableUpload as e:
+            logging.warning(f"Rejected {filename}: {str(e)}")
+            return jsonify({"error": str(e)}), 422
         except Exception as e:
             logging.error(f"Error extracting text: {str(e)}")
             return jsonify({"error": f"Error extracting text: {str(e)}"}), 500
-        finally:
-            try:
-                os.remove(temp_path)
-            except:
-                pass
 
         return jsonify({"text": text})
     except Exception as e:
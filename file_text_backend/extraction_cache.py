@@ -0,0 +1,164 @@
+# extraction_cache.py - Content-addressed cache of extracted text
+#
+# Users re-upload the same resume while onboarding. Results are keyed by a
+# hash of the uploaded bytes, the file type and the extractor version, so a
+# repeat upload is answered without parsing it again. The memory tier is an
+# LRU bounded by EXTRACT_CACHE_MEMORY_BYTES; setting EXTRACT_CACHE_DIR adds a
+# disk tier bounded by EXTRACT_CACHE_DISK_BYTES (least recently used files go
+# first) that survives restarts and is shared by processes on the host.
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+EXTRACT_CACHE_MEMORY_BYTES = int(os.getenv("EXTRACT_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+EXTRACT_CACHE_DIR = os.getenv("EXTRACT_CACHE_DIR", "")
+EXTRACT_CACHE_DISK_BYTES = int(os.getenv("EXTRACT_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+
+_CHUNK = 1024 * 1024
+
+def content_key(upload, kind: str, version: str) -> str:
+    """Key for an upload given as bytes-like or a binary file (read from the start)"""
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(upload, (bytes, bytearray, memoryview)):
+        digest.update(upload)
+    else:
+        upload.seek(0)
+        for chunk in iter(lambda: upload.read(_CHUNK), b""):
+            digest.update(chunk)
+        upload.seek(0)
+    digest.update(f"\0{kind}\0{version}".encode("utf-8"))
+    return digest.hexdigest()
+
+class ExtractionCache:
+    """Two-tier text cache; safe to share between request threads"""
+
+    def __init__(self, memory_bytes: int = EXTRACT_CACHE_MEMORY_BYTES, disk_dir: str = EXTRACT_CACHE_DIR,
+                 disk_bytes: int = EXTRACT_CACHE_DISK_BYTES):
+        self.memory_bytes = memory_bytes
+        self.disk_dir = disk_dir or None
+        self.disk_bytes = disk_bytes
+        self._texts: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_used = 0
+        self._disk_used = 0
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bytes_saved": 0}
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_used = sum(os.path.getsize(p) for p in self._disk_files())
+
+    def get(self, key: str, upload_bytes: int = 0) -> Optional[str]:
+        """Cached text for `key`; `upload_bytes` is counted as saved on a hit"""
+        with self._lock:
+            text = self._texts.get(key)
+            if text is not None:
+                self._texts.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                self._stats["bytes_saved"] += upload_bytes
+                return text
+        text = self._read_disk(key)
+        with self._lock:
+            if text is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._stats["bytes_saved"] += upload_bytes
+            self._remember(key, text)
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        with self._lock:
+            self._remember(key, text)
+        self._write_disk(key, text)
+
+    def _remember(self, key: str, text: str) -> None:
+        size = len(text.encode("utf-8"))
+        if size > self.memory_bytes:
+            return
+        previous = self._texts.pop(key, None)
+        if previous is not None:
+            self._memory_used -= len(previous.encode("utf-8"))
+        self._texts[key] = text
+        self._memory_used += size
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._texts.popitem(last=False)
+            self._memory_used -= len(evicted.encode("utf-8"))
+
+    # ── disk tier ──
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + ".txt")
+
+    def _disk_files(self):
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if name.endswith(".txt"):
+                    yield os.path.join(root, name)
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)  # recency for eviction
+            return text
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, text: str) -> None:
+        if not self.disk_dir:
+            return
+        data = text.encode("utf-8")
+        if len(data) > self.disk_bytes:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            existed = os.path.exists(path)
+            os.replace(tmp, path)  # readers see the old file or the whole new one
+        except OSError:
+            return
+        with self._lock:
+            if not existed:
+                self._disk_used += len(data)
+            over = self._disk_used > self.disk_bytes
+        if over:
+            self._trim_disk()
+
+    def _trim_disk(self) -> None:
+        """Delete least recently used files until the disk tier fits its budget again"""
+        files = []
+        for path in self._disk_files():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        files.sort()
+        used = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if used <= self.disk_bytes * 0.9:  # some headroom so every write does not rescan
+                break
+            try:
+                os.remove(path)
+                used -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_used = used
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            hits = lookups - self._stats["misses"]
+            return dict(self._stats, hit_rate=round(hits / lookups, 3) if lookups else 0.0,
+                        memory_entries=len(self._texts), memory_bytes=self._memory_used,
+                        disk_bytes=self._disk_used if self.disk_dir else None)
+
+extraction_cache = ExtractionCache()
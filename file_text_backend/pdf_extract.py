@@ -0,0 +1,87 @@
+# pdf_extract.py - PDF text extraction for /extract-text
+#
+# Page texts are collected in a list and joined once. Documents with at least
+# PDF_PARALLEL_MIN_PAGES pages are split into page ranges that a process pool
+# extracts side by side (text extraction is CPU-bound; threads would queue on
+# the GIL). PDF_MAX_PAGES and PDF_MAX_CHARS cap how much of one upload is read,
+# so a 300-page document cannot hold a worker for long. Pool processes come
+# from a fork server (spawn where there is none) rather than forking the
+# threaded Flask process.
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import List, Optional
+
+import fitz  # PyMuPDF
+
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "100"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "500000"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "24"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def page_pool(workers: int = PDF_WORKERS) -> ProcessPoolExecutor:
+    """A new pool of `workers` processes for extract_pdf(executor=...)"""
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+def _shared_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = page_pool(PDF_WORKERS)
+        return _pool
+
+def _open(source):
+    if isinstance(source, (str, os.PathLike)):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+def _page_texts(doc, start: int, stop: int, max_chars: int) -> List[str]:
+    parts = []
+    total = 0
+    for number in range(start, stop):
+        text = doc.load_page(number).get_text()
+        parts.append(text)
+        total += len(text)
+        if total >= max_chars:
+            break
+    return parts
+
+def _extract_range(source, start: int, stop: int, max_chars: int) -> List[str]:
+    """Pool task: open the document in this process and extract pages [start, stop)"""
+    with _open(source) as doc:
+        return _page_texts(doc, start, stop, max_chars)
+
+def extract_pdf(source, max_pages: int = PDF_MAX_PAGES, max_chars: int = PDF_MAX_CHARS,
+                workers: int = PDF_WORKERS, executor: Optional[Executor] = None) -> str:
+    """Text of the first `max_pages` pages of a PDF (path or bytes), at most `max_chars` characters.
+
+    Long documents are split into `workers` page ranges run on `executor`
+    (default: a shared pool of PDF_WORKERS processes).
+    """
+    with _open(source) as doc:
+        pages = min(doc.page_count, max_pages)
+        if pages < doc.page_count:
+            logging.info(f"PDF has {doc.page_count} pages, extracting the first {pages}")
+        if workers <= 1 or pages < PDF_PARALLEL_MIN_PAGES:
+            parts = _page_texts(doc, 0, pages, max_chars)
+        else:
+            parts = None
+    if parts is None:
+        if isinstance(source, memoryview):
+            source = source.tobytes()  # pool tasks are pickled
+        step = -(-pages // workers)
+        pool = executor or _shared_pool()
+        futures = [pool.submit(_extract_range, source, start, min(start + step, pages), max_chars)
+                   for start in range(0, pages, step)]
+        parts = [text for future in futures for text in future.result()]
+    text = "".join(parts)
+    if len(text) > max_chars:
+        logging.info(f"PDF text cut at {max_chars} characters")
+        text = text[:max_chars]
+    return text
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+import io
+import csv
+import random
+
+import pytest
+
+from csv_extract import extract_csv
+from extract_pool import UnreadableUpload
+
+def _upload(client, filename, data):
+    return client.post("/extract-text", data={"file": (io.BytesIO(data), filename)},
+                       content_type="multipart/form-data")
+
+def test_layout_is_right_aligned_columns():
+    assert extract_csv(b"skill,years\nPython,8\nGo,12\n") == " skill years\nPython     8\n    Go    12"
+
+def test_missing_cells_and_headers_are_named_like_pandas():
+    data = "﻿name,level,,name\nal,NA,a,b\nbobby,,\n\n,senior,c,d\n".encode("utf-8")
+    assert extract_csv(data).split("\n") == [
+        " name  level Unnamed: 2 name.1",
+        "   al    NaN          a      b",
+        "bobby    NaN        NaN    NaN",
+        "  NaN senior          c      d",
+    ]
+
+def test_widths_come_from_every_row():
+    rows = ["a,b"] + [f"{i},x" for i in range(2000)] + ["1,wider at the very end"]
+    lines = extract_csv(("\n".join(rows) + "\n").encode()).split("\n")
+    assert len({len(line) for line in lines}) == 1
+    assert lines[1] == "   0 " + "x".rjust(len("wider at the very end"))
+
+def test_text_matches_pandas():
+    pd = pytest.importorskip("pandas")
+    rnd = random.Random(1)
+    rows = ["name,skill,level,notes"]
+    for i in range(3000):
+        rows.append(",".join([rnd.choice(["al", "bobby", "", "x" * rnd.randint(1, 40)]),
+                              rnd.choice(["python", "go", "", "NA"]), rnd.choice(["senior", "junior", ""]),
+                              "note" * (40 if i == 2500 else 1)]))
+    data = ("\n".join(rows) + "\n").encode()
+    assert extract_csv(data, max_chars=10**9) == pd.read_csv(io.BytesIO(data)).to_string(index=False)
+
+def test_caps():
+    data = ("n\n" + "".join(f"{i}\n" for i in range(100))).encode()
+    assert extract_csv(data, max_rows=3).split("\n") == ["n", "0", "1", "2"]  # widths from the rows read
+    assert extract_csv(data, max_chars=8) == " n\n 0\n 1"
+    assert extract_csv(b"") == ""
+
+def test_oversized_field_is_an_unreadable_upload(api):
+    data = b"a,b\n1," + b"x" * (csv.field_size_limit() + 1) + b"\n"
+    with pytest.raises(UnreadableUpload):
+        extract_csv(data)
+    r = _upload(api.app.test_client(), "skills.csv", data)
+    assert r.status_code == 422 and "field larger than field limit" in r.get_json()["error"]
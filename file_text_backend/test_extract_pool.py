@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import io
+import time
+import threading
+
+import pytest
+
+from extract_pool import ExtractionExecutor, ExtractionError, ExtractionTimeout, Saturated
+
+def _upload(client, filename, data):
+    return client.post("/extract-text", data={"file": (io.BytesIO(data), filename)},
+                       content_type="multipart/form-data")
+
+@pytest.fixture
+def executor():
+    pools = []
+
+    def make(**kwargs):
+        pool = ExtractionExecutor(**kwargs)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.stop()
+
+def _occupy(pool, seconds):
+    """Run time.sleep(seconds) on the pool from another thread; returns once it holds a slot"""
+    thread = threading.Thread(target=pool.run, args=(time.sleep, seconds))
+    thread.start()
+    while pool.stats()["in_flight"] < 1:
+        time.sleep(0.005)
+    return thread
+
+def test_jobs_run_on_workers_and_errors_come_back(executor):
+    pool = executor(workers=2, queue_depth=0)
+    assert pool.run(divmod, 7, 2) == (3, 1)
+    with pytest.raises(ExtractionError, match="ZeroDivisionError"):
+        pool.run(divmod, 1, 0)
+    assert pool.run(divmod, 9, 4) == (2, 1)  # the worker that raised is still usable
+    stats = pool.stats()
+    assert stats["completed"] == 2 and stats["failed"] == 1 and stats["restarts"] == 0
+
+def test_saturated_pool_turns_jobs_away(executor):
+    pool = executor(workers=1, queue_depth=0)
+    pool.start()
+    busy = _occupy(pool, 0.5)
+    with pytest.raises(Saturated) as e:
+        pool.run(divmod, 7, 2)
+    busy.join()
+    assert e.value.retry_after >= 1
+    assert pool.stats()["rejected"] == 1
+    assert pool.run(divmod, 7, 2) == (3, 1)  # a slot is free again
+
+def test_timed_out_job_kills_and_replaces_its_worker(executor):
+    pool = executor(workers=1, queue_depth=0)
+    assert pool.run(divmod, 7, 2) == (3, 1)  # workers started
+    with pytest.raises(ExtractionTimeout):
+        pool.run(time.sleep, 30, timeout=0.2)
+    assert pool.run(divmod, 7, 2) == (3, 1)  # answered by the replacement
+    stats = pool.stats()
+    assert stats["timeouts"] == 1 and stats["restarts"] == 1
+
+def test_extract_text_answers_503_with_retry_after_when_saturated(api, executor, monkeypatch):
+    pool = executor(workers=1, queue_depth=0)
+    pool.start()
+    monkeypatch.setattr(api, "extract_executor", pool)
+    busy = _occupy(pool, 0.5)
+    r = _upload(api.app.test_client(), "resume.txt", b"Software Engineer")
+    busy.join()
+    assert r.status_code == 503
+    assert int(r.headers["Retry-After"]) >= 1
+
+def test_extract_text_answers_504_on_timeout_and_recovers(api, executor, monkeypatch):
+    pool = executor(workers=1, queue_depth=0, timeout=30)
+    monkeypatch.setattr(api, "extract_executor", pool)
+    client = api.app.test_client()
+    assert _upload(client, "resume.txt", b"warm up").status_code == 200
+    pool.timeout = 0.001
+    assert _upload(client, "long.txt", b"Software Engineer\n" * 1_000_000).status_code == 504
+    pool.timeout = 30
+    r = _upload(client, "resume.txt", b"Software Engineer")
+    assert r.status_code == 200 and r.get_json() == {"text": "Software Engineer"}
+    assert pool.stats()["restarts"] == 1
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+import io
+import os
+
+from extraction_cache import ExtractionCache, content_key
+
+def _upload(client, filename, data):
+    return client.post("/extract-text", data={"file": (io.BytesIO(data), filename)},
+                       content_type="multipart/form-data")
+
+def test_content_key_is_the_same_for_bytes_and_files():
+    data = b"resume " * 1000
+    f = io.BytesIO(data)
+    assert content_key(data, ".txt", "1") == content_key(f, ".txt", "1") == content_key(memoryview(data), ".txt", "1")
+    assert f.tell() == 0  # left at the start for the extractor
+    assert content_key(data, ".txt", "1") != content_key(data, ".txt", "2")
+    assert content_key(data, ".txt", "1") != content_key(data, ".csv", "1")
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ExtractionCache(memory_bytes=10, disk_dir="")
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    assert cache.get("a") == "aaaa"  # now the most recently used
+    cache.put("c", "cccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa" and cache.get("c") == "cccc"
+    cache.put("big", "x" * 11)  # over the whole budget: not kept, nothing else evicted
+    assert cache.get("big") is None and cache.get("a") == "aaaa"
+    stats = cache.stats()
+    assert stats["memory_entries"] == 2 and stats["memory_bytes"] == 8
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    ExtractionCache(disk_dir=str(tmp_path)).put("k", "text")
+    cache = ExtractionCache(disk_dir=str(tmp_path))
+    assert cache.get("k", upload_bytes=100) == "text"
+    assert cache.get("k") == "text"  # promoted to memory
+    stats = cache.stats()
+    assert stats["disk_hits"] == 1 and stats["memory_hits"] == 1 and stats["bytes_saved"] == 100
+
+def test_disk_tier_is_trimmed_to_its_budget(tmp_path):
+    cache = ExtractionCache(memory_bytes=0, disk_dir=str(tmp_path), disk_bytes=1000)
+    for i in range(10):
+        cache.put(f"{i:02d}", str(i) * 300)
+        path = cache._path(f"{i:02d}")
+        os.utime(path, (i, i))  # distinct recency, oldest first
+    assert cache.stats()["disk_bytes"] <= 1000
+    assert cache.get("09") == "9" * 300
+    assert cache.get("00") is None
+    used = sum(os.path.getsize(p) for p in cache._disk_files())
+    assert used == cache.stats()["disk_bytes"]
+
+def test_repeat_upload_is_parsed_once(api, monkeypatch):
+    calls = []
+    extract_txt = api.EXTRACTORS[".txt"]
+
+    def counting(source):
+        calls.append(1)
+        return extract_txt(source)
+
+    monkeypatch.setitem(api.EXTRACTORS, ".txt", counting)
+    client = api.app.test_client()
+    first = _upload(client, "resume.txt", b"Software Engineer\nPython, Go")
+    again = _upload(client, "copy of resume.txt", b"Software Engineer\nPython, Go")
+    other = _upload(client, "resume.txt", b"Designer\nFigma")
+    assert first.get_json() == again.get_json() == {"text": "Software Engineer\nPython, Go"}
+    assert other.get_json() == {"text": "Designer\nFigma"}
+    assert len(calls) == 2
+    assert api.extraction_cache.stats()["memory_hits"] == 1
@@ -0,0 +1,88 @@
+-- Application status transitions for PUT /jobs/applications/{id} and POST /jobs/applications/status
+-- (one statement moves any number of a user's applications and appends their history)
+-- Run this SQL directly in Supabase SQL Editor or using psql
+
+-- Append-only: one row per status change, never updated or deleted by the API
+CREATE TABLE IF NOT EXISTS public.application_status_history (
+  id BIGSERIAL PRIMARY KEY,
+  match_id INTEGER NOT NULL REFERENCES public.matches(id) ON DELETE CASCADE,
+  profile_id UUID NOT NULL,
+  from_status TEXT,
+  to_status TEXT NOT NULL,
+  changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS application_status_history_match_idx
+  ON public.application_status_history (match_id, changed_at);
+
+ALTER TABLE public.application_status_history ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view own status history" ON public.application_status_history;
+CREATE POLICY "Users can view own status history"
+  ON public.application_status_history FOR SELECT
+  USING (auth.uid() = profile_id);
+
+-- Move the user's applications in _ids to _status, optionally only those currently in
+-- _from_status. Returns one row per application found: `changed` is false when it was
+-- already in _status or not in _from_status. Ids the user does not own are left out.
+CREATE OR REPLACE FUNCTION public.transition_applications(
+  _profile_id UUID,
+  _ids INTEGER[],
+  _status TEXT,
+  _from_status TEXT[] DEFAULT NULL
+)
+RETURNS TABLE (id INTEGER, status TEXT, from_status TEXT, changed BOOLEAN, updated_at TIMESTAMPTZ)
+LANGUAGE sql
+AS $$
+  WITH found AS (
+    SELECT m.id, m.status
+    FROM public.matches m
+    WHERE m.profile_id = _profile_id AND m.id = ANY(_ids)
+    FOR UPDATE
+  ), moved AS (
+    UPDATE public.matches m
+    SET status = _status
+    FROM found
+    WHERE m.id = found.id
+      AND found.status IS DISTINCT FROM _status
+      AND (_from_status IS NULL OR found.status = ANY(_from_status))
+    RETURNING m.id, found.status AS from_status, m.updated_at
+  ), history AS (
+    INSERT INTO public.application_status_history (match_id, profile_id, from_status, to_status)
+    SELECT moved.id, _profile_id, moved.from_status, _status FROM moved
+  )
+  SELECT found.id,
+         CASE WHEN moved.id IS NULL THEN found.status ELSE _status END,
+         found.status,
+         moved.id IS NOT NULL,
+         moved.updated_at
+  FROM found
+  LEFT JOIN moved ON moved.id = found.id
+  ORDER BY found.id
+$$;
+
+GRANT EXECUTE ON FUNCTION public.transition_applications(UUID, INTEGER[], TEXT, TEXT[]) TO anon, authenticated;
+
+-- The first history row of every application: the status it was created with
+-- (an upsert that hits an existing application is an update and adds nothing)
+CREATE OR REPLACE FUNCTION public.record_initial_application_status()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  INSERT INTO public.application_status_history (match_id, profile_id, from_status, to_status)
+  VALUES (NEW.id, NEW.profile_id, NULL, NEW.status);
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS matches_initial_status ON public.matches;
+CREATE TRIGGER matches_initial_status
+  AFTER INSERT ON public.matches
+  FOR EACH ROW EXECUTE FUNCTION public.record_initial_application_status();
+
+-- Applications created before the trigger and never moved since: their current status is the initial one
+INSERT INTO public.application_status_history (match_id, profile_id, from_status, to_status, changed_at)
+SELECT m.id, m.profile_id, NULL, m.status, m.created_at
+FROM public.matches m
+WHERE NOT EXISTS (SELECT 1 FROM public.application_status_history h WHERE h.match_id = m.id);
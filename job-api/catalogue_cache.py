@@ -0,0 +1,74 @@
+# catalogue_cache.py - Process-local cache of rendered job listing pages
+#
+# The catalogue only changes when an ingest run writes jobs, so listing pages
+# are cached already encoded (see json_response.py): a hit skips the database
+# and serialization, and reuses the compressed bodies and ETag. Entries expire
+# after JOBS_CACHE_TTL seconds (ingest may run in another process) and are
+# dropped as soon as an ingest run in this process stores jobs.
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, Hashable
+
+from json_response import EncodedBody
+
+JOBS_CACHE_TTL = float(os.getenv("JOBS_CACHE_TTL", "60"))
+JOBS_CACHE_MAX_ENTRIES = int(os.getenv("JOBS_CACHE_MAX_ENTRIES", "256"))
+
+Page = Tuple[EncodedBody, Dict[str, str]]  # (encoded body, extra response headers)
+
+class CatalogueCache:
+    """TTL + LRU map of listing pages; safe to invalidate from the ingest thread"""
+
+    def __init__(self, ttl: float = JOBS_CACHE_TTL, max_entries: int = JOBS_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._pages: "OrderedDict[Hashable, Tuple[float, Page]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "invalidations": 0}
+
+    @property
+    def generation(self) -> int:
+        """Take this before reading the database and hand it to put()"""
+        return self._generation
+
+    def get(self, key: Hashable) -> Optional[Page]:
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._pages[key]
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._pages.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key: Hashable, body: EncodedBody, headers: Dict[str, str], generation: int) -> None:
+        """Store a page read at `generation`; dropped if the catalogue changed since"""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._pages[key] = (time.monotonic() + self.ttl, (body, headers))
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._pages.clear()
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, entries=len(self._pages),
+                        bytes=sum(page[0].nbytes() for _, page in self._pages.values()))
+
+catalogue_cache = CatalogueCache()
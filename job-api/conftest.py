@@ -0,0 +1,41 @@
+# conftest.py - Shared pytest setup for the job API
+#
+# Point every env-configured path and the Supabase settings somewhere
+# harmless before any module is imported: supabase_client refuses to import
+# without SUPABASE_URL/SUPABASE_KEY, and the indexes and caches would
+# otherwise land next to the code.
+import os
+import tempfile
+
+_workdir = tempfile.mkdtemp(prefix="job-api-tests-")
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+os.environ.setdefault("JOB_HASH_INDEX_PATH", os.path.join(_workdir, "job_hashes.json"))
+os.environ.setdefault("JOB_DEDUP_INDEX_PATH", os.path.join(_workdir, "job_dedup.json"))
+os.environ.setdefault("FEED_CACHE_DIR", os.path.join(_workdir, "feed_cache"))
+os.environ.setdefault("SWIPE_LOG_PATH", os.path.join(_workdir, "swipe_log"))
+
+import pytest
+
+from stand_ins import start_postgrest_stand_in, app_against
+
+@pytest.fixture
+def postgrest():
+    """Start a PostgREST stand-in with `rows` synthetic rows and point db and main at it.
+
+    Returns (db module, FastAPI app, base URL); the stand-in is stopped after the test.
+    """
+    processes = []
+
+    def start(rows: int = 20):
+        process, base_url = start_postgrest_stand_in(0, rows=rows)
+        processes.append(process)
+        db, app = app_against(base_url)
+        from catalogue_cache import catalogue_cache
+        catalogue_cache.invalidate()  # pages cached against another stand-in
+        return db, app, base_url
+
+    yield start
+    for process in processes:
+        process.terminate()
+        process.join()
@@ -0,0 +1,173 @@
+# db.py - Shared async PostgREST access for the API process
+#
+# One pooled keep-alive connection pool serves every request handler.
+# Handlers call `db()` and await the builder:
+#     resp = await db().table("jobs").select("*").limit(50).execute()
+# The pool is created on first use inside the server's event loop and closed
+# by the FastAPI lifespan. Sync code that runs off the event loop (ingest
+# worker, scripts) keeps using the sync client in supabase_client.py.
+#
+# Transport: httpcore 1.0's async pool rescans every connection for every
+# queued request, which goes quadratic once a few hundred requests are in
+# flight. By default requests go through an aiohttp connector instead
+# (keep-alive HTTP/1.1). DB_HTTP2=1 switches to httpx's own HTTP/2 pool,
+# which multiplexes over a handful of TLS connections; a semaphore keeps its
+# request queue empty.
+import os
+import asyncio
+from typing import Any, Dict, List, Optional, Union
+
+import aiohttp
+import httpx
+from dotenv import load_dotenv
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+# Pool sizing: max open connections (= max requests in flight) and idle expiry
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "100"))
+DB_KEEPALIVE_EXPIRY = float(os.getenv("DB_KEEPALIVE_EXPIRY", "30"))
+DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "10"))
+DB_HTTP2 = os.getenv("DB_HTTP2", "").lower() in ("1", "true", "yes")
+
+class AiohttpTransport(httpx.AsyncBaseTransport):
+    """httpx transport backed by a keep-alive aiohttp connector"""
+
+    def __init__(self, pool_size: int, keepalive_expiry: float, timeout: float):
+        self._pool_size = pool_size
+        self._keepalive_expiry = keepalive_expiry
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._pool_size,
+                                               keepalive_timeout=self._keepalive_expiry),
+                timeout=self._timeout,
+                # httpx decodes the body from the forwarded Content-Encoding
+                auto_decompress=False,
+            )
+        try:
+            async with self._session.request(
+                request.method,
+                str(request.url),
+                headers=request.headers.multi_items(),
+                data=await request.aread() or None,
+                allow_redirects=False,
+            ) as resp:
+                body = await resp.read()
+                return httpx.Response(
+                    resp.status,
+                    headers=[(k.decode("latin-1"), v.decode("latin-1")) for k, v in resp.raw_headers],
+                    content=body,
+                    request=request,
+                )
+        except asyncio.TimeoutError as e:
+            raise httpx.TimeoutException(str(e) or "PostgREST request timed out", request=request) from e
+        except aiohttp.ClientError as e:
+            raise httpx.TransportError(str(e)) from e
+
+    async def aclose(self) -> None:
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+class _GatedAsyncClient(httpx.AsyncClient):
+    """AsyncClient that queues callers on a semaphore sized to the pool"""
+
+    def __init__(self, *args, max_in_flight: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._max_in_flight = max_in_flight
+        self._gate: Optional[asyncio.Semaphore] = None
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        if self._gate is None:
+            self._gate = asyncio.Semaphore(self._max_in_flight)
+        async with self._gate:
+            return await super().send(request, **kwargs)
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """AsyncPostgrestClient whose session is a bounded keep-alive pool"""
+
+    def create_session(
+        self,
+        base_url: str,
+        headers: Dict[str, str],
+        timeout: Union[int, float, httpx.Timeout],
+        verify: bool = True,
+        proxy: Optional[str] = None,
+    ) -> httpx.AsyncClient:
+        if DB_HTTP2:
+            return _GatedAsyncClient(
+                base_url=base_url,
+                headers=headers,
+                timeout=timeout,
+                verify=verify,
+                proxy=proxy,
+                follow_redirects=True,
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=DB_POOL_SIZE,
+                    max_keepalive_connections=DB_POOL_SIZE,
+                    keepalive_expiry=DB_KEEPALIVE_EXPIRY,
+                ),
+                max_in_flight=DB_POOL_SIZE,
+            )
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            follow_redirects=True,
+            transport=AiohttpTransport(DB_POOL_SIZE, DB_KEEPALIVE_EXPIRY, DB_TIMEOUT),
+        )
+
+_client: Optional[PooledPostgrestClient] = None
+
+def db() -> PooledPostgrestClient:
+    """Return the shared async PostgREST client, creating the pool on first use"""
+    global _client
+    if _client is None:
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            raise RuntimeError("Missing SUPABASE_URL or SUPABASE_KEY in .env")
+        _client = PooledPostgrestClient(
+            f"{SUPABASE_URL.rstrip('/')}/rest/v1",
+            headers={
+                **DEFAULT_POSTGREST_CLIENT_HEADERS,
+                "apikey": SUPABASE_KEY,
+                "Authorization": f"Bearer {SUPABASE_KEY}",
+            },
+            timeout=DB_TIMEOUT,
+        )
+    return _client
+
+async def close_db() -> None:
+    """Close the pool; the next db() call opens a fresh one"""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+async def upsert_returning(table: str, row: Dict[str, Any], on_conflict: str) -> Dict[str, Any]:
+    """Insert `row`, or merge it into the row sharing its `on_conflict` key, in one round trip.
+
+    Columns present in `row` overwrite the stored values; columns left out keep
+    theirs (or take the column default on insert). Returns the resulting row.
+    """
+    resp = await db().table(table).upsert(row, on_conflict=on_conflict, default_to_null=False).execute()
+    return resp.data[0] if resp.data else row
+
+async def upsert_many(table: str, rows: List[Dict[str, Any]], on_conflict: str) -> List[Dict[str, Any]]:
+    """Bulk form of upsert_returning: one round trip for all rows, returns the stored rows.
+
+    Rows must not repeat an `on_conflict` key (Postgres rejects a second update
+    of the same row in one statement).
+    """
+    if not rows:
+        return []
+    resp = await db().table(table).upsert(rows, on_conflict=on_conflict, default_to_null=False).execute()
+    return resp.data or []
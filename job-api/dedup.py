@@ -0,0 +1,198 @@
+# dedup.py - Cross-source duplicate detection for ingested jobs
+#
+# The same posting often appears on several feeds with a different
+# external_id on each. Every stored job gets an exact fingerprint of its
+# normalized (company, title, location, apply_url host) plus a MinHash
+# signature of its company/title/location tokens. Signatures are bucketed by
+# LSH bands, so finding near-duplicates only compares a job against the few
+# jobs of the same company that share a band, never the whole catalogue. The index persists
+# between refreshes.
+import os
+import re
+import json
+import base64
+import hashlib
+import unicodedata
+from array import array
+from urllib.parse import urlparse
+from typing import Dict, Any, Optional, Tuple, List, Set
+
+DEDUP_INDEX_PATH = os.getenv(
+    "JOB_DEDUP_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".dedup_index.json"),
+)
+# Minimum estimated Jaccard similarity for two jobs to count as the same posting
+DEDUP_THRESHOLD = float(os.getenv("JOB_DEDUP_THRESHOLD", "0.8"))
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS  # 16 bands x 4 rows: pairs above ~0.5 similarity become candidates
+
+# ── Normalization ─────────────────────────────────────────────
+_COMPANY_SUFFIXES = {"inc", "llc", "ltd", "limited", "gmbh", "corp", "corporation", "co",
+                     "company", "plc", "ag", "sa", "srl", "bv", "pty", "se"}
+_TITLE_ALIASES = {"sr": "senior", "jr": "junior", "eng": "engineer", "engr": "engineer",
+                  "dev": "developer", "mgr": "manager", "swe": "software engineer"}
+_REMOTE_LOCATIONS = {"remote", "anywhere", "worldwide", "global", "remote flexible"}
+
+def _words(text: Any) -> List[str]:
+    if not isinstance(text, str):
+        return []
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def normalize_company(company: Any) -> str:
+    words = _words(company)
+    while words and words[-1] in _COMPANY_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+def normalize_title(title: Any) -> str:
+    return " ".join(_TITLE_ALIASES.get(word, word) for word in _words(title))
+
+def normalize_location(location: Any) -> str:
+    words = " ".join(_words(location))
+    return "remote" if not words or words in _REMOTE_LOCATIONS else words
+
+def _apply_host(url: Any) -> str:
+    if not isinstance(url, str) or not url:
+        return ""
+    host = urlparse(url).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+def _fingerprint(company: str, title: str, location: str, host: str) -> str:
+    parts = "|".join((company, title, location, host))
+    return hashlib.blake2b(parts.encode("utf-8"), digest_size=12).hexdigest()
+
+def fingerprint(payload: Dict[str, Any]) -> str:
+    """Exact fingerprint of a mapped job's normalized company, title, location and apply host"""
+    return _fingerprint(
+        normalize_company(payload.get("company")),
+        normalize_title(payload.get("title")),
+        normalize_location(payload.get("location")),
+        _apply_host(payload.get("apply_url")),
+    )
+
+# ── MinHash ───────────────────────────────────────────────────
+def _shingles(company: str, title: str, location: str) -> Set[str]:
+    title_words = title.split()
+    shingles = {f"t:{word}" for word in title_words}
+    shingles.update(f"t:{a}_{b}" for a, b in zip(title_words, title_words[1:]))
+    shingles.update(f"c:{word}" for word in company.split())
+    shingles.add(f"l:{location}")
+    return shingles
+
+def minhash(shingles: Set[str]) -> array:
+    """MinHash signature: one SHAKE-128 digest yields all NUM_PERM 32-bit hashes of a shingle"""
+    columns = [array("I", hashlib.shake_128(s.encode("utf-8")).digest(NUM_PERM * 4)) for s in shingles]
+    if not columns:
+        return array("I", bytes(NUM_PERM * 4))
+    return array("I", map(min, zip(*columns)))
+
+def _similarity(a: array, b: array) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+def _band_keys(entry: Dict[str, Any]) -> List[Tuple[str, int, bytes]]:
+    # Buckets are blocked by company: postings from different companies are
+    # never the same job, and shared shingles such as "remote" would otherwise
+    # pile unrelated jobs into the same buckets
+    if not entry["company"]:
+        return []
+    raw = entry["sig"].tobytes()
+    width = ROWS * entry["sig"].itemsize
+    return [(entry["company"], band, raw[band * width:(band + 1) * width]) for band in range(BANDS)]
+
+# ── Index ─────────────────────────────────────────────────────
+class DedupIndex:
+    """Persistent fingerprint + LSH index of stored jobs, keyed by "source:external_id" """
+
+    def __init__(self, path: Optional[str] = None, threshold: float = DEDUP_THRESHOLD):
+        self.path = path or DEDUP_INDEX_PATH
+        self.threshold = threshold
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._by_fingerprint: Dict[str, str] = {}
+        self._buckets: Dict[Tuple[str, int, bytes], Set[str]] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def entry_for(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Compute the fingerprint and signature of a mapped job"""
+        company = normalize_company(payload.get("company"))
+        title = normalize_title(payload.get("title"))
+        location = normalize_location(payload.get("location"))
+        return {
+            "source": payload.get("source"),
+            "fp": _fingerprint(company, title, location, _apply_host(payload.get("apply_url"))),
+            "company": company,
+            "sig": minhash(_shingles(company, title, location)),
+        }
+
+    def match(self, key: str, entry: Dict[str, Any]) -> Optional[str]:
+        """Key of a job from another source that is the same posting, if any"""
+        source = entry["source"]
+        exact = self._by_fingerprint.get(entry["fp"])
+        if exact and exact != key and self.entries[exact]["source"] != source:
+            return exact
+        # Jobs without a company have no band keys: too little signal to call them the same
+        candidates: Set[str] = set()
+        for band_key in _band_keys(entry):
+            candidates.update(self._buckets.get(band_key, ()))
+        best, best_score = None, self.threshold
+        for candidate in candidates:
+            other = self.entries[candidate]
+            if candidate == key or other["source"] == source:
+                continue
+            score = _similarity(entry["sig"], other["sig"])
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def add(self, key: str, entry: Dict[str, Any]) -> None:
+        self.remove(key)
+        self.entries[key] = entry
+        self._by_fingerprint.setdefault(entry["fp"], key)
+        for band_key in _band_keys(entry):
+            self._buckets.setdefault(band_key, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        if self._by_fingerprint.get(entry["fp"]) == key:
+            del self._by_fingerprint[entry["fp"]]
+        for band_key in _band_keys(entry):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    # ── Persistence ──
+    def load(self) -> "DedupIndex":
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return self
+        except Exception as e:
+            print(f"⚠️ Could not read dedup index {self.path} ({e}), starting empty")
+            return self
+        for key, (source, fp, company, sig) in stored.items():
+            signature = array("I")
+            signature.frombytes(base64.b64decode(sig))
+            self.add(key, {"source": source, "fp": fp, "company": company, "sig": signature})
+        return self
+
+    def save(self) -> None:
+        stored = {
+            key: [e["source"], e["fp"], e["company"], base64.b64encode(e["sig"].tobytes()).decode("ascii")]
+            for key, e in self.entries.items()
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(stored, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
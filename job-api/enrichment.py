@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# enrichment.py - Fill in missing job card fields once, at write time
+#
+# Every card needs a location, a logo and a readable description. The ingest
+# pipeline runs enrich_job() on each mapped job before it is stored, so read
+# paths serve stored rows as they are. Rows stored before this stage existed
+# are fixed once with the backfill command:
+#   python enrichment.py [--batch-size 500] [--dry-run]
+import sys
+import argparse
+from typing import List, Dict, Any, Optional
+
+DEFAULT_LOCATION = "Remote/Flexible"
+MIN_DESCRIPTION_LENGTH = 10
+# Columns written back by the backfill (title/company because an upsert must satisfy NOT NULL)
+BACKFILL_COLUMNS = ("id", "title", "company", "location", "logo", "description")
+
+def _blank(value: Any) -> bool:
+    return not value or len(str(value).strip()) == 0
+
+def enrich_job(job: Dict[str, Any]) -> bool:
+    """Fill a missing location, logo and description in place; True if anything changed"""
+    changed = False
+    if _blank(job.get("location")):
+        job["location"] = job.get("job_location") or DEFAULT_LOCATION
+        changed = True
+    if _blank(job.get("logo")):
+        if not _blank(job.get("image")):
+            job["logo"] = job["image"]
+        else:
+            # placeholder avatar with the company's initials
+            job["logo"] = f"https://ui-avatars.com/api/?name={job.get('company', 'Company')}&background=random&size=150"
+        changed = True
+    if not job.get("description") or len(str(job.get("description", "")).strip()) < MIN_DESCRIPTION_LENGTH:
+        company = job.get("company", "A company")
+        title = job.get("title", "position")
+        job["description"] = (f"Join {company} as a {title}. This role offers an opportunity "
+                              f"to work with a great team on exciting projects.")
+        changed = True
+    return changed
+
+def enrich_jobs(jobs: List[Dict[str, Any]]) -> int:
+    """Enrich a batch in place; returns how many jobs changed"""
+    return sum(1 for job in jobs if enrich_job(job))
+
+def backfill(batch_size: int = 500, dry_run: bool = False) -> Dict[str, int]:
+    """Enrich rows already in the jobs table, walking it by id in batches"""
+    from supabase_client import supabase  # sync client, like the ingest worker
+
+    scanned = updated = 0
+    last_id = None
+    while True:
+        query = supabase.table("jobs").select("*").order("id").limit(batch_size)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.execute().data or []
+        changed = [row for row in rows if enrich_job(row)]
+        if changed and not dry_run:
+            supabase.table("jobs").upsert(
+                [{column: row.get(column) for column in BACKFILL_COLUMNS} for row in changed],
+                on_conflict="id",
+            ).execute()
+        scanned += len(rows)
+        updated += len(changed)
+        if len(rows) < batch_size:
+            break
+        last_id = rows[-1]["id"]
+        print(f"   {scanned} rows scanned, {updated} enriched")
+    print(f"✅ Backfill {'(dry run) ' if dry_run else ''}done: {updated} of {scanned} jobs enriched")
+    return {"scanned": scanned, "updated": updated}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Enrich stored jobs that predate write-time enrichment")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows read and written per request")
+    parser.add_argument("--dry-run", action="store_true", help="count the rows that would change")
+    args = parser.parse_args(argv)
+    backfill(args.batch_size, args.dry_run)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+# http_cache.py - Conditional GETs for upstream job feeds
+#
+# Remembers the ETag / Last-Modified validators each feed URL sent last time and
+# replays them as If-None-Match / If-Modified-Since. A 304 means the feed is
+# unchanged, so callers can skip downloading and parsing it entirely. Feeds that
+# send no validators are instead considered fresh for a fixed TTL.
+import os
+import json
+import time
+import hashlib
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, AsyncIterator, Iterable
+
+import httpx
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "FEED_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".feed_cache"),
+)
+DEFAULT_TTL = int(os.getenv("FEED_CACHE_TTL", "600"))  # seconds, for feeds without validators
+
+class FeedCache:
+    """On-disk store of HTTP validators per feed URL"""
+
+    def __init__(self, directory: Optional[str] = None, ttl: Optional[int] = None):
+        self.directory = directory or DEFAULT_CACHE_DIR
+        self.ttl = DEFAULT_TTL if ttl is None else ttl
+
+    def _path(self, url: str) -> str:
+        # URLs may carry API keys, so only a digest of them ever touches disk
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.json")
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _save(self, url: str, entry: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(url)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        entry = self.load(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def is_fresh(self, url: str) -> bool:
+        """True if the feed sent no validators and was fetched within the TTL"""
+        entry = self.load(url)
+        if not entry or entry.get("etag") or entry.get("last_modified"):
+            return False
+        return time.time() - entry.get("fetched_at", 0) < self.ttl
+
+    def store(self, url: str, response: httpx.Response) -> None:
+        self._save(url, self._entry(response))
+
+    @staticmethod
+    def _entry(response: httpx.Response) -> Dict[str, Any]:
+        return {
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "fetched_at": time.time(),
+        }
+
+    def clear(self, url: str) -> None:
+        try:
+            os.remove(self._path(url))
+        except FileNotFoundError:
+            pass
+
+    def discard(self, urls: Iterable[str]) -> None:
+        """Forget validators recorded for `urls` whose content was not used"""
+        for url in urls:
+            self.clear(url)
+
+class DeferredFeedCache(FeedCache):
+    """A FeedCache whose new validators are held back until commit()
+
+    Reading a feed's body is not the same as storing its jobs: ingest commits
+    the validators only once every row of the run is in the database, so a
+    failed upsert gets the full feed again next time instead of a 304.
+    """
+
+    def __init__(self, cache: FeedCache):
+        super().__init__(cache.directory, cache.ttl)
+        self.pending: Dict[str, Dict[str, Any]] = {}
+
+    def store(self, url: str, response: httpx.Response) -> None:
+        self.pending[url] = self._entry(response)
+
+    def discard(self, urls: Iterable[str]) -> None:
+        """Drop pending validators only: the committed ones still match what was last stored"""
+        for url in urls:
+            self.pending.pop(url, None)
+
+    def commit(self) -> None:
+        for url, entry in self.pending.items():
+            self._save(url, entry)
+        self.pending.clear()
+
+feed_cache = FeedCache()
+
+@asynccontextmanager
+async def open_feed(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 20,
+    cache: Optional[FeedCache] = feed_cache,
+) -> AsyncIterator[Optional[httpx.Response]]:
+    """Stream a feed, yielding None when it is unchanged since the last fetch.
+
+    The body is not read up front; consume it with `r.aiter_bytes()` (or
+    `await r.aread()`) inside the block. Validators are only recorded once the
+    block finishes without an error, so a feed that failed to parse is
+    downloaded again next time; a DeferredFeedCache holds them until the
+    caller commits. Pass `cache=None` to always download the full feed.
+
+        async with open_feed(client, url, headers=HEADERS) as r:
+            if r is None:
+                return None  # 304 or still within the TTL
+            async for job in iter_json_array(r.aiter_bytes()):
+                ...
+    """
+    if cache is not None and cache.is_fresh(url):
+        yield None
+        return
+
+    request_headers = dict(headers or {})
+    if cache is not None:
+        request_headers.update(cache.conditional_headers(url))
+    async with client.stream("GET", url, headers=request_headers, timeout=timeout) as r:
+        if r.status_code == 304:
+            yield None
+            return
+        r.raise_for_status()
+        yield r
+    if cache is not None:
+        cache.store(url, r)
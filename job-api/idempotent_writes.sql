@@ -0,0 +1,24 @@
+-- Unique keys and defaults for the single-upsert write endpoints
+-- (/swipe, /bookmarks, /applications, /matches upsert on (owner, job_id))
+-- Run this SQL directly in Supabase SQL Editor or using psql
+
+-- Collapse existing duplicates, keeping the newest row per key
+DELETE FROM public.swipes a USING public.swipes b
+  WHERE a.user_id = b.user_id AND a.job_id = b.job_id AND a.id < b.id;
+DELETE FROM public.bookmarks a USING public.bookmarks b
+  WHERE a.profile_id = b.profile_id AND a.job_id = b.job_id AND a.id < b.id;
+DELETE FROM public.applications a USING public.applications b
+  WHERE a.profile_id = b.profile_id AND a.job_id = b.job_id AND a.id < b.id;
+DELETE FROM public.matches a USING public.matches b
+  WHERE a.profile_id = b.profile_id AND a.job_id = b.job_id AND a.id < b.id;
+
+-- ON CONFLICT needs a unique index on exactly the conflict columns
+CREATE UNIQUE INDEX IF NOT EXISTS swipes_user_job_key ON public.swipes (user_id, job_id);
+CREATE UNIQUE INDEX IF NOT EXISTS bookmarks_profile_job_key ON public.bookmarks (profile_id, job_id);
+CREATE UNIQUE INDEX IF NOT EXISTS applications_profile_job_key ON public.applications (profile_id, job_id);
+CREATE UNIQUE INDEX IF NOT EXISTS matches_profile_job_key ON public.matches (profile_id, job_id);
+
+-- The endpoints no longer send status, so new rows take it from the default
+-- and repeated submits leave an existing status alone
+ALTER TABLE public.applications ALTER COLUMN status SET DEFAULT 'applying';
+ALTER TABLE public.matches ALTER COLUMN status SET DEFAULT 'applying';
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# ingest_worker.py - Background job ingestion outside the request path
+#
+# Runs are executed one at a time on a dedicated worker thread so API handlers
+# never wait on upstream job feeds. The scheduler enqueues a run for each source
+# whenever its interval elapses; it can run standalone (CLI) or inside the
+# FastAPI app via its lifespan hook.
+import os
+import sys
+import json
+import uuid
+import asyncio
+import argparse
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+
+from job_service import fetch_and_store_jobs
+from sources import resolve_sources, SOURCES
+
+# ── Settings ──────────────────────────────────────────────────
+MAX_TRACKED_RUNS = 100
+
+def source_intervals() -> Dict[str, int]:
+    """Per-source ingest intervals in seconds, overridable with INGEST_INTERVAL_<SOURCE>"""
+    return {
+        name: int(os.getenv(f"INGEST_INTERVAL_{name.upper()}", str(source.interval)))
+        for name, source in SOURCES.items()
+    }
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+# ── Run queue ─────────────────────────────────────────────────
+# A single worker keeps runs serialized, which also keeps the hash index consistent
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+_runs: Dict[str, Dict[str, Any]] = {}
+_runs_lock = threading.Lock()
+
+def _execute_run(run_id: str) -> None:
+    with _runs_lock:
+        run = _runs[run_id]
+        run["status"] = "running"
+        run["started_at"] = _now()
+    print(f"🚚 Ingest run {run_id} started for {', '.join(run['sources'])}")
+    try:
+        report = fetch_and_store_jobs(run["sources"], force=run["force"])
+        with _runs_lock:
+            run.update(status="succeeded", report=report, finished_at=_now())
+    except Exception as e:
+        print(f"❌ Ingest run {run_id} failed: {e}")
+        print(traceback.format_exc())
+        with _runs_lock:
+            run.update(status="failed", error=str(e), finished_at=_now())
+
+def _prune_runs() -> None:
+    """Forget the oldest finished runs once we track too many"""
+    finished = [run_id for run_id, run in _runs.items() if run["status"] in ("succeeded", "failed")]
+    for run_id in finished[:max(0, len(_runs) - MAX_TRACKED_RUNS)]:
+        del _runs[run_id]
+
+def enqueue_run(sources: Optional[List[str]] = None, force: bool = False) -> Dict[str, Any]:
+    """Queue an ingest run and return its record.
+
+    If an identical run is already waiting in the queue, that run is returned
+    instead of queueing a duplicate.
+    """
+    sources = resolve_sources(sources)
+    with _runs_lock:
+        for run in _runs.values():
+            if run["status"] == "queued" and run["sources"] == sources and run["force"] == force:
+                return dict(run)
+        run_id = uuid.uuid4().hex
+        run = {
+            "id": run_id,
+            "status": "queued",
+            "sources": sources,
+            "force": force,
+            "queued_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "report": None,
+            "error": None,
+        }
+        _runs[run_id] = run
+        _prune_runs()
+    _executor.submit(_execute_run, run_id)
+    return dict(run)
+
+def get_run(run_id: str) -> Optional[Dict[str, Any]]:
+    """Return a snapshot of a run, or None if it is unknown"""
+    with _runs_lock:
+        run = _runs.get(run_id)
+        return dict(run) if run else None
+
+# ── Scheduler ─────────────────────────────────────────────────
+class IngestScheduler:
+    """Enqueue an ingest run for each source whenever its interval elapses"""
+
+    def __init__(self, intervals: Optional[Dict[str, int]] = None, run_on_start: bool = True):
+        self.intervals = intervals or source_intervals()
+        self.run_on_start = run_on_start
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        next_due = {
+            name: start if self.run_on_start else start + interval
+            for name, interval in self.intervals.items()
+        }
+        print(f"⏰ Ingest scheduler started: {self.intervals}")
+        while True:
+            now = loop.time()
+            due = [name for name, at in next_due.items() if at <= now]
+            if due:
+                try:
+                    enqueue_run(due)
+                except Exception as e:
+                    print(f"❌ Could not enqueue ingest run for {due}: {e}")
+                for name in due:
+                    next_due[name] = now + self.intervals[name]
+            await asyncio.sleep(max(1.0, min(next_due.values()) - loop.time()))
+
+    def start(self) -> None:
+        """Start the scheduler on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# ── CLI ───────────────────────────────────────────────────────
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Jobbify job ingestion worker")
+    parser.add_argument("--once", action="store_true",
+                        help="run a single ingest and exit instead of scheduling")
+    parser.add_argument("--source", action="append", choices=list(SOURCES),
+                        help="limit the run to this source (repeatable, --once only)")
+    parser.add_argument("--force", action="store_true",
+                        help="rewrite every job even if its content hash is unchanged")
+    args = parser.parse_args(argv)
+
+    if args.once:
+        report = fetch_and_store_jobs(args.source, force=args.force)
+        print(json.dumps(report, indent=2, default=str))
+        return 0
+
+    try:
+        asyncio.run(IngestScheduler().run_forever())
+    except KeyboardInterrupt:
+        print("👋 Ingest scheduler stopped")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
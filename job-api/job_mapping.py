@@ -0,0 +1,134 @@
+# job_mapping.py - Declarative field mapping for upstream job feeds
+#
+# Each source declares, per output field, the ordered key paths to try, a
+# default, an optional transform and an optional max length. Specs are resolved
+# once into a tuple of rules per source that a plain loop walks, so mapping a
+# row is a few dict lookups with no per-row spec parsing. Sources without a spec use
+# DEFAULT_SPEC, which tries every known key layout.
+# Descriptions keep the "SOURCE: <source> | ID: <id> | " prefix they have
+# always been stored with.
+from typing import List, Dict, Any, Optional, Callable, Tuple, Union
+
+KeyPath = Union[str, Tuple[str, ...]]  # "title" or ("company", "display_name")
+
+def _text(value: Any) -> str:
+    return value if isinstance(value, str) else ("" if value is None else str(value))
+
+# Transforms are referenced by name from specs and bound into the resolved rules
+TRANSFORMS: Dict[str, Callable[[Any], Any]] = {
+    "text": _text,
+}
+
+DESCRIPTION_MAX_LENGTH = 1000
+
+# Fields every mapped job has, in output order
+FIELDS = ("title", "company", "location", "salary", "logo", "apply_url", "description")
+
+DEFAULT_SPEC: Dict[str, Dict[str, Any]] = {
+    "title": {"paths": ["position", "title", "name"], "default": ""},
+    "company": {"paths": ["company", "company_name", "company_display_name"], "default": ""},
+    "location": {"paths": ["location", "location_display"], "default": "Remote"},
+    "salary": {"paths": ["salary", "salary_min"], "default": "Competitive"},
+    "logo": {"paths": ["logo", "company_logo"], "default": ""},
+    "apply_url": {"paths": ["url", "apply_url", "redirect_url"], "default": ""},
+    "description": {"paths": ["description", "body", "description_html"], "default": "",
+                    "transform": "text", "max_length": DESCRIPTION_MAX_LENGTH},
+}
+
+MAPPING_SPECS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "remoteok": {
+        "title": {"paths": ["position", "title"], "default": ""},
+        "company": {"paths": ["company"], "default": ""},
+        "location": {"paths": ["location"], "default": "Remote"},
+        "salary": {"paths": ["salary", "salary_min"], "default": "Competitive"},
+        "logo": {"paths": ["logo", "company_logo"], "default": ""},
+        "apply_url": {"paths": ["url", "apply_url"], "default": ""},
+        "description": DEFAULT_SPEC["description"],
+    },
+    "arbeitnow": {
+        "title": {"paths": ["title"], "default": ""},
+        "company": {"paths": ["company_name"], "default": ""},
+        "location": {"paths": ["location"], "default": "Remote"},
+        "salary": {"paths": [], "default": "Competitive"},
+        "logo": {"paths": ["logo", "company_logo"], "default": ""},
+        "apply_url": {"paths": ["url"], "default": ""},
+        "description": DEFAULT_SPEC["description"],
+    },
+    "adzuna": {
+        "title": {"paths": ["title"], "default": ""},
+        "company": {"paths": [("company", "display_name")], "default": ""},
+        "location": {"paths": [("location", "display_name")], "default": "Remote"},
+        "salary": {"paths": ["salary_min"], "default": "Competitive"},
+        "logo": {"paths": [], "default": ""},
+        "apply_url": {"paths": ["redirect_url"], "default": ""},
+        "description": DEFAULT_SPEC["description"],
+    },
+}
+
+# ── Field mappers ─────────────────────────────────────────────
+def _source_tag(j: Dict[str, Any]) -> str:
+    """Prefix every stored description carries; changing it would rewrite every row on the next run"""
+    return f"SOURCE: {j.get('source', 'unknown')} | ID: {j.get('id') or j.get('external_id') or 'unknown'} | "
+
+def _dig(j: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    value: Any = j
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+def compile_spec(spec: Dict[str, Dict[str, Any]]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Turn a field spec into a single mapping function"""
+    rules = []
+    for field in FIELDS:
+        rule = spec.get(field) or DEFAULT_SPEC[field]
+        # Single keys are looked up directly, longer paths go through _dig
+        paths = tuple(p if isinstance(p, str) else p[0] if len(p) == 1 else tuple(p)
+                      for p in rule.get("paths", []))
+        transform = TRANSFORMS[rule["transform"]] if rule.get("transform") else None
+        rules.append((field, paths, rule.get("default"), transform, int(rule.get("max_length") or 0)))
+
+    def map_source(j: Dict[str, Any]) -> Dict[str, Any]:
+        get = j.get
+        job = {}
+        for field, paths, default, transform, max_length in rules:
+            value = default
+            for path in paths:
+                found = get(path) if path.__class__ is str else _dig(j, path)
+                if found:
+                    value = found
+                    break
+            if transform is not None:
+                value = transform(value)
+            if max_length and isinstance(value, str) and len(value) > max_length:
+                value = value[:max_length]
+            job[field] = value
+        job["description"] = _source_tag(j) + job["description"]
+        return job
+    return map_source
+
+_MAPPERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+_default_mapper = compile_spec(DEFAULT_SPEC)
+
+def register_mapping(source: str, spec: Dict[str, Dict[str, Any]]) -> None:
+    """Add or replace the field spec for a source; missing fields fall back to DEFAULT_SPEC"""
+    MAPPING_SPECS[source] = spec
+    _MAPPERS[source] = compile_spec(spec)
+
+for _source, _spec in list(MAPPING_SPECS.items()):
+    register_mapping(_source, _spec)
+
+def mapper_for(source: Optional[str]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    return _MAPPERS.get(source, _default_mapper)
+
+# ── Public API ────────────────────────────────────────────────
+def map_job(j: Dict[str, Any]) -> Dict[str, Any]:
+    """Map one raw job from any source to our standard payload"""
+    return _MAPPERS.get(j.get("source"), _default_mapper)(j)
+
+def map_jobs(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Map a list of raw jobs in one pass"""
+    mappers = _MAPPERS
+    default = _default_mapper
+    return [mappers.get(j.get("source"), default)(j) for j in batch]
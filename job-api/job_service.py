@@ -1,10 +1,19 @@
 # job_service.py
 import os
+import json
+import time
 import asyncio
+import hashlib
 import httpx
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from http_cache import FeedCache, DeferredFeedCache, feed_cache, open_feed
+from json_stream import iter_json_array
+from job_mapping import map_job  # per-source field specs live in job_mapping.py
+from dedup import DedupIndex
+from enrichment import enrich_job
+from paginator import fetch_pages, Discard
+from sources import register_source, get_source, resolve_sources, SOURCES, Emit
 
 # Import test jobs using absolute import
 try:
@@ -18,206 +27,455 @@ except ImportError:
         TEST_JOBS = []
 
 # ── Env & Supabase ────────────────────────────────────────────
+# Ingest runs in a worker thread, so it shares the sync client rather than
+# the API's async pool in db.py
 load_dotenv()
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY"),
-)
+from supabase_client import supabase
 
 # ── Public API headers ────────────────────────────────────────
 HEADERS = {"User-Agent": "JobbifyBot/1.0 (+https://jobbify.app)"}
 
+# ── Feed endpoints (overridable to point at a local mock server) ──
+REMOTEOK_URL = os.getenv("REMOTEOK_URL", "https://remoteok.com/api")
+ARBEITNOW_URL = os.getenv("ARBEITNOW_URL", "https://www.arbeitnow.com/api/job-board-api")
+ADZUNA_URL = os.getenv("ADZUNA_URL", "https://api.adzuna.com/v1/api/jobs/us/search")
+
 # ── API credentials ───────────────────────────────────────────
 ADZ_ID = os.getenv("ADZUNA_APP_ID", "4fcc5736")
 ADZ_KEY = os.getenv("ADZUNA_APP_KEY", "12053bfdc8c197aa8192c0aabac56450")
 
+# ── Pagination ────────────────────────────────────────────────
+# Max pages walked per refresh, concurrent page requests and requests/second per source
+PAGE_CONCURRENCY = int(os.getenv("FEED_PAGE_CONCURRENCY", "4"))
+ARBEITNOW_PAGES = int(os.getenv("ARBEITNOW_PAGES", "5"))
+ARBEITNOW_RATE_LIMIT = float(os.getenv("ARBEITNOW_RATE_LIMIT", "4"))
+ADZUNA_PAGES = int(os.getenv("ADZUNA_PAGES", "5"))
+ADZUNA_RATE_LIMIT = float(os.getenv("ADZUNA_RATE_LIMIT", "1"))
+ADZUNA_PAGE_SIZE = 50
+
+# ── Ingest settings ───────────────────────────────────────────
+# Rows per multi-row upsert; PostgREST handles a few hundred rows per request comfortably
+UPSERT_CHUNK_SIZE = int(os.getenv("JOB_UPSERT_CHUNK_SIZE", "500"))
+# Local (source, external_id) → content hash index used to skip unchanged rows
+HASH_INDEX_PATH = os.getenv(
+    "JOB_HASH_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".ingest_hashes.json"),
+)
+
 # ── Async fetchers ────────────────────────────────────────────
-async def remoteok(client: httpx.AsyncClient) -> List[Dict[str, Any]]:
+# Fetchers stream each feed and hand jobs to `emit` one at a time as they are
+# decoded, returning how many they emitted. They return None when the feed is
+# unchanged since the last run (HTTP 304 or still within the cache TTL); pass
+# cache=None to force a download. Errors propagate so the registry can retry
+# them and trip the source's breaker.
+@register_source("remoteok", "RemoteOK", timeout=30, retries=1, interval=30 * 60)
+async def remoteok(client: httpx.AsyncClient, emit: Emit, cache: Optional[FeedCache] = feed_cache) -> Optional[int]:
     """Fetch jobs from RemoteOK API"""
-    try:
-        print("🔄 Fetching from RemoteOK...")
-        r = await client.get("https://remoteok.com/api", headers=HEADERS, timeout=20)
-        r.raise_for_status()
-        data = r.json()[1:]  # first element is metadata
-        for job in data:
+    src = get_source("remoteok")
+    print("🔄 Fetching from RemoteOK...")
+    count = 0
+    async with open_feed(client, REMOTEOK_URL,
+                         headers=HEADERS, timeout=src.timeout, cache=cache) as r:
+        if r is None:
+            print("⏭️ RemoteOK: feed not modified")
+            return None
+        # first element is metadata
+        async for job in iter_json_array(r.aiter_bytes(), skip=1):
             job["source"] = "remoteok"
             job["external_id"] = str(job["id"])
-        print(f"✅ RemoteOK: Found {len(data)} jobs")
-        return data
-    except Exception as e:
-        print(f"❌ RemoteOK error: {e}")
-        return []
+            await emit(job)
+            count += 1
+    print(f"✅ RemoteOK: Found {count} jobs")
+    return count
 
-async def arbeitnow(client: httpx.AsyncClient) -> List[Dict[str, Any]]:
-    """Fetch jobs from Arbeitnow API"""
-    try:
-        print("🔄 Fetching from Arbeitnow...")
-        r = await client.get("https://www.arbeitnow.com/api/job-board-api",
-                           headers=HEADERS, timeout=20)
-        r.raise_for_status()
-        data = r.json().get("data", [])
-        for job in data:
-            job["source"] = "arbeitnow"
-            job["external_id"] = str(job["slug"])
-        print(f"✅ Arbeitnow: Found {len(data)} jobs")
-        return data
-    except Exception as e:
-        print(f"❌ Arbeitnow error: {e}")
-        return []
+async def _read_page(
+    client: httpx.AsyncClient,
+    url: str,
+    key: str,
+    source: str,
+    id_field: str,
+    cache: Optional[FeedCache],
+) -> Optional[List[Dict[str, Any]]]:
+    """Stream one page of a paginated feed; None if the page is unchanged"""
+    async with open_feed(client, url, headers=HEADERS,
+                         timeout=get_source(source).timeout, cache=cache) as r:
+        if r is None:
+            return None
+        data = []
+        async for job in iter_json_array(r.aiter_bytes(), key=key):
+            job["source"] = source
+            job["external_id"] = str(job[id_field])
+            data.append(job)
+    return data
 
-async def adzuna(client: httpx.AsyncClient) -> List[Dict[str, Any]]:
-    """Fetch jobs from Adzuna API"""
+def _discard_pages(cache: Optional[FeedCache], page_url: Callable[[int], str]) -> Optional[Discard]:
+    """fetch_pages' discard callback: forget the validators of pages whose jobs were not emitted"""
+    if cache is None:
+        return None
+    return lambda pages: cache.discard(page_url(page) for page in pages)
+
+@register_source("arbeitnow", "Arbeitnow", timeout=30, retries=1, interval=60 * 60,
+                 pages=ARBEITNOW_PAGES, concurrency=PAGE_CONCURRENCY, rate_limit=ARBEITNOW_RATE_LIMIT)
+async def arbeitnow(client: httpx.AsyncClient, emit: Emit, cache: Optional[FeedCache] = feed_cache) -> Optional[int]:
+    """Fetch up to ARBEITNOW_PAGES pages from the Arbeitnow API"""
+    src = get_source("arbeitnow")
+
+    def page_url(page: int) -> str:
+        return f"{ARBEITNOW_URL}?page={page}"
+
+    async def fetch_page(page: int) -> Optional[List[Dict[str, Any]]]:
+        return await _read_page(client, page_url(page), "data", "arbeitnow", "slug", cache)
+
+    print("🔄 Fetching from Arbeitnow...")
+    count = await fetch_pages(fetch_page, emit, src.pages, src.concurrency, src.rate_limit, label=src.label,
+                              discard=_discard_pages(cache, page_url))
+    if count is None:
+        print("⏭️ Arbeitnow: feed not modified")
+        return None
+    print(f"✅ Arbeitnow: Found {count} jobs")
+    return count
+
+@register_source("adzuna", "Adzuna", timeout=30, retries=1, interval=60 * 60,
+                 pages=ADZUNA_PAGES, concurrency=PAGE_CONCURRENCY, rate_limit=ADZUNA_RATE_LIMIT)
+async def adzuna(client: httpx.AsyncClient, emit: Emit, cache: Optional[FeedCache] = feed_cache) -> Optional[int]:
+    """Fetch up to ADZUNA_PAGES pages from the Adzuna API"""
     if not (ADZ_ID and ADZ_KEY):
         print("Adzuna API credentials not found, skipping")
-        return []
-    try:
-        print("🔄 Fetching from Adzuna...")
-        url = (f"https://api.adzuna.com/v1/api/jobs/us/search/1"
-               f"?app_id={ADZ_ID}&app_key={ADZ_KEY}"
-               "&results_per_page=50&content-type=application/json")
-        r = await client.get(url, headers=HEADERS, timeout=20)
-        r.raise_for_status()
-        data = r.json().get("results", [])
-        for job in data:
-            job["source"] = "adzuna"
-            job["external_id"] = str(job["id"])
-        print(f"✅ Adzuna: Found {len(data)} jobs")
-        return data
-    except Exception as e:
-        print(f"❌ Adzuna error: {e}")
-        return []
+        return 0
+    src = get_source("adzuna")
 
-# ── Field mapping ─────────────────────────────────────────────
-def map_job(j: Dict[str, Any]) -> Dict[str, Any]:
-    """Map job data from various sources to a standardized format"""
-    src = j.get("source", "unknown")
-    
-    # Extract description in a safe way, handling different API formats
-    description = ""
-    if "description" in j:
-        description = j["description"]
-    elif "body" in j:
-        description = j["body"]
-    elif "description_html" in j:
-        description = j["description_html"]
-    
-    # Extract tags/skills
-    tags = []
-    if "tags" in j and isinstance(j["tags"], list):
-        tags = j["tags"]
-    elif "keywords" in j and isinstance(j["keywords"], list):
-        tags = j["keywords"]
-    elif "category" in j and isinstance(j["category"], dict) and "tag" in j["category"]:
-        tags = [j["category"]["tag"]]
-    
-    # Build a standard job object that works with our Supabase schema
-    # First, get an ID that combines source and job identifier to prevent duplicates across sources
-    source_id = j.get("id") or j.get("external_id") or "unknown"
-    composite_id = f"{src}_{source_id}"
-    
-    # For backward compatibility: if we're using the legacy schema that doesn't have source columns yet,
-    # just use the standard fields and omit source/external_id to avoid errors
-    try:
-        # Basic job fields that should work with existing schema
-        payload = {
-            "title": j.get("position") or j.get("title") or j.get("name") or "",
-            "company": j.get("company") or j.get("company_name") or j.get("company_display_name") or "",
-            "location": j.get("location") or j.get("location_display") or "Remote",
-            "salary": j.get("salary") or j.get("salary_min") or "Competitive",
-            "logo": j.get("logo") or j.get("company_logo") or "",
-            "apply_url": j.get("url") or j.get("apply_url") or j.get("redirect_url") or "",
-            "description": description[:1000] if description else "", # Trim long descriptions
-        }
-        
-        # We'll store the composite ID in the description as a workaround if we can't create external_id
-        payload["description"] = f"SOURCE: {src} | ID: {source_id} | " + payload["description"]
-        
-        return payload
-    except Exception as e:
-        print(f"Error creating job payload: {e}")
-        # Return a minimal payload if something went wrong
-        return {
-            "title": j.get("position") or j.get("title") or "Unknown Job",
-            "company": j.get("company") or "Unknown Company",
-            "description": "Job data could not be properly parsed."
-        }
+    def page_url(page: int) -> str:
+        return (f"{ADZUNA_URL}/{page}"
+                f"?app_id={ADZ_ID}&app_key={ADZ_KEY}"
+                f"&results_per_page={ADZUNA_PAGE_SIZE}&content-type=application/json")
+
+    async def fetch_page(page: int) -> Optional[List[Dict[str, Any]]]:
+        return await _read_page(client, page_url(page), "results", "adzuna", "id", cache)
+
+    print("🔄 Fetching from Adzuna...")
+    count = await fetch_pages(fetch_page, emit, src.pages, src.concurrency, src.rate_limit, label=src.label,
+                              discard=_discard_pages(cache, page_url))
+    if count is None:
+        print("⏭️ Adzuna: feed not modified")
+        return None
+    print(f"✅ Adzuna: Found {count} jobs")
+    return count
 
 # ── Master importer ───────────────────────────────────────────
-async def _fetch_all() -> List[Dict[str, Any]]:
-    """Fetch jobs from all sources concurrently"""
+async def _fetch_all(
+    emit: Emit,
+    sources: Optional[List[str]] = None,
+    use_cache: bool = True,
+) -> Tuple[int, List[str], Optional[DeferredFeedCache]]:
+    """Stream jobs from the given sources (default: all) concurrently into `emit`.
+
+    Returns the number of jobs emitted, the names of sources whose feed was
+    unchanged and the feed validators seen, to commit once the jobs are stored.
+    """
+    names = resolve_sources(sources)
+    cache = DeferredFeedCache(feed_cache) if use_cache else None
     async with httpx.AsyncClient() as client:
         results = await asyncio.gather(
-            remoteok(client),
-            arbeitnow(client),
-            adzuna(client),
+            *(SOURCES[name].run(client, emit, cache=cache) for name in names),
             return_exceptions=True  # Don't let one API failure stop the others
         )
     
-    all_jobs = []
-    for i, result in enumerate(results):
+    total = 0
+    not_modified = []
+    for name, result in zip(names, results):
         if isinstance(result, Exception):
-            source = ["RemoteOK", "Arbeitnow", "Adzuna"][i]
-            print(f"❌ Error fetching from {source}: {result}")
-        elif isinstance(result, list):
-            all_jobs.extend(result)
+            print(f"❌ Error fetching from {SOURCES[name].label}: {result}")
+        elif result is None:
+            not_modified.append(name)
+        else:
+            total += result
     
-    print(f"✅ Combined total: {len(all_jobs)} jobs from all sources")
-    return all_jobs
+    print(f"✅ Combined total: {total} jobs from {', '.join(names)}"
+          + (f" ({', '.join(not_modified)} not modified)" if not_modified else ""))
+    return total, not_modified, cache
+
+# ── Change detection ──────────────────────────────────────────
+def content_hash(payload: Dict[str, Any]) -> str:
+    """Stable hash of a mapped payload, independent of key order"""
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+def _index_key(source: Any, external_id: Any) -> str:
+    return f"{source}:{external_id}"
 
-def fetch_and_store_jobs() -> int:
-    """Fetch jobs from multiple sources and store them in the database"""
+def load_hash_index(path: Optional[str] = None) -> Dict[str, str]:
+    """Load the content hash index, starting empty if it is missing or unreadable"""
+    path = path or HASH_INDEX_PATH
     try:
-        # Run the async function to fetch from all sources concurrently
-        jobs = asyncio.run(_fetch_all())
-        if not jobs:
-            print("No jobs returned from APIs, using fallback test jobs")
-            jobs = TEST_JOBS
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        return index if isinstance(index, dict) else {}
+    except FileNotFoundError:
+        return {}
     except Exception as e:
-        print(f"❌ Fetch failed ({e}) – using fallback test jobs")
-        jobs = TEST_JOBS
-    
-    total = 0
-    duplicate_check = set()  # To avoid inserting duplicates
-    
-    for job in jobs:
+        print(f"⚠️ Could not read hash index {path} ({e}), treating every job as new")
+        return {}
+
+def save_hash_index(index: Dict[str, str], path: Optional[str] = None) -> None:
+    """Atomically write the content hash index"""
+    path = path or HASH_INDEX_PATH
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+# ── Batched storage ───────────────────────────────────────────
+def _job_label(payload: Dict[str, Any]) -> str:
+    return payload.get("title") or f"{payload.get('source')}_{payload.get('external_id')}"
+
+def _upsert_rows(rows: List[Dict[str, Any]]) -> None:
+    """Send a single multi-row upsert keyed on source+external_id"""
+    supabase.table("jobs").upsert(rows, on_conflict="source,external_id").execute()
+
+def _upsert_chunk(chunk: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Upsert one chunk in a single round trip, falling back to row-by-row on failure"""
+    started = time.perf_counter()
+    stats = {"rows": len(chunk), "accepted": 0, "rejected": 0, "retried": False, "failed_keys": []}
+    try:
+        _upsert_rows(chunk)
+        stats["accepted"] = len(chunk)
+    except Exception as e:
+        # One bad row fails the whole statement, so retry each row on its own
+        print(f"⚠️ Chunk upsert of {len(chunk)} rows failed ({e}), retrying row by row")
+        stats["retried"] = True
+        for row in chunk:
+            try:
+                _upsert_rows([row])
+                stats["accepted"] += 1
+            except Exception as row_error:
+                stats["rejected"] += 1
+                stats["failed_keys"].append((row.get("source"), row.get("external_id")))
+                print(f"❌ Insert error for {_job_label(row)}: {row_error}")
+    stats["seconds"] = round(time.perf_counter() - started, 4)
+    return stats
+
+def _add_chunk_stats(report: Dict[str, Any], stats: Dict[str, Any]) -> None:
+    report["accepted"] += stats["accepted"]
+    report["rejected"] += stats["rejected"]
+    report["failed_keys"].extend(stats.pop("failed_keys"))
+    report["chunks"].append(stats)
+    print(f"📦 Chunk {len(report['chunks'])}: {stats['accepted']}/{stats['rows']} rows "
+          f"accepted in {stats['seconds']:.2f}s")
+
+def bulk_upsert_jobs(payloads: List[Dict[str, Any]], chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """Store mapped job payloads in chunks of `chunk_size` rows.
+
+    Returns a report with accept/reject totals and per-chunk timings.
+    """
+    chunk_size = max(1, chunk_size or UPSERT_CHUNK_SIZE)
+    report = {"accepted": 0, "rejected": 0, "chunks": [], "failed_keys": []}
+    started = time.perf_counter()
+
+    for offset in range(0, len(payloads), chunk_size):
+        _add_chunk_stats(report, _upsert_chunk(payloads[offset:offset + chunk_size]))
+
+    report["seconds"] = round(time.perf_counter() - started, 4)
+    return report
+
+# ── Ingest pipeline ───────────────────────────────────────────
+class IngestPipeline:
+    """Map, change-detect, dedupe and batch jobs as they stream in from the fetchers.
+
+    Only the pending chunk plus the hash and dedup indexes are kept in memory,
+    so memory use does not grow with feed size. A new job that is the same
+    posting as a stored job from another source is not written.
+    """
+
+    def __init__(self, force: bool = False, chunk_size: Optional[int] = None):
+        self.force = force
+        self.chunk_size = max(1, chunk_size or UPSERT_CHUNK_SIZE)
+        self.index = load_hash_index()
+        self.dedup = DedupIndex().load()
+        self.hashes: Dict[str, str] = {}   # index key → hash for every job seen this run
+        self.written: List[str] = []       # index keys sent to the database
+        self.stored = set()                # index keys whose chunk upsert has returned
+        self.new_keys = set()
+        self.pending: List[Dict[str, Any]] = []
+        self.fetched = 0
+        self.unchanged = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.report = {"accepted": 0, "rejected": 0, "chunks": [], "failed_keys": []}
+        self.started = time.perf_counter()
+        self._flush_lock = asyncio.Lock()
+
+    def _prepare(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Map a raw job; None if it is a duplicate, unchanged or unmappable"""
         try:
             # Map the job data to our standard format
             payload = map_job(job)
             
-            # Add source and external_id for proper identification
-            # These fields should exist in our enhanced schema
-            if 'source' in job and 'external_id' in job:
+            # Every row needs source+external_id: it is the conflict key, and
+            # multi-row upserts require all rows to share the same columns
+            if job.get('source') and job.get('external_id'):
                 payload['source'] = job['source']
-                payload['external_id'] = job['external_id']
-            elif 'source' not in job and 'external_id' not in job:
+                payload['external_id'] = str(job['external_id'])
+            else:
                 # For test jobs that might not have source/external_id
-                payload['source'] = 'test'
-                payload['external_id'] = f"test_{total}"
+                payload['source'] = job.get('source') or 'test'
+                payload['external_id'] = str(job.get('external_id') or f"test_{self.fetched}")
             
-            # Unique identifier for duplicate checking within this batch
-            unique_id = f"{payload.get('source', 'unknown')}_{payload.get('external_id', '')}"
+            key = _index_key(payload['source'], payload['external_id'])
             
-            # Skip if we've already processed this job in this batch
-            if unique_id in duplicate_check:
-                continue
-                
-            duplicate_check.add(unique_id)
+            # Skip if we've already processed this job in this run
+            if key in self.hashes:
+                self.skipped += 1
+                return None
             
-            # Use upsert with source+external_id as unique identifier
-            # This ensures we don't insert the same job twice, but do update existing jobs
-            response = supabase.table("jobs").upsert(
-                payload,
-                # Use source+external_id as the unique key
-                on_conflict="source,external_id"
-            ).execute()
+            digest = content_hash(payload)
+            self.hashes[key] = digest
+            if not self.force and self.index.get(key) == digest:
+                self.unchanged += 1
+                if key not in self.dedup:
+                    # Stored before dedup existed: index it so other sources dedupe against it
+                    self.dedup.add(key, self.dedup.entry_for(payload))
+                return None
             
-            total += 1
+            entry = self.dedup.entry_for(payload)
+            if key not in self.dedup:
+                duplicate_of = self.dedup.match(key, entry)
+                if duplicate_of:
+                    self.duplicates += 1
+                    return None
+            self.dedup.add(key, entry)
+            
+            if key not in self.index:
+                self.new_keys.add(key)
+            self.written.append(key)
+            # Fill missing card fields once here instead of on every read. The hash
+            # above covers the mapped job only: enrichment is derived from it.
+            enrich_job(payload)
+            return payload
         except Exception as e:
+            self.skipped += 1
             job_title = job.get('title', '') or job.get('position', '') or 'Unknown job'
-            print(f"❌ Insert error for {job_title}: {e}")
+            print(f"❌ Mapping error for {job_title}: {e}")
+            return None
+
+    async def add(self, job: Dict[str, Any]) -> None:
+        """Emit callback for the fetchers"""
+        self.fetched += 1
+        payload = self._prepare(job)
+        if payload is None:
+            return
+        self.pending.append(payload)
+        if len(self.pending) >= self.chunk_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Upsert the pending chunk off the event loop.
+
+        If the caller is cancelled (a source timing out mid-flush), the upsert
+        thread runs on but its keys never reach `stored`, so finish() does not
+        record them as written and the next run sends them again.
+        """
+        if not self.pending:
+            return
+        chunk, self.pending = self.pending, []
+        async with self._flush_lock:
+            stats = await asyncio.to_thread(_upsert_chunk, chunk)
+            self.stored.update(_index_key(row["source"], row["external_id"]) for row in chunk)
+            _add_chunk_stats(self.report, stats)
+
+    def finish(self, not_modified: List[str]) -> Dict[str, Any]:
+        """Persist hashes of rows the database accepted and build the run report"""
+        failed = {_index_key(source, external_id) for source, external_id in self.report["failed_keys"]}
+        inserted = updated = unconfirmed = 0
+        for key in self.written:
+            if key in failed or key not in self.stored:
+                unconfirmed += key not in failed
+                if key in self.new_keys:
+                    self.dedup.remove(key)
+                continue
+            self.index[key] = self.hashes[key]
+            if key in self.new_keys:
+                inserted += 1
+            else:
+                updated += 1
+        try:
+            save_hash_index(self.index)
+        except Exception as e:
+            print(f"⚠️ Could not save hash index ({e}), next refresh will rewrite these jobs")
+        try:
+            self.dedup.save()
+        except Exception as e:
+            print(f"⚠️ Could not save dedup index ({e})")
+        
+        report = self.report
+        report.update({
+            "seconds": round(time.perf_counter() - self.started, 4),
+            "fetched": self.fetched,
+            "not_modified_sources": not_modified,
+            "inserted": inserted,
+            "updated": updated,
+            "unchanged": self.unchanged,
+            "skipped": self.skipped,
+            "duplicates": self.duplicates,
+            "unconfirmed": unconfirmed,  # sent, but the run ended before the upsert returned
+        })
+        print(f"✅ Ingest done: {inserted} inserted, {updated} updated, {self.unchanged} unchanged, "
+              f"{self.skipped} skipped, {self.duplicates} cross-source duplicates, "
+              f"{report['rejected']} rejected, {unconfirmed} unconfirmed ({report['seconds']:.2f}s)")
+        return report
+
+async def _ingest(sources: List[str], force: bool) -> Dict[str, Any]:
+    pipeline = IngestPipeline(force=force)
+    not_modified = []
+    validators = None
+    try:
+        # Stream from all sources concurrently; a forced run bypasses the
+        # feed cache so every job is re-read
+        _, not_modified, validators = await _fetch_all(pipeline.add, sources, use_cache=not force)
+    except Exception as e:
+        print(f"❌ Fetch failed ({e})")
+    
+    if not pipeline.fetched and not not_modified:
+        print("No jobs returned from APIs, using fallback test jobs")
+        for job in TEST_JOBS:
+            await pipeline.add(dict(job))
     
-    print(f"✅ Total jobs inserted to database: {total}")
-    return total
+    await pipeline.flush()
+    report = pipeline.finish(not_modified)
+    if validators is not None:
+        # A 304 next time would skip the rows that did not make it, so the
+        # feeds are only marked as seen when every row is stored
+        if report["failed_keys"] or report["unconfirmed"]:
+            print(f"⚠️ Not saving feed validators: {report['rejected']} rejected, "
+                  f"{report['unconfirmed']} unconfirmed rows; feeds are downloaded in full next run")
+        else:
+            validators.commit()
+    return report
+
+# Listeners run on the ingest thread after each run that inserted or updated jobs
+_stored_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+def on_jobs_stored(listener: Callable[[Dict[str, Any]], None]) -> Callable[[Dict[str, Any]], None]:
+    """Register `listener(report)` to be called once a run has changed the jobs table"""
+    _stored_listeners.append(listener)
+    return listener
+
+def fetch_and_store_jobs(sources: Optional[List[str]] = None, force: bool = False) -> Dict[str, Any]:
+    """Fetch jobs from `sources` (default: all) and store the new or changed ones.
+
+    Jobs flow from the feeds through mapping and change detection into batched
+    upserts as they are decoded. Pass `force=True` to ignore the hash index and
+    rewrite every job, e.g. after the jobs table has been restored. Returns the
+    storage report plus fetched, inserted, updated, unchanged and skipped counts.
+    """
+    sources = resolve_sources(sources)
+    report = asyncio.run(_ingest(sources, force))
+    if report["inserted"] or report["updated"]:
+        for listener in _stored_listeners:
+            try:
+                listener(report)
+            except Exception as e:
+                print(f"⚠️ Jobs-stored listener failed: {e}")
+    return report
 
 # ── Fallback data for when APIs fail ──────────────────
 TEST_JOBS = [
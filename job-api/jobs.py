@@ -1,214 +1,256 @@
 # jobs.py
-from fastapi import APIRouter, HTTPException, Body
-from job_service import fetch_and_store_jobs, supabase, TEST_JOBS
+from fastapi import APIRouter, HTTPException, Body, Query, Request
+from job_service import TEST_JOBS, on_jobs_stored
+from enrichment import enrich_jobs
+from db import db, upsert_returning
+from catalogue_cache import catalogue_cache
+from json_response import EncodedBody, send
+import keyset
+from ingest_worker import enqueue_run, get_run
+from sources import source_stats
 from fastapi.responses import JSONResponse
-from typing import Dict, Any
-import uuid
+from typing import Dict, Any, List, Optional
+import os
+import re
 from datetime import datetime
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
-@router.post("/refresh")
-def refresh_jobs():
-    """Pull latest listings from RemoteOK and store them."""
+SYNC_SINCE_HEADER = "X-Sync-Since"
+# Rows come back in the response shape; the job is cut down to what the applications screen shows
+APPLICATION_SELECT = ("id,job_id,profile_id,status,created_at,updated_at,"
+                      "job_data:job_id(id,title,company,location,pay:salary,logo,description,url:apply_url)")
+APPLICATION_PAGE_SIZE = 50
+_STATUS = re.compile(r"^[a-z_]+$")
+
+# Cached listing pages are stale once an ingest run in this process stores jobs
+on_jobs_stored(lambda report: catalogue_cache.invalidate())
+
+# Stored jobs are enriched at ingest; the test data served as a fallback is enriched once here
+FALLBACK_JOBS = [dict(job) for job in TEST_JOBS]
+enrich_jobs(FALLBACK_JOBS)
+
+@router.post("/refresh", status_code=202)
+def refresh_jobs(source: Optional[List[str]] = Query(None), force: bool = False):
+    """Queue an ingest run for the given sources (default: all) and return its id."""
     try:
-        total = fetch_and_store_jobs()
-        return {"message": f"{total} jobs upserted"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        run = enqueue_run(source, force=force)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "run_id": run["id"],
+        "status": run["status"],
+        "sources": run["sources"],
+        "poll_url": f"/jobs/refresh/{run['id']}",
+    }
+
+@router.get("/refresh/{run_id}")
+def refresh_status(run_id: str):
+    """Poll an ingest run; the report holds inserted/updated/unchanged/skipped/duplicates counts once done."""
+    run = get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Unknown ingest run")
+    return run
+
+@router.get("/sources")
+def list_sources():
+    """Per-source latency, error and circuit breaker stats for job ingestion."""
+    return source_stats()
 
 @router.get("/")
-def list_jobs():
-    """Get all jobs from the database with quality enhancement."""
+async def list_jobs(request: Request, limit: int = 250, cursor: Optional[str] = None, fields: Optional[str] = None):
+    """Get jobs from the database, newest first.
+
+    Pages with `cursor` (the X-Next-Cursor header of the previous page) and
+    `fields` (comma-separated columns, or `card`) like GET /jobs/ in main.py.
+    Encoded pages are served from the catalogue cache until the TTL or the
+    next ingest run that stores jobs, with gzip/br and ETag handling.
+    """
     try:
-        # Get page parameter for pagination, default to 1
-        page_size = 250  # We want to send a large batch of jobs
-        
-        print("Querying Supabase for jobs...")
-        # Query with high limit to ensure enough jobs
-        response = supabase.table("jobs").select("*").limit(page_size).execute()
+        after = keyset.decode_cursor(cursor) if cursor else None
+        columns = keyset.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    limit = keyset.clamp_limit(limit)
+    cache_key = ("list_jobs", limit, cursor, fields)
+    cached = catalogue_cache.get(cache_key)
+    if cached:
+        return send(request, *cached)
+    generation = catalogue_cache.generation
+    try:
+        query = db().table("jobs").select(keyset.select_clause(columns))
+        response = await keyset.page_query(query, limit, after).execute()
         
         if hasattr(response, 'error') and response.error is not None:
             print(f"Error fetching jobs from Supabase: {response.error}")
             # Return test data if Supabase has an error
-            return JSONResponse(content=filter_quality_jobs(TEST_JOBS))
-        
-        if not response.data or len(response.data) == 0:
-            print("No jobs found in Supabase, fetching fresh data from APIs...")
-            # Try to fetch new jobs from APIs right now
-            from job_service import fetch_and_store_jobs
-            jobs_inserted = fetch_and_store_jobs()
-            print(f"Fetched and inserted {jobs_inserted} new jobs")
-            
-            # Try to get the jobs again
-            response = supabase.table("jobs").select("*").limit(250).execute()
-            
-            # If still empty, use test data
-            if not response.data or len(response.data) == 0:
-                print("Still no jobs found, returning test data")
-                return JSONResponse(content=filter_quality_jobs(TEST_JOBS))
+            return JSONResponse(content=keyset.project(FALLBACK_JOBS, columns))
         
-        # Enhance jobs to ensure all have location, logo and description
-        enhanced_jobs = filter_quality_jobs(response.data)
+        if not response.data and after is None:
+            # Never fetch inline: queue a background ingest and serve test data meanwhile
+            run = enqueue_run()
+            print(f"No jobs found in Supabase, queued ingest run {run['id']} and returning test data")
+            return JSONResponse(content=keyset.project(FALLBACK_JOBS, columns))
         
-        print(f"Retrieved {len(response.data)} jobs from Supabase, enhanced to {len(enhanced_jobs)} quality listings")
-        return JSONResponse(content=enhanced_jobs)
+        # Rows are stored enriched (see enrichment.py), so they are sent as they are
+        headers = keyset.page_headers(response.data, limit)
+        encoded = EncodedBody.of(keyset.project(response.data, columns))
+        catalogue_cache.put(cache_key, encoded, headers, generation)
+        return send(request, encoded, headers)
     except Exception as e:
         print(f"Exception in list_jobs: {str(e)}")
         # Fall back to test data if there's an exception
-        return JSONResponse(content=filter_quality_jobs(TEST_JOBS))
+        return JSONResponse(content=keyset.project(FALLBACK_JOBS, columns))
 
 
-def filter_quality_jobs(jobs_list):
-    """Filter jobs to enhance quality, but ensure users always have jobs to view.
-    Apply basic improvements to job listings when fields are missing.
-    
-    Args:
-        jobs_list: List of job dictionaries
-        
-    Returns:
-        List of enhanced jobs with reasonable quality
+# Upper bound on applications per bulk status request
+MAX_STATUS_BATCH = int(os.getenv("MAX_STATUS_BATCH", "1000"))
+
+async def _transition(profile_id: str, ids: List[int], new_status: str,
+                      from_status: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Move the user's applications in one statement that also appends their status history.
+
+    Returns a row per application found (see application_status.sql); ids the
+    user does not own are left out.
     """
-    enhanced_jobs = []
-    total_improved = 0
-    
-    for job in jobs_list:
-        # Check and fix fields when possible
-        needs_enhancement = False
-        
-        # Handle location
-        if not job.get('location') or len(str(job.get('location', '')).strip()) == 0:
-            job['location'] = job.get('job_location') or 'Remote/Flexible'
-            needs_enhancement = True
-        
-        # Handle logo/image - copy from image to logo and vice versa if one is missing
-        if not job.get('logo') or len(str(job.get('logo', '')).strip()) == 0:
-            if job.get('image') and len(str(job.get('image', '')).strip()) > 0:
-                job['logo'] = job['image']
-                needs_enhancement = True
-            else:
-                # Use a nice default company logo as placeholder
-                job['logo'] = f"https://ui-avatars.com/api/?name={job.get('company', 'Company')}&background=random&size=150"
-                needs_enhancement = True
-        
-        # Handle description
-        if not job.get('description') or len(str(job.get('description', '')).strip()) < 10:
-            # Generate a basic description from available info
-            company = job.get('company', 'A company')
-            title = job.get('title', 'position')
-            job['description'] = f"Join {company} as a {title}. This role offers an opportunity to work with a great team on exciting projects."
-            needs_enhancement = True
-            
-        if needs_enhancement:
-            total_improved += 1
-            
-        enhanced_jobs.append(job)
-    
-    print(f"Enhanced {total_improved} out of {len(jobs_list)} job listings to improve quality")
-    return enhanced_jobs
+    params: Dict[str, Any] = {"_profile_id": profile_id, "_ids": ids, "_status": new_status}
+    if from_status:
+        params["_from_status"] = from_status
+    resp = await db().rpc("transition_applications", params).execute()
+    return resp.data or []
 
 @router.post("/applications")
-def save_application(application_data: Dict[str, Any] = Body(...)):
-    """Save a job application with 'applying' status"""
+async def save_application(application_data: Dict[str, Any] = Body(...)):
+    """Save a job application; it starts as 'applying' and re-applying keeps its status"""
+    profile_id = application_data.get("profile_id") or application_data.get("user_id")
+    job_id = application_data.get("job_id")
+    if not profile_id or not job_id:
+        raise HTTPException(status_code=400, detail="job_id and user_id are required")
     try:
-        # Generate a unique ID for the application
-        application_id = str(uuid.uuid4())
-        
-        # Create application record with applying status
-        application = {
-            "id": application_id,
-            "job_id": application_data.get("job_id"),
-            "user_id": application_data.get("user_id"),
-            "status": "applying",
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
-            "job_data": application_data.get("job_data", {})
-        }
-        
-        # Store in database (mock - would use supabase in production)
-        print(f"Saving application: {application}")
-        
-        # Return successful response with the application ID
-        return {"id": application_id, "status": "applying"}
+        application = await upsert_returning(
+            "matches", {"profile_id": profile_id, "job_id": job_id}, "profile_id,job_id")
+        return {"id": application.get("id"), "status": application.get("status", "applying")}
     except Exception as e:
         print(f"Error saving application: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _owner(application_id: int) -> Optional[str]:
+    resp = await db().table("matches").select("profile_id").eq("id", application_id).limit(1).execute()
+    return resp.data[0]["profile_id"] if resp.data else None
+
 @router.put("/applications/{application_id}")
-def update_application_status(
-    application_id: str, 
+async def update_application_status(
+    application_id: str,
     update_data: Dict[str, Any] = Body(...)
 ):
-    """Update a job application status"""
+    """Update a job application status; with `profile_id`, only if that user owns the application"""
+    new_status = update_data.get("status")
+    profile_id = update_data.get("profile_id") or update_data.get("user_id")
+    if not new_status:
+        raise HTTPException(status_code=400, detail="Status field is required")
+    if not _STATUS.match(str(new_status)):
+        raise HTTPException(status_code=400, detail=f"Invalid status: {new_status}")
+    if not application_id.isdigit():
+        raise HTTPException(status_code=404, detail="Application not found")
     try:
-        # Get the new status from request body
-        new_status = update_data.get("status")
-        if not new_status:
-            raise HTTPException(status_code=400, detail="Status field is required")
-            
-        # In a real implementation, validate the application exists
-        # and belongs to the requesting user
-        
-        # Update the application status
-        updated_application = {
-            "id": application_id,
-            "status": new_status,
-            "updated_at": datetime.now().isoformat()
-        }
-        
-        print(f"Updating application {application_id} to status: {new_status}")
-        
-        # Return the updated application
-        return updated_application
-    except HTTPException as he:
-        raise he
+        if not profile_id:
+            profile_id = await _owner(int(application_id))
+        rows = await _transition(profile_id, [int(application_id)], new_status) if profile_id else []
     except Exception as e:
         print(f"Error updating application: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    if not rows:
+        raise HTTPException(status_code=404, detail="Application not found")
+    return rows[0]
+
+@router.post("/applications/status")
+async def bulk_update_application_status(update_data: Dict[str, Any] = Body(...)):
+    """Move many of a user's applications to one status in a single statement.
+
+    Body: `profile_id`, `status`, `ids` and optionally `from_status` (only move
+    applications currently in one of these). Returns one result per id, in
+    order: `changed`, `unchanged` (already there or not in `from_status`) or
+    `not_found`.
+    """
+    profile_id = update_data.get("profile_id") or update_data.get("user_id")
+    ids = update_data.get("ids") or []
+    if not profile_id or not update_data.get("status"):
+        raise HTTPException(status_code=400, detail="profile_id and status are required")
+    if len(ids) > MAX_STATUS_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_STATUS_BATCH} applications per request")
+    new_status = update_data["status"]
+    if not _STATUS.match(str(new_status)):
+        raise HTTPException(status_code=400, detail=f"Invalid status: {new_status}")
+    from_status = update_data.get("from_status") or []
+    try:
+        from_status = _parse_statuses(from_status if isinstance(from_status, str) else ",".join(from_status))
+        ids = [int(i) for i in ids]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        rows = await _transition(profile_id, list(dict.fromkeys(ids)), new_status, from_status)
+    except Exception as e:
+        print(f"Error updating application statuses: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    found = {row["id"]: row for row in rows}
+    results = []
+    for application_id in ids:
+        row = found.get(application_id)
+        if row is None:
+            results.append({"id": application_id, "status": "not_found"})
+        else:
+            results.append({"id": application_id, "status": "changed" if row["changed"] else "unchanged",
+                            "from_status": row["from_status"], "to_status": row["status"]})
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {"received": len(ids), "counts": counts, "results": results}
+
+def _parse_statuses(status: Optional[str]) -> List[str]:
+    statuses = [s.strip() for s in (status or "").split(",") if s.strip()]
+    bad = [s for s in statuses if not _STATUS.match(s)]
+    if bad:
+        raise ValueError(f"Invalid status: {', '.join(bad)}")
+    return statuses
 
 @router.get("/applications")
-def list_applications(profile_id: str = None):
-    """List applications for a specific user"""
+async def list_applications(request: Request, profile_id: str = None, limit: int = APPLICATION_PAGE_SIZE,
+                            cursor: Optional[str] = None, status: Optional[str] = None,
+                            since: Optional[str] = None):
+    """List a user's applications with the job fields the app shows, a page at a time.
+
+    Newest first by default; with `since` (an ISO timestamp) only applications
+    changed at or after it, oldest change first, for incremental sync. The last
+    sync page carries X-Sync-Since to send as `since` next time. `status` takes
+    one status or a comma-separated list. Pages continue with `cursor` like
+    GET /jobs/.
+    """
     if not profile_id:
         raise HTTPException(status_code=400, detail="profile_id parameter is required")
-
     try:
-        # Query the database for applications by this specific user
-        resp = supabase.table("matches").select("""
-            *,
-            jobs:job_id (*)
-        """).eq("profile_id", profile_id).order("created_at", desc=True).execute()
-
-        if not resp.data:
-            # Return empty list if no applications found for this user
-            return []
-
-        # Transform the data to match the expected format
-        applications = []
-        for match in resp.data:
-            job_data = match.get("jobs") or {}
-            application = {
-                "id": match.get("id"),
-                "job_id": match.get("job_id"),
-                "profile_id": match.get("profile_id"),
-                "status": match.get("status", "applying"),
-                "created_at": match.get("created_at"),
-                "updated_at": match.get("updated_at"),
-                "job_data": {
-                    "id": job_data.get("id"),
-                    "title": job_data.get("title", "Unknown Job"),
-                    "company": job_data.get("company", "Unknown Company"),
-                    "location": job_data.get("location", "Unknown Location"),
-                    "pay": job_data.get("salary"),
-                    "description": job_data.get("description"),
-                    "url": job_data.get("url")
-                }
-            }
-            applications.append(application)
-
-        return applications
+        after = keyset.decode_cursor(cursor) if cursor else None
+        statuses = _parse_statuses(status)
+        if since:
+            since = datetime.fromisoformat(since.replace("Z", "+00:00")).isoformat()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    limit = keyset.clamp_limit(limit)
+    order_by = "updated_at" if since else "created_at"
 
+    try:
+        query = db().table("matches").select(APPLICATION_SELECT).eq("profile_id", profile_id)
+        if statuses:
+            query = query.in_("status", statuses)
+        if since:
+            query = query.gte("updated_at", since)
+        resp = await keyset.page_query(query, limit, after, order_by, desc=not since).execute()
     except Exception as e:
         print(f"Error fetching applications for user {profile_id}: {str(e)}")
-        # Return empty list on error instead of failing
-        return []
+        raise HTTPException(status_code=500, detail=str(e))
+
+    rows = resp.data or []
+    headers = keyset.page_headers(rows, limit, order_by)
+    if since and not headers:
+        headers[SYNC_SINCE_HEADER] = rows[-1]["updated_at"] if rows else (after[0] if after else since)
+    return send(request, EncodedBody.of(rows), headers)
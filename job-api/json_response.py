@@ -0,0 +1,107 @@
+# json_response.py - Encoded, compressed and validated JSON responses for listings
+#
+# Listing bodies are serialized once (orjson when installed), tagged with an
+# ETag derived from the bytes and compressed lazily per encoding; the variants
+# live as long as the EncodedBody, so a cached page is compressed at most once
+# per encoding. send() negotiates Accept-Encoding (br, then gzip) and answers
+# If-None-Match with 304 when the client already holds this version.
+import os
+import gzip
+import json
+import hashlib
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Bodies smaller than this are sent uncompressed (headers would eat the savings)
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+def dumps(content: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+class EncodedBody:
+    """Serialized JSON plus its ETag and compressed variants"""
+
+    __slots__ = ("body", "etag", "_variants")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        # weak: the gzip, br and identity bodies are the same JSON
+        self.etag = 'W/"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+        self._variants: Dict[str, bytes] = {}
+
+    @classmethod
+    def of(cls, content: Any) -> "EncodedBody":
+        return cls(dumps(content))
+
+    def variant(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        data = self._variants.get(encoding)
+        if data is None:
+            if encoding == "br":
+                data = brotli.compress(self.body, quality=BROTLI_QUALITY)
+            else:
+                data = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+            self._variants[encoding] = data
+        return data
+
+    def nbytes(self) -> int:
+        return len(self.body) + sum(len(v) for v in self._variants.values())
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, honoring q=0"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and not BROTLI_AVAILABLE:
+            continue
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def send(request: Request, encoded: EncodedBody, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Send `encoded` compressed as the client allows, or 304 if its If-None-Match is current"""
+    headers = dict(headers or {}, ETag=encoded.etag, Vary="Accept-Encoding")
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, encoded.etag):
+        return Response(status_code=304, headers=headers)
+    encoding = None
+    if len(encoded.body) >= COMPRESS_MIN_BYTES:
+        encoding = negotiate(request.headers.get("accept-encoding", ""))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=encoded.variant(encoding), media_type="application/json", headers=headers)
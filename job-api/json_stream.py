@@ -0,0 +1,131 @@
+# json_stream.py - Incremental decoding of large JSON feeds
+#
+# Yields the elements of a JSON array one at a time while the response body is
+# still downloading, so memory use is bounded by the size of a single element
+# rather than the whole feed. Handles the two shapes our feeds use: a top-level
+# array (RemoteOK) and an array under a top-level key (Arbeitnow "data",
+# Adzuna "results"). Elements are decoded with the stdlib C scanner.
+import json
+import codecs
+from typing import Any, AsyncIterable, AsyncIterator, Optional
+
+_WHITESPACE = " \t\r\n"
+_VALUE_END = _WHITESPACE + ",:]}"
+_decoder = json.JSONDecoder()
+
+class _Reader:
+    """A text buffer over an async byte stream that is refilled on demand"""
+
+    def __init__(self, chunks: AsyncIterable[bytes]):
+        self._chunks = chunks.__aiter__()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    async def fill(self) -> bool:
+        """Append the next chunk to the buffer; False once the stream is exhausted"""
+        if self.eof:
+            return False
+        # Drop the consumed prefix so the buffer never holds more than ~one element
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        while True:
+            try:
+                chunk = await self._chunks.__anext__()
+            except StopAsyncIteration:
+                self.eof = True
+                self.buf += self._utf8.decode(b"", final=True)
+                return False
+            text = self._utf8.decode(chunk)
+            if text:
+                self.buf += text
+                return True
+
+    async def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not await self.fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    async def expect(self, char: str) -> None:
+        found = await self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, found {found!r}")
+        self.pos += 1
+
+    async def value(self) -> Any:
+        """Decode the next complete JSON value, reading more input as needed"""
+        await self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if await self.fill():
+                    continue
+                raise
+            # A number cut at the buffer edge ("-4" of "-4.5e10") decodes fine on its
+            # own, so only accept a value once the character after it is visible
+            if not self.eof and (end == len(self.buf) or self.buf[end] not in _VALUE_END):
+                await self.fill()
+                continue
+            self.pos = end
+            return value
+
+async def _array_items(reader: _Reader, skip: int) -> AsyncIterator[Any]:
+    await reader.expect("[")
+    if await reader.peek() == "]":
+        reader.pos += 1
+        return
+    index = 0
+    while True:
+        item = await reader.value()
+        if index >= skip:
+            yield item
+        index += 1
+        separator = await reader.peek()
+        reader.pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or ']' in JSON array, found {separator!r}")
+
+async def iter_json_array(
+    chunks: AsyncIterable[bytes],
+    key: Optional[str] = None,
+    skip: int = 0,
+) -> AsyncIterator[Any]:
+    """Yield the elements of a streamed JSON array.
+
+    With `key=None` the document itself must be an array; otherwise the array
+    is read from that top-level key of an object (nothing is yielded if the key
+    is missing or not an array). The first `skip` elements are dropped.
+    """
+    reader = _Reader(chunks)
+    if key is None:
+        async for item in _array_items(reader, skip):
+            yield item
+        return
+
+    await reader.expect("{")
+    if await reader.peek() == "}":
+        return
+    while True:
+        name = await reader.value()
+        await reader.expect(":")
+        if name == key and await reader.peek() == "[":
+            async for item in _array_items(reader, skip):
+                yield item
+            return  # the rest of the document is not needed
+        await reader.value()  # skip values of other keys
+        separator = await reader.peek()
+        reader.pos += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or '}}' in JSON object, found {separator!r}")
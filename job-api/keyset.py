@@ -0,0 +1,94 @@
+# keyset.py - Cursor pagination and column projection for job listings
+#
+# Listings are ordered newest first on (created_at, id). A page ends with an
+# opaque cursor encoding the last row's (created_at, id); the next page asks
+# for rows strictly below it, which an index on (created_at DESC, id DESC)
+# answers without scanning the pages before it (see keyset_pagination.sql).
+# The cursor travels in the X-Next-Cursor response header so the body stays a
+# plain list of jobs. The same helpers page other tables on another sort
+# column, e.g. applications oldest change first on (updated_at, id).
+import os
+import re
+import json
+import base64
+from typing import List, Dict, Any, Optional, Tuple
+
+MAX_PAGE_SIZE = int(os.getenv("JOBS_MAX_PAGE_SIZE", "250"))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Always selected: the cursor is built from them
+CURSOR_COLUMNS = ["id", "created_at"]
+# `fields=card`: what a swipe card renders (no description)
+CARD_FIELDS = ["id", "title", "company", "location", "salary", "logo", "job_type", "remote", "created_at"]
+
+_COLUMN = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+Cursor = Tuple[str, int]  # (sort column value, id) of the last row served
+
+def encode_cursor(row: Dict[str, Any], column: str = "created_at") -> Optional[str]:
+    if row.get(column) is None or row.get("id") is None:
+        return None
+    raw = json.dumps([row[column], row["id"]], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Raises ValueError for a cursor this API did not issue"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, job_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(created_at, str) or not isinstance(job_id, int):
+        raise ValueError("Invalid cursor")
+    return created_at, job_id
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Column list from `fields=a,b` (or `fields=card`); None selects every column"""
+    if not fields:
+        return None
+    if fields == "card":
+        return list(CARD_FIELDS)
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    bad = [f for f in names if not _COLUMN.match(f)]
+    if bad or not names:
+        raise ValueError(f"Invalid fields: {', '.join(bad) or fields}")
+    return names
+
+def select_clause(fields: Optional[List[str]]) -> str:
+    if fields is None:
+        return "*"
+    return ",".join(dict.fromkeys(CURSOR_COLUMNS + fields))
+
+def below_cursor(cursor: Cursor, column: str = "created_at", desc: bool = True) -> str:
+    """PostgREST `or` filter for rows after `cursor` in (column, id) order"""
+    value, row_id = cursor
+    op = "lt" if desc else "gt"
+    return f'{column}.{op}."{value}",and({column}.eq."{value}",id.{op}.{row_id})'
+
+def page_query(query, limit: int, cursor: Optional[Cursor], column: str = "created_at", desc: bool = True):
+    """Order on (column, id) (newest first by default), start past `cursor`, fetch at most `limit` rows"""
+    query = query.order(column, desc=desc).order("id", desc=desc).limit(limit)
+    if cursor:
+        # the bound is implied by the `or`, but it is what lets the index scan start at the cursor
+        bounded = query.lte(column, cursor[0]) if desc else query.gte(column, cursor[0])
+        query = bounded.or_(below_cursor(cursor, column, desc))
+    return query
+
+def next_cursor(rows: List[Dict[str, Any]], limit: int, column: str = "created_at") -> Optional[str]:
+    """Cursor for the page after `rows`, or None when this page was the last"""
+    if len(rows) < limit or not rows:
+        return None
+    return encode_cursor(rows[-1], column)
+
+def page_headers(rows: List[Dict[str, Any]], limit: int, column: str = "created_at") -> Dict[str, str]:
+    cursor = next_cursor(rows, limit, column)
+    return {NEXT_CURSOR_HEADER: cursor} if cursor else {}
+
+def project(rows: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    if fields is None:
+        return rows
+    columns = list(dict.fromkeys(CURSOR_COLUMNS + fields))
+    return [{c: row.get(c) for c in columns} for row in rows]
+
+def clamp_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
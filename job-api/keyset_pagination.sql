@@ -0,0 +1,51 @@
+-- Keyset pagination for GET /jobs/, GET /jobs/unseen and GET /jobs/applications
+-- (pages are ordered by (created_at DESC, id DESC) and continue below a cursor;
+-- application sync pages by (updated_at, id) instead)
+-- Run this SQL directly in Supabase SQL Editor or using psql
+
+-- Serves every page, at any depth, as an index range scan
+CREATE INDEX IF NOT EXISTS jobs_created_at_id_idx ON public.jobs (created_at DESC, id DESC);
+
+-- Unseen jobs for a user, newest first, starting below (_before_created_at, _before_id).
+-- The anti-join probes the swipes (user_id, job_id) unique index from idempotent_writes.sql
+-- once per candidate job, so a page costs about _limit + (jobs the user already swiped in that range).
+CREATE OR REPLACE FUNCTION public.unseen_jobs_page(
+  _user_id UUID,
+  _limit INTEGER DEFAULT 20,
+  _before_created_at TIMESTAMPTZ DEFAULT NULL,
+  _before_id INTEGER DEFAULT NULL
+)
+RETURNS SETOF public.jobs
+LANGUAGE sql STABLE
+AS $$
+  SELECT j.*
+  FROM public.jobs j
+  WHERE NOT EXISTS (
+      SELECT 1 FROM public.swipes s
+      WHERE s.user_id = _user_id AND s.job_id = j.id
+    )
+    AND (_before_id IS NULL OR (j.created_at, j.id) < (_before_created_at, _before_id))
+  ORDER BY j.created_at DESC, j.id DESC
+  LIMIT _limit
+$$;
+
+GRANT EXECUTE ON FUNCTION public.unseen_jobs_page(UUID, INTEGER, TIMESTAMPTZ, INTEGER) TO anon, authenticated;
+
+-- Applications: a user's newest first, and a user's changes since the last sync
+CREATE INDEX IF NOT EXISTS matches_profile_created_at_id_idx ON public.matches (profile_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS matches_profile_updated_at_id_idx ON public.matches (profile_id, updated_at, id);
+
+-- Sync relies on updated_at moving on every change (same trigger as setup/application-system-migration.sql)
+CREATE OR REPLACE FUNCTION update_modified_column()
+RETURNS TRIGGER AS $$
+BEGIN
+   NEW.updated_at = NOW();
+   RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS update_matches_modtime ON public.matches;
+CREATE TRIGGER update_matches_modtime
+BEFORE UPDATE ON public.matches
+FOR EACH ROW
+EXECUTE FUNCTION update_modified_column();
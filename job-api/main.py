@@ -1,15 +1,59 @@
 # main.py
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Body, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import os
+import asyncio
 import uvicorn
-from jobs import router as jobs_router        # ← imports jobs router
+from jobs import router as jobs_router, SYNC_SINCE_HEADER        # ← imports jobs router
 from schema import router as schema_router    # ← imports schema router
-from pydantic import BaseModel, validator
-from supabase_client import supabase
+from ingest_worker import IngestScheduler
+from swipe_log import SwipeWriteBehind, SWIPE_WRITE_BEHIND
+from unseen_feed import UnseenFeed, UNSEEN_FEED_CACHE
+from pydantic import BaseModel, ValidationError, validator
+from db import db, close_db, upsert_returning, upsert_many
+from postgrest.exceptions import APIError
+import keyset
+from catalogue_cache import catalogue_cache
+from json_response import EncodedBody, send
 from typing import Optional, List, Dict, Any
-import traceback
 
-app = FastAPI(title="Jobbify API")
+# Set by the lifespan when SWIPE_WRITE_BEHIND is on and this process owns the swipe log
+swipe_queue: Optional[SwipeWriteBehind] = None
+# Set by the lifespan when UNSEEN_FEED_CACHE is on
+unseen_feed: Optional[UnseenFeed] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global swipe_queue, unseen_feed
+    # Opt-in: run the ingest scheduler inside the API process.
+    # Enable it in a single process only, otherwise every worker ingests.
+    scheduler = None
+    if os.getenv("INGEST_SCHEDULER_ENABLED", "").lower() in ("1", "true", "yes"):
+        scheduler = IngestScheduler()
+        scheduler.start()
+    if SWIPE_WRITE_BEHIND:
+        queue = SwipeWriteBehind()
+        try:
+            await queue.start()  # replays swipes a previous run did not flush
+            swipe_queue = queue
+        except RuntimeError as e:
+            print(f"⚠️ Write-behind swipes disabled in this process: {str(e)}")
+    if UNSEEN_FEED_CACHE:
+        unseen_feed = UnseenFeed()
+        await unseen_feed.start()
+    yield
+    if scheduler:
+        await scheduler.stop()
+    if swipe_queue:
+        queue, swipe_queue = swipe_queue, None
+        await queue.stop()
+    if unseen_feed:
+        feed, unseen_feed = unseen_feed, None
+        await feed.stop()
+    await close_db()
+
+app = FastAPI(title="Jobbify API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,6 +61,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[keyset.NEXT_CURSOR_HEADER, SYNC_SINCE_HEADER, "ETag"],
 )
 
 # ─── Models ────────────────────────────────────────────────────────────
@@ -33,6 +78,14 @@ class SwipeIn(BaseModel):
             raise ValueError('direction must be either "left" or "right"')
         return v
 
+    # swipes.job_id is an INTEGER; check here, before a queued swipe is acknowledged
+    @validator('job_id')
+    def validate_job_id(cls, v):
+        try:
+            return str(int(v))
+        except ValueError:
+            raise ValueError('job_id must be an integer job id')
+
 class BookmarkIn(BaseModel):
     job_id: str
     profile_id: str  # Adding profile_id to support current app structure
@@ -51,236 +104,224 @@ def get_user_id(profile_id: str = None) -> str:
 
 # ─── Endpoints ────────────────────────────────────────────────────────
 
+def _page_params(cursor: Optional[str], fields: Optional[str]):
+    try:
+        return (keyset.decode_cursor(cursor) if cursor else None), keyset.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _send_page(request: Request, rows: List[Dict[str, Any]], limit: int,
+               fields: Optional[List[str]]) -> Response:
+    return send(request, EncodedBody.of(keyset.project(rows, fields)), keyset.page_headers(rows, limit))
+
 @app.get("/jobs/")
-def fetch_jobs(limit: int = 50) -> List[Dict[str, Any]]:
-    """Fetch available jobs."""
+async def fetch_jobs(request: Request, limit: int = 50, cursor: Optional[str] = None,
+                     fields: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Fetch available jobs, newest first.
+
+    Pass the X-Next-Cursor header of a page as `cursor` to get the next one;
+    `fields` picks the columns (comma-separated, or `card`). Pages come from
+    the catalogue cache while it holds them, compressed as Accept-Encoding
+    allows; If-None-Match with the page's ETag gets a 304.
+    """
+    after, columns = _page_params(cursor, fields)
+    limit = keyset.clamp_limit(limit)
+    cache_key = ("fetch_jobs", limit, cursor, fields)
+    cached = catalogue_cache.get(cache_key)
+    if cached:
+        return send(request, *cached)
+    generation = catalogue_cache.generation
     try:
-        resp = supabase.table("jobs").select("*").limit(limit).execute()
-        return resp.data
+        query = db().table("jobs").select(keyset.select_clause(columns))
+        resp = await keyset.page_query(query, limit, after).execute()
+    except APIError as e:
+        raise HTTPException(status_code=400, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    headers = keyset.page_headers(resp.data, limit)
+    encoded = EncodedBody.of(keyset.project(resp.data, columns))
+    catalogue_cache.put(cache_key, encoded, headers, generation)
+    return send(request, encoded, headers)
 
 @app.get("/jobs/unseen")
-def fetch_unseen_jobs(limit: int = 20, profile_id: str = None) -> List[Dict[str, Any]]:
-    """Call the RPC unseen_jobs to return jobs obeying your rules."""
+async def fetch_unseen_jobs(request: Request, limit: int = 20, profile_id: str = None,
+                            cursor: Optional[str] = None, fields: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Newest jobs the user has not swiped yet, paged like GET /jobs/.
+
+    Served from the in-memory feed when UNSEEN_FEED_CACHE is on, otherwise
+    (or while the feed cannot answer) by the unseen_jobs_page RPC.
+    """
     user_id = get_user_id(profile_id)
+    after, columns = _page_params(cursor, fields)
+    limit = keyset.clamp_limit(limit)
+    if unseen_feed:
+        try:
+            jobs = await unseen_feed.page(user_id, limit, after[1] if after else None)
+            if jobs is not None:
+                return _send_page(request, jobs, limit, columns)
+        except Exception as e:
+            print(f"⚠️ Unseen feed failed for {user_id}, using the RPC: {str(e)}")
+    params = {"_user_id": user_id, "_limit": limit,
+              "_before_created_at": after[0] if after else None,
+              "_before_id": after[1] if after else None}
     try:
-        resp = supabase.rpc("unseen_jobs", {"_limit": limit, "user_id": user_id}).execute()
-        return resp.data
+        resp = await db().rpc("unseen_jobs_page", params).select(keyset.select_clause(columns)).execute()
+    except APIError as e:
+        raise HTTPException(status_code=400, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return _send_page(request, resp.data, limit, columns)
 
-@app.post("/swipe", status_code=status.HTTP_201_CREATED)
-def swipe(sw: SwipeIn) -> Dict[str, Any]:
-    """Insert a swipe record."""
+# Each write is one upsert keyed on (owner, job_id) that returns the stored row.
+# Fields sent overwrite the stored ones; fields left out keep their value, so
+# repeating a request is safe and concurrent taps never create duplicates.
+async def _save(table: str, row: Dict[str, Any], on_conflict: str, what: str) -> Dict[str, Any]:
     try:
-        user_id = get_user_id(sw.profile_id)
-        payload = {
-            "user_id": user_id,
-            "job_id": sw.job_id,
-            "direction": sw.direction,
-        }
-        
-        # Check if there's an existing swipe first
-        print(f"Checking if swipe already exists: user_id={user_id}, job_id={sw.job_id}")
-        try:
-            existing = supabase.table("swipes").select("id").eq("user_id", user_id).eq("job_id", sw.job_id).execute()
-            
-            if existing.data and len(existing.data) > 0:
-                # Swipe already exists, update it
-                swipe_id = existing.data[0]["id"]
-                print(f"Swipe exists with ID {swipe_id}, updating direction to {sw.direction}")
-                
-                try:
-                    resp = supabase.table("swipes").update({"direction": sw.direction}).eq("id", swipe_id).execute()
-                    print(f"Update response: {resp.data}")
-                    return resp.data[0] if resp.data and len(resp.data) > 0 else {"id": swipe_id, "direction": sw.direction}
-                except Exception as update_error:
-                    print(f"Error updating swipe: {str(update_error)}")
-                    print(traceback.format_exc())
-                    # Return existing data as success instead of failing
-                    return {"id": swipe_id, "message": "Record exists but could not be updated"}
-            else:
-                # No existing swipe, insert new one
-                print(f"No existing swipe found, inserting new record with payload: {payload}")
-                try:
-                    resp = supabase.table("swipes").insert(payload).execute()
-                    print(f"Insert response: {resp.data}")
-                    return resp.data[0] if resp.data and len(resp.data) > 0 else {"message": "Inserted but no data returned"}
-                except Exception as insert_error:
-                    print(f"Error inserting swipe: {str(insert_error)}")
-                    print(traceback.format_exc())
-                    raise HTTPException(status_code=400, detail=f"Failed to insert swipe: {str(insert_error)}")
-        except Exception as query_error:
-            print(f"Error querying existing swipes: {str(query_error)}")
-            print(traceback.format_exc())
-            # Try direct insert as fallback
-            try:
-                resp = supabase.table("swipes").insert(payload).execute()
-                return resp.data[0] if resp.data and len(resp.data) > 0 else {"message": "Inserted but no data returned"}
-            except Exception as fallback_error:
-                print(f"Fallback insert failed: {str(fallback_error)}")
-                print(traceback.format_exc())
-                raise HTTPException(status_code=400, detail=f"Failed to insert swipe: {str(fallback_error)}")
+        return await upsert_returning(table, row, on_conflict)
     except Exception as e:
-        print(f"Unhandled error in swipe endpoint: {str(e)}")
-        print(traceback.format_exc())
-        raise HTTPException(status_code=400, detail=str(e))
+        print(f"Error saving {what}: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Failed to save {what}: {str(e)}")
 
-@app.post("/bookmarks", status_code=status.HTTP_201_CREATED)
-def bookmark(bm: BookmarkIn) -> Dict[str, Any]:
-    """Insert a bookmark."""
+async def _queue_swipes(rows: List[Dict[str, Any]]) -> None:
     try:
-        user_id = get_user_id(bm.profile_id)
-        
-        # Check if bookmark already exists
-        print(f"Checking if bookmark already exists: profile_id={user_id}, job_id={bm.job_id}")
+        await swipe_queue.submit(rows)
+    except OSError as e:
+        print(f"Error appending to swipe log: {str(e)}")
+        raise HTTPException(status_code=503, detail="Swipe log unavailable")
+
+@app.post("/swipe", status_code=status.HTTP_201_CREATED)
+async def swipe(sw: SwipeIn) -> Dict[str, Any]:
+    """Record a swipe; swiping the same job again updates its direction.
+
+    In write-behind mode the swipe is acknowledged (still 201, with status
+    `queued`) once it is in the local swipe log, before it reaches the database.
+    """
+    user_id = get_user_id(sw.profile_id)
+    row = {"user_id": user_id, "job_id": sw.job_id, "direction": sw.direction}
+    if swipe_queue:
+        await _queue_swipes([row])
+        saved = dict(row, status="queued")
+    else:
+        saved = await _save("swipes", row, "user_id,job_id", "swipe")
+    if unseen_feed:
+        unseen_feed.mark_seen(user_id, [sw.job_id])
+    return saved
+
+# Upper bound on swipes per batch request; clients flush their buffer well below this
+MAX_SWIPE_BATCH = int(os.getenv("MAX_SWIPE_BATCH", "500"))
+
+@app.post("/swipes/batch")
+async def swipe_batch(items: List[Dict[str, Any]] = Body(...)) -> Dict[str, Any]:
+    """Record a buffered batch of swipes in one bulk upsert.
+
+    Items are validated individually; repeated swipes on the same job collapse
+    to the last one in the batch. If the bulk upsert fails, each swipe is
+    retried on its own so one bad item fails only itself. Returns one result
+    per item, in order:
+    `saved` (with the row id), `queued` (write-behind mode), `superseded`
+    (a later item replaced it), `invalid` or `failed` (with the error).
+    """
+    if len(items) > MAX_SWIPE_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_SWIPE_BATCH} swipes per batch")
+
+    results: List[Dict[str, Any]] = []
+    latest: Dict[tuple, int] = {}  # (user_id, job_id) -> index of the last swipe on it
+    for i, item in enumerate(items):
         try:
-            existing = supabase.table("bookmarks").select("id").eq("profile_id", user_id).eq("job_id", bm.job_id).execute()
-            
-            if existing.data and len(existing.data) > 0:
-                # Bookmark already exists, return success
-                bookmark_id = existing.data[0]["id"]
-                print(f"Bookmark already exists with ID {bookmark_id}")
-                return existing.data[0]
-            
-            # No existing bookmark, insert new one
-            print(f"No existing bookmark found, inserting new record")
-            try:
-                resp = supabase.table("bookmarks").insert({
-                    "profile_id": user_id,
-                    "job_id": bm.job_id
-                }).execute()
-                
-                print(f"Insert response: {resp.data}")
-                return resp.data[0] if resp.data and len(resp.data) > 0 else {"message": "Inserted but no data returned"}
-            except Exception as insert_error:
-                print(f"Error inserting bookmark: {str(insert_error)}")
-                print(traceback.format_exc())
-                raise HTTPException(status_code=400, detail=f"Failed to insert bookmark: {str(insert_error)}")
-        except Exception as query_error:
-            print(f"Error querying existing bookmarks: {str(query_error)}")
-            print(traceback.format_exc())
-            # Try direct insert as fallback
-            try:
-                resp = supabase.table("bookmarks").insert({
-                    "profile_id": user_id,
-                    "job_id": bm.job_id
-                }).execute()
-                return resp.data[0] if resp.data and len(resp.data) > 0 else {"message": "Inserted but no data returned"}
-            except Exception as fallback_error:
-                print(f"Fallback insert failed: {str(fallback_error)}")
-                print(traceback.format_exc())
-                raise HTTPException(status_code=400, detail=f"Failed to insert bookmark: {str(fallback_error)}")
-    except Exception as e:
-        print(f"Unhandled error in bookmark endpoint: {str(e)}")
-        print(traceback.format_exc())
-        raise HTTPException(status_code=400, detail=str(e))
+            sw = SwipeIn(**item)
+        except ValidationError as e:
+            results.append({"index": i, "job_id": item.get("job_id"), "status": "invalid", "error": str(e)})
+            continue
+        key = (sw.profile_id, sw.job_id)
+        if key in latest:
+            results[latest[key]]["status"] = "superseded"
+        latest[key] = i
+        results.append({"index": i, "job_id": sw.job_id, "status": "pending",
+                        "row": {"user_id": sw.profile_id, "job_id": sw.job_id, "direction": sw.direction}})
 
-@app.post("/applications", status_code=status.HTTP_201_CREATED)
-def apply(apply_in: ApplicationIn) -> Dict[str, Any]:
-    """Insert an application record."""
-    try:
-        user_id = get_user_id(apply_in.profile_id)
-        payload = {
-            "profile_id": user_id,
-            "job_id": apply_in.job_id,
-            "cover_letter": apply_in.cover_letter,
-            "status": "applying"
-        }
-        
-        # Check if application already exists
-        print(f"Checking if application already exists: profile_id={user_id}, job_id={apply_in.job_id}")
+    rows = [results[i]["row"] for i in latest.values()]
+    ids: Dict[tuple, Any] = {}
+    errors: Dict[tuple, str] = {}  # _swipe_key(row) -> why that swipe was not written
+    if swipe_queue:
         try:
-            existing = supabase.table("applications").select("id").eq("profile_id", user_id).eq("job_id", apply_in.job_id).execute()
-            
-            if existing.data and len(existing.data) > 0:
-                # Application already exists, return success
-                app_id = existing.data[0]["id"]
-                print(f"Application already exists with ID {app_id}")
-                return existing.data[0]
-            
-            # No existing application, insert new one
-            print(f"No existing application found, inserting new record")
-            try:
-                resp = supabase.table("applications").insert(payload).execute()
-                
-                print(f"Insert response: {resp.data}")
-                return resp.data[0] if resp.data and len(resp.data) > 0 else {"message": "Inserted but no data returned"}
-            except Exception as insert_error:
-                print(f"Error inserting application: {str(insert_error)}")
-                print(traceback.format_exc())
-                raise HTTPException(status_code=400, detail=f"Failed to insert application: {str(insert_error)}")
-        except Exception as query_error:
-            print(f"Error querying existing applications: {str(query_error)}")
-            print(traceback.format_exc())
-            # Try direct insert as fallback
-            try:
-                resp = supabase.table("applications").insert(payload).execute()
-                return resp.data[0] if resp.data and len(resp.data) > 0 else {"message": "Inserted but no data returned"}
-            except Exception as fallback_error:
-                print(f"Fallback insert failed: {str(fallback_error)}")
-                print(traceback.format_exc())
-                raise HTTPException(status_code=400, detail=f"Failed to insert application: {str(fallback_error)}")
-    except Exception as e:
-        print(f"Unhandled error in apply endpoint: {str(e)}")
-        print(traceback.format_exc())
-        raise HTTPException(status_code=400, detail=str(e))
+            await swipe_queue.submit(rows)
+        except Exception as e:
+            print(f"Error appending swipe batch to the log: {str(e)}")
+            errors = {_swipe_key(row): str(e) for row in rows}
+    else:
+        try:
+            stored = await upsert_many("swipes", rows, "user_id,job_id")
+        except Exception as e:
+            # One bad row fails the whole statement, so retry each row on its own
+            print(f"⚠️ Swipe batch upsert of {len(rows)} rows failed ({e}), retrying row by row")
+            outcomes = await asyncio.gather(
+                *(upsert_returning("swipes", row, "user_id,job_id") for row in rows), return_exceptions=True)
+            stored = []
+            for row, outcome in zip(rows, outcomes):
+                if isinstance(outcome, Exception):
+                    print(f"❌ Error saving swipe on job {row['job_id']}: {str(outcome)}")
+                    errors[_swipe_key(row)] = str(outcome)
+                else:
+                    stored.append(outcome)
+        ids = {_swipe_key(r): r.get("id") for r in stored}
+    if unseen_feed:
+        for user_id, job_id in latest:
+            if (user_id, str(job_id)) not in errors:
+                unseen_feed.mark_seen(user_id, [job_id])
+
+    for result in results:
+        row = result.pop("row", None)
+        if result["status"] != "pending":
+            continue
+        key = _swipe_key(row)
+        if key in errors:
+            result.update(status="failed", error=errors[key])
+        elif swipe_queue:
+            result.update(status="queued", direction=row["direction"])
+        else:
+            result.update(status="saved", id=ids.get(key), direction=row["direction"])
+
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {"received": len(items), "written": len(rows) - len(errors),
+            "counts": counts, "results": results}
+
+def _swipe_key(row: Dict[str, Any]) -> tuple:
+    return str(row.get("user_id")), str(row.get("job_id"))
+
+@app.post("/bookmarks", status_code=status.HTTP_201_CREATED)
+async def bookmark(bm: BookmarkIn) -> Dict[str, Any]:
+    """Bookmark a job; bookmarking it again returns the existing bookmark."""
+    user_id = get_user_id(bm.profile_id)
+    row = {"profile_id": user_id, "job_id": bm.job_id}
+    return await _save("bookmarks", row, "profile_id,job_id", "bookmark")
+
+@app.post("/applications", status_code=status.HTTP_201_CREATED)
+async def apply(apply_in: ApplicationIn) -> Dict[str, Any]:
+    """Create an application ('applying' by column default); re-applying keeps its status."""
+    user_id = get_user_id(apply_in.profile_id)
+    row = {"profile_id": user_id, "job_id": apply_in.job_id}
+    if apply_in.cover_letter is not None:
+        row["cover_letter"] = apply_in.cover_letter
+    return await _save("applications", row, "profile_id,job_id", "application")
 
 @app.post("/matches", status_code=status.HTTP_201_CREATED)
-def save_match(apply_in: ApplicationIn) -> Dict[str, Any]:
-    """Insert a match record for backwards compatibility."""
-    try:
-        user_id = get_user_id(apply_in.profile_id)
-        payload = {
-            "profile_id": user_id,
-            "job_id": apply_in.job_id,
-            "status": "applying",
-            "created_at": "now()"
-        }
-        
-        # Check if a match already exists
-        print(f"Checking if match already exists: profile_id={user_id}, job_id={apply_in.job_id}")
-        try:
-            existing = supabase.table("matches").select("id").eq("profile_id", user_id).eq("job_id", apply_in.job_id).execute()
-            
-            if existing.data and len(existing.data) > 0:
-                # Match already exists, return success
-                match_id = existing.data[0]["id"]
-                print(f"Match already exists with ID {match_id}")
-                return existing.data[0]
-            
-            # No existing match, insert new one
-            print(f"No existing match found, inserting new record")
-            try:
-                resp = supabase.table("matches").insert(payload).execute()
-                
-                print(f"Insert response: {resp.data}")
-                return resp.data[0] if resp.data and len(resp.data) > 0 else {"message": "Inserted but no data returned"}
-            except Exception as insert_error:
-                print(f"Error inserting match: {str(insert_error)}")
-                print(traceback.format_exc())
-                raise HTTPException(status_code=400, detail=f"Failed to insert match: {str(insert_error)}")
-        except Exception as query_error:
-            print(f"Error querying existing matches: {str(query_error)}")
-            print(traceback.format_exc())
-            # Try direct insert as fallback
-            try:
-                resp = supabase.table("matches").insert(payload).execute()
-                return resp.data[0] if resp.data and len(resp.data) > 0 else {"message": "Inserted but no data returned"}
-            except Exception as fallback_error:
-                print(f"Fallback insert failed: {str(fallback_error)}")
-                print(traceback.format_exc())
-                raise HTTPException(status_code=400, detail=f"Failed to insert match: {str(fallback_error)}")
-    except Exception as e:
-        print(f"Unhandled error in save_match endpoint: {str(e)}")
-        print(traceback.format_exc())
-        raise HTTPException(status_code=400, detail=str(e))
+async def save_match(apply_in: ApplicationIn) -> Dict[str, Any]:
+    """Create a match record for backwards compatibility; repeats return the existing one."""
+    user_id = get_user_id(apply_in.profile_id)
+    row = {"profile_id": user_id, "job_id": apply_in.job_id}
+    return await _save("matches", row, "profile_id,job_id", "match")
 
 # Add a health check endpoint
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
+    health: Dict[str, Any] = {"status": "ok", "catalogue_cache": catalogue_cache.stats()}
+    if swipe_queue:
+        health["swipe_queue"] = swipe_queue.stats()
+    if unseen_feed:
+        health["unseen_feed"] = unseen_feed.stats()
+    return health
 
 app.include_router(jobs_router)
 app.include_router(schema_router)
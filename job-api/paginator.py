@@ -0,0 +1,108 @@
+# paginator.py - Concurrent multi-page fetching for paginated job feeds
+#
+# Pages are requested concurrently (a sliding window of `concurrency` pages,
+# plus a per-source rate limit) but consumed strictly in page order, so we can
+# stop as soon as a page brings no external_ids we have not already seen. A
+# page is only requested once an earlier one has been emitted, so at most
+# `concurrency` pages are requested or held at once. A page that was read but
+# not emitted (past the stop, or the walk failed) is handed to `discard`, so
+# its HTTP validators are not remembered.
+import time
+import asyncio
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+# fetch_page(page_number) → jobs on that page, or None if the page is unchanged
+PageFetcher = Callable[[int], Awaitable[Optional[List[Dict[str, Any]]]]]
+# emit(job) → hands one job to the ingest pipeline
+Emit = Callable[[Dict[str, Any]], Awaitable[None]]
+# discard(pages) → forget what was cached while reading these pages
+Discard = Callable[[List[int]], None]
+
+class RateLimiter:
+    """Space request starts at least 1/rate seconds apart (rate <= 0 disables it)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+async def fetch_pages(
+    fetch_page: PageFetcher,
+    emit: Emit,
+    max_pages: int,
+    concurrency: int = 4,
+    rate_limit: float = 0,
+    label: str = "feed",
+    discard: Optional[Discard] = None,
+) -> Optional[int]:
+    """Fetch pages 1..max_pages and emit their jobs in page order.
+
+    Stops early at the first page that is empty, unchanged or contains only
+    external_ids already seen on earlier pages; requests for later pages are
+    cancelled. Returns the number of jobs emitted, or None if the first page
+    itself is unchanged.
+
+    `discard` is called with the requested pages whose jobs were not emitted;
+    if a page failed (or the walk itself raised or was cancelled), with every
+    requested page, since a 304 on page 1 next time would skip the pages this
+    run never got.
+    """
+    window = max(1, concurrency)
+    last_page = max(1, max_pages)
+    limiter = RateLimiter(rate_limit)
+    tasks: Dict[int, asyncio.Task] = {}  # requested pages not yet consumed
+    requested: List[int] = []
+    emitted_pages = set()
+    complete = False
+
+    async def run(page: int) -> Optional[List[Dict[str, Any]]]:
+        await limiter.wait()
+        return await fetch_page(page)
+
+    emitted = 0
+    seen = set()
+    try:
+        for page in range(1, last_page + 1):
+            for ahead in range(page + len(tasks), min(page + window, last_page + 1)):
+                tasks[ahead] = asyncio.create_task(run(ahead))
+                requested.append(ahead)
+            task = tasks.pop(page)
+            try:
+                result = await task
+            except Exception as e:
+                if page == 1:
+                    raise
+                print(f"⚠️ {label}: page {page} failed ({e}), keeping {emitted} jobs from earlier pages")
+                return emitted
+            if result is None and page == 1:
+                return None
+            fresh = [job for job in result or [] if job.get("external_id") not in seen]
+            if not fresh:
+                print(f"⏹️ {label}: stopping at page {page}, no new jobs")
+                break
+            seen.update(job.get("external_id") for job in fresh)
+            for job in fresh:
+                await emit(job)
+            emitted += len(fresh)
+            emitted_pages.add(page)
+        else:
+            print(f"📄 {label}: reached page limit ({max_pages})")
+        complete = True
+    finally:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        unused = [page for page in requested if not complete or page not in emitted_pages]
+        if discard and unused:
+            discard(unused)
+    return emitted
@@ -0,0 +1,187 @@
+# sources.py - Registry of upstream job sources
+#
+# Every fetcher registers itself with its own timeout, page concurrency, rate
+# limit, retry/backoff policy, circuit breaker and schedule interval. Ingestion
+# iterates the registry, so adding a source is a matter of decorating a new
+# fetcher with @register_source.
+import time
+import asyncio
+import threading
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+import httpx
+
+# fetch(client, emit, cache=...) → number of jobs emitted, or None if the feed is unchanged
+Fetcher = Callable[..., Awaitable[Optional[int]]]
+# emit(job) → hands one raw job to the ingest pipeline as soon as it is decoded
+Emit = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class CircuitBreaker:
+    """Skip a source after `failure_threshold` consecutive failed runs.
+
+    Once `reset_timeout` seconds have passed, one trial run is allowed through
+    (half-open); it closes the breaker on success and reopens it on failure.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 15 * 60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+class JobSource:
+    """An upstream job feed plus the policies used when fetching it"""
+
+    def __init__(
+        self,
+        name: str,
+        label: str,
+        fetch: Fetcher,
+        timeout: float = 20,
+        concurrency: int = 4,
+        rate_limit: float = 0,
+        pages: int = 1,
+        retries: int = 1,
+        backoff: float = 1.0,
+        failure_threshold: int = 3,
+        reset_timeout: float = 15 * 60,
+        interval: int = 60 * 60,
+    ):
+        self.name = name
+        self.label = label
+        self.fetch = fetch
+        self.timeout = timeout          # wall-clock budget for one attempt, all pages and emits included
+        self.concurrency = concurrency  # concurrent page requests
+        self.rate_limit = rate_limit    # requests/second, 0 = unlimited
+        self.pages = pages
+        self.retries = retries
+        self.backoff = backoff          # seconds, doubled after each failed attempt
+        self.interval = interval        # default seconds between scheduled runs
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._lock = threading.Lock()
+        self._stats = {
+            "runs": 0,
+            "successes": 0,
+            "failures": 0,
+            "attempt_errors": 0,
+            "skipped_open_circuit": 0,
+            "not_modified": 0,
+            "last_jobs": None,
+            "last_latency": None,
+            "total_latency": 0.0,
+            "last_error": None,
+            "last_run_at": None,
+        }
+
+    def _record(self, **updates: Any) -> None:
+        with self._lock:
+            for key, value in updates.items():
+                if key in ("runs", "successes", "failures", "attempt_errors",
+                           "skipped_open_circuit", "not_modified", "total_latency"):
+                    self._stats[key] += value
+                else:
+                    self._stats[key] = value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        finished = stats["successes"] + stats["failures"]
+        total_latency = stats.pop("total_latency")
+        stats["avg_latency"] = round(total_latency / finished, 4) if finished else None
+        stats["error_rate"] = round(stats["failures"] / finished, 4) if finished else None
+        stats["circuit"] = self.breaker.state
+        stats["consecutive_failures"] = self.breaker.failures
+        return stats
+
+    async def run(self, client: httpx.AsyncClient, emit: Emit, **kwargs: Any) -> Optional[int]:
+        """Fetch this source under its timeout, retry and circuit breaker policies.
+
+        Returns 0 without any request while the breaker is open, and raises the
+        last error once all attempts have failed. An attempt that already
+        emitted jobs is not retried, so no job is emitted twice.
+        """
+        if not self.breaker.allow():
+            print(f"⛔ {self.label}: circuit open after {self.breaker.failures} failures, skipping")
+            self._record(skipped_open_circuit=1)
+            return 0
+
+        emitted = 0
+
+        async def counted_emit(job: Dict[str, Any]) -> None:
+            nonlocal emitted
+            emitted += 1
+            await emit(job)
+
+        self._record(runs=1, last_run_at=time.time())
+        started = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            try:
+                result = await asyncio.wait_for(self.fetch(client, counted_emit, **kwargs), timeout=self.timeout)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+                self._record(attempt_errors=1, last_error=error)
+                if attempt < self.retries and not emitted:
+                    delay = self.backoff * (2 ** attempt)
+                    print(f"⚠️ {self.label}: attempt {attempt + 1} failed ({error}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                latency = time.perf_counter() - started
+                self.breaker.record_failure()
+                self._record(failures=1, last_latency=round(latency, 4), total_latency=latency)
+                raise
+            latency = time.perf_counter() - started
+            self.breaker.record_success()
+            self._record(
+                successes=1,
+                not_modified=1 if result is None else 0,
+                last_jobs=result,
+                last_latency=round(latency, 4),
+                total_latency=latency,
+            )
+            return result
+
+# ── Registry ──────────────────────────────────────────────────
+SOURCES: Dict[str, JobSource] = {}
+
+def register_source(name: str, label: str, **options: Any) -> Callable[[Fetcher], Fetcher]:
+    """Decorator registering a fetcher under `name`; options are JobSource settings"""
+    def decorator(fetch: Fetcher) -> Fetcher:
+        SOURCES[name] = JobSource(name, label, fetch, **options)
+        return fetch
+    return decorator
+
+def get_source(name: str) -> JobSource:
+    return SOURCES[name]
+
+def resolve_sources(sources: Optional[List[str]] = None) -> List[str]:
+    """Validate source names, defaulting to every registered source"""
+    if not sources:
+        return list(SOURCES)
+    unknown = [name for name in sources if name not in SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown job source(s): {', '.join(unknown)}")
+    return list(dict.fromkeys(sources))
+
+def source_stats() -> Dict[str, Dict[str, Any]]:
+    """Latency, error and circuit breaker stats for every registered source"""
+    return {name: source.stats() for name, source in SOURCES.items()}
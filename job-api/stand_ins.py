@@ -0,0 +1,386 @@
+# stand_ins.py - Local stand-ins for the job API's upstreams
+#
+# Shared by benchmarks.py and the tests, so neither needs Supabase or the
+# real job feeds:
+#   FeedHandler            Arbeitnow-style paginated feed (serve with start_stub_server)
+#   PostgrestHandler       PostgREST with the tables, RPCs and unique indexes the API uses
+#   start_postgrest_stand_in  runs it in its own process; app_against points db and main at it
+import os
+import re
+import json
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from typing import List, Dict, Any, Optional, Tuple
+
+# ── Stub feed server ──────────────────────────────────────────
+class FeedHandler(BaseHTTPRequestHandler):
+    """Arbeitnow-style paginated feed: ?page=N returns `per_page` jobs until `pages` runs out
+
+    With `etags` set each page sends an ETag and answers a matching
+    If-None-Match with 304; `failures[page]` is how many more requests for that
+    page get a 500.
+    """
+    latency = 0.1
+    pages = 8
+    per_page = 50
+    etags = False
+    failures: Dict[int, int] = {}
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        page = int(query.get("page", ["1"])[0])
+        time.sleep(self.latency)
+        if self.failures.get(page):
+            self.failures[page] -= 1
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        etag = f'"page-{page}"'
+        if self.etags and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        data = []
+        if page <= self.pages:
+            data = [{"slug": f"job-{page}-{i}", "title": f"Engineer {page}.{i}"}
+                    for i in range(self.per_page)]
+        body = json.dumps({"data": data}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.etags:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def start_stub_server(handler: type) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# ── PostgREST stand-in ────────────────────────────────────────
+def _unique_indexes() -> Dict[str, Tuple[str, Tuple[str, ...]]]:
+    """table -> (index name, columns) for each CREATE UNIQUE INDEX in idempotent_writes.sql"""
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "idempotent_writes.sql")) as f:
+        sql = f.read()
+    return {table: (name, tuple(c.strip() for c in columns.split(",")))
+            for name, table, columns in re.findall(
+                r"CREATE UNIQUE INDEX IF NOT EXISTS (\w+) ON public\.(\w+) \(([^)]*)\)", sql)}
+
+UNIQUE_INDEXES = _unique_indexes()
+INTEGER_COLUMNS = ("job_id",)  # swipes/bookmarks/applications/matches.job_id reference jobs.id
+
+class PostgrestHandler(BaseHTTPRequestHandler):
+    """PostgREST stand-in with `latency` seconds per request.
+
+    GET /rest/v1/<table> returns the table's stored rows (eq./gt. filters,
+    select and limit applied); until something is written to `jobs` it serves
+    `rows` synthetic job rows, paged by id or by a keyset cursor. `matches`
+    serves `rows` synthetic applications of one user with their jobs embedded.
+    POST inserts, or merges on the `on_conflict` columns like ON CONFLICT DO
+    UPDATE, and returns the stored rows. Tables with a unique index in
+    idempotent_writes.sql enforce it the way Postgres would: a write that hits
+    an existing key without on_conflict=<index columns> and
+    Prefer: resolution=merge-duplicates is refused with 23505, and a job_id
+    that is not an integer with 22P02 (22003 if out of range). POST /rpc/unseen_jobs_page anti-joins
+    the job rows against the user's swipes; POST /rpc/transition_applications
+    moves synthetic applications and appends application_status_history rows;
+    a new `matches` row gets its initial history row, as the trigger adds it.
+    GET /__stats reports the request count and row counts per table.
+    """
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients can reuse connections
+    disable_nagle_algorithm = True
+    latency = 0.02
+    rows = 20
+    tables: Dict[str, List[Dict[str, Any]]] = {}
+    keyed: Dict[tuple, Dict[str, Any]] = {}  # (table, conflict columns, values) -> row
+    statuses: Dict[int, str] = {}  # synthetic application id -> status set by a transition
+    requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/__stats":
+            with self.lock:
+                self._send({"requests": self.requests,
+                            "tables": {name: len(rows) for name, rows in self.tables.items()}})
+            return
+        self._count()
+        time.sleep(self.latency)
+        table = url.path.rsplit("/", 1)[-1]
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        limit = int(query.pop("limit", 10**9))
+        select = query.pop("select", "*")
+        order = query.pop("order", "")
+        query.pop("offset", None)
+        with self.lock:
+            stored = self.tables.get(table)
+            if stored is not None:
+                rows = [dict(r) for r in stored
+                        if all(self._match(r.get(col), cond) for col, cond in query.items())]
+        if stored is None and table == "jobs":
+            rows = self._job_page(query, order, limit)
+        elif stored is None and table == "matches":
+            self._send(self._application_page(query, order, limit, select))
+            return
+        elif stored is None:
+            rows = []
+        self._send(self._select(rows[:limit], select))
+
+    def _job_page(self, query: Dict[str, str], order: str, limit: int) -> List[Dict[str, Any]]:
+        """Synthetic job rows 0..rows-1 (created_at rises with id): keyset on id=gt.N or a cursor"""
+        if order.startswith("created_at.desc"):
+            # or=(created_at.lt."...",and(created_at.eq."...",id.lt.N)) from keyset.below_cursor
+            below = self.rows
+            if "or" in query:
+                below = int(query["or"].rsplit("id.lt.", 1)[1].rstrip("))"))
+            return [self._job(i) for i in range(below - 1, max(-1, below - 1 - limit), -1)]
+        start = int(query["id"][3:]) + 1 if query.get("id", "").startswith("gt.") else 0
+        return [self._job(i) for i in range(start, min(self.rows, start + limit))]
+
+    @staticmethod
+    def _job(i: int) -> Dict[str, Any]:
+        return {"id": i, "title": f"Engineer {i}", "company": "Acme", "location": "Remote",
+                "salary": "Competitive", "logo": "https://x/logo.png", "source": "stub",
+                "external_id": str(i), "created_at": f"2025-01-01T00:00:00.{i:06d}+00:00",
+                "apply_url": f"https://x/jobs/{i}", "description": "Build things with a great team. " * 30}
+
+    @staticmethod
+    def _application(i: int) -> Dict[str, Any]:
+        """Application i (job i); every 10th changed status after all were created"""
+        base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        created = base + timedelta(seconds=i)
+        updated = base + timedelta(seconds=PostgrestHandler.rows + i) if i % 10 == 0 else created
+        return {"id": i, "job_id": i, "profile_id": "bench-user",
+                "status": PostgrestHandler.statuses.get(i) or ("applying", "interview", "rejected", "offer")[i % 4],
+                "created_at": created.isoformat(), "updated_at": updated.isoformat(),
+                "cover_letter": "Dear hiring manager, " * 20, "metadata": {}}
+
+    def _application_page(self, query: Dict[str, str], order: str, limit: int,
+                          select: str) -> List[Dict[str, Any]]:
+        column, _, direction = (order or "id").split(",")[0].partition(".")
+        desc = direction.startswith("desc")
+        rows = sorted((self._application(i) for i in range(self.rows)),
+                      key=lambda r: (r[column], r["id"]), reverse=desc)
+        past = query.pop("or", None)
+        if past:
+            # or=(col.lt."v",and(col.eq."v",id.lt.N)) from keyset.below_cursor
+            value = past.split('"')[1]
+            row_id = int(past.rsplit(".", 1)[1].rstrip("))"))
+            rows = [r for r in rows if ((r[column], r["id"]) < (value, row_id)) == desc
+                    and (r[column], r["id"]) != (value, row_id)]
+        rows = [r for r in rows if all(self._match(r.get(col), cond) for col, cond in query.items())]
+        return [self._embed(r, select) for r in rows[:limit]]
+
+    @classmethod
+    def _embed(cls, row: Dict[str, Any], select: str) -> Dict[str, Any]:
+        """select=a,alias:b,alias:fk(cols) with fk embedding the job row"""
+        out: Dict[str, Any] = {}
+        for item in re.findall(r"[^,(]+(?:\([^)]*\))?", re.sub(r"\s+", "", select)):
+            name, _, inner = item.partition("(")
+            alias, _, column = name.rpartition(":")
+            if inner:
+                out[alias or column] = cls._embed(cls._job(row[column]), inner.rstrip(")"))
+            elif column == "*":
+                out.update(row)
+            else:
+                out[alias or column] = row.get(column)
+        return out
+
+    @staticmethod
+    def _select(rows: List[Dict[str, Any]], select: str) -> List[Dict[str, Any]]:
+        if select == "*":
+            return rows
+        columns = select.split(",")
+        return [{c: r.get(c) for c in columns} for r in rows]
+
+    @staticmethod
+    def _match(value: Any, cond: str) -> bool:
+        op, _, arg = cond.partition(".")
+        if op == "eq":
+            return str(value) == arg
+        if op == "gt":
+            return value is not None and float(value) > float(arg)
+        if op == "in":
+            return str(value) in arg.strip("()").split(",")
+        if op in ("gte", "lte"):
+            arg = arg.strip('"')
+            return value is not None and (value >= arg if op == "gte" else value <= arg)
+        return True
+
+    def _unseen_jobs_page(self, args: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """The unseen_jobs_page RPC: newest jobs without a swipe by the user, below the cursor"""
+        with self.lock:
+            seen = {str(r.get("job_id")) for r in self.tables.get("swipes", [])
+                    if r.get("user_id") == args["_user_id"]}
+        below = self.rows if args.get("_before_id") is None else args["_before_id"]
+        jobs = []
+        for i in range(below - 1, -1, -1):
+            if len(jobs) >= args["_limit"]:
+                break
+            if str(i) not in seen:
+                jobs.append(self._job(i))
+        return jobs
+
+    def _transition_applications(self, args: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """The transition_applications RPC over the synthetic applications, appending history"""
+        out = []
+        with self.lock:
+            history = self.tables.setdefault("application_status_history", [])
+            for i in sorted(set(args["_ids"])):
+                if not 0 <= i < self.rows or args["_profile_id"] != "bench-user":
+                    continue
+                current = self._application(i)["status"]
+                moved = current != args["_status"] and current in (args.get("_from_status") or [current])
+                if moved:
+                    self.statuses[i] = args["_status"]
+                    history.append({"match_id": i, "from_status": current, "to_status": args["_status"]})
+                out.append({"id": i, "status": args["_status"] if moved else current,
+                            "from_status": current, "changed": moved, "updated_at": None})
+        return out
+
+    def do_POST(self):
+        self._count()
+        url = urlparse(self.path)
+        table = url.path.rsplit("/", 1)[-1]
+        keys = [k for k in parse_qs(url.query).get("on_conflict", [""])[0].split(",") if k]
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        time.sleep(self.latency)
+        if url.path.endswith("/rpc/transition_applications"):
+            self._send(self._transition_applications(payload))
+            return
+        if "/rpc/" in url.path:
+            select = parse_qs(url.query).get("select", ["*"])[0]
+            self._send(self._select(self._unseen_jobs_page(payload), select))
+            return
+        payload = payload if isinstance(payload, list) else [payload]
+        prefer = self.headers.get("Prefer", "")
+        merge = "resolution=merge-duplicates" in prefer
+        stored = []
+        with self.lock:
+            error = self._constraint_error(table, payload, keys, merge)
+            if error is None:
+                rows = self.tables.setdefault(table, [])
+                index = UNIQUE_INDEXES[table][1] if table in UNIQUE_INDEXES else tuple(keys)
+                for row in payload:
+                    row = self._coerce(table, row)
+                    key = (table, index, tuple(row.get(k) for k in index))
+                    match = self.keyed.get(key) if index else None
+                    created = match is None
+                    if created:
+                        match = {"id": len(rows) + 1, **({"status": "applying"} if table == "matches" else {})}
+                        rows.append(match)
+                        if index:
+                            self.keyed[key] = match
+                    elif not merge:
+                        continue  # resolution=ignore-duplicates
+                    match.update(row)
+                    stored.append(dict(match))
+                    if created and table == "matches":
+                        self.tables.setdefault("application_status_history", []).append(
+                            {"match_id": match["id"], "from_status": None, "to_status": match["status"]})
+        if error is not None:
+            self._send(error[1], error[0])
+            return
+        self._send(stored, 201)
+
+    @staticmethod
+    def _coerce(table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        if table not in UNIQUE_INDEXES:
+            return row
+        return {k: int(v) if k in INTEGER_COLUMNS and v is not None else v for k, v in row.items()}
+
+    def _constraint_error(self, table: str, payload: List[Dict[str, Any]], keys: List[str],
+                          merge: bool) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """(status, PostgREST error body) for a write Postgres would refuse, else None; call under the lock"""
+        if table not in UNIQUE_INDEXES:
+            return None
+        name, index = UNIQUE_INDEXES[table]
+        if keys and tuple(keys) != index:
+            return 400, {"code": "42P10", "message": "there is no unique or exclusion constraint "
+                                                     "matching the ON CONFLICT specification"}
+        upsert = bool(keys) and ("resolution=" in self.headers.get("Prefer", ""))
+        batch = set()
+        for row in payload:
+            for column in INTEGER_COLUMNS:
+                value = row.get(column)
+                if value is not None and not re.fullmatch(r"-?\d+", str(value)):
+                    return 400, {"code": "22P02", "message": f'invalid input syntax for type integer: "{value}"'}
+                if value is not None and not -2**31 <= int(value) < 2**31:
+                    return 400, {"code": "22003", "message": f'value "{value}" is out of range for type integer'}
+            key = (table, index, tuple(self._coerce(table, row).get(k) for k in index))
+            if key in batch and upsert and merge:
+                return 500, {"code": "21000", "message": "ON CONFLICT DO UPDATE command cannot affect row a second time"}
+            if (key in batch or key in self.keyed) and not upsert:
+                return 409, {"code": "23505", "message": f'duplicate key value violates unique constraint "{name}"'}
+            batch.add(key)
+        return None
+
+    def _count(self) -> None:
+        with self.lock:
+            type(self).requests += 1
+
+    def _send(self, data: Any, status: int = 200) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class PostgrestServer(ThreadingHTTPServer):
+    request_queue_size = 1024
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # clients dropping keep-alive connections at shutdown
+
+def _serve_postgrest(port, latency: float, rows: int) -> None:
+    PostgrestHandler.latency = latency
+    PostgrestHandler.rows = rows
+    server = PostgrestServer(("127.0.0.1", 0), PostgrestHandler)
+    port.put(server.server_address[1])
+    server.serve_forever()
+
+def start_postgrest_stand_in(latency: float, rows: int = 20):
+    """Run the stand-in in its own process so it does not compete with the app for the GIL"""
+    import multiprocessing
+
+    port = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve_postgrest, args=(port, latency, rows), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{port.get(timeout=10)}"
+
+def app_against(base_url: str):
+    """Import the API with its shared data layer pointed at the stand-in.
+
+    Call this before importing main or anything that imports db: without a
+    .env, supabase_client refuses to import and db() has no key.
+    """
+    os.environ["SUPABASE_URL"] = base_url
+    os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.bench")
+    import db
+    from main import app
+
+    # db may have been imported before, with other settings
+    db.SUPABASE_URL = base_url
+    db.SUPABASE_KEY = os.environ["SUPABASE_KEY"]
+    return db, app
+
+def plain_request(headers: Optional[Dict[str, str]] = None):
+    """A bare GET request for calling route handlers directly"""
+    from fastapi import Request
+
+    raw = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": raw})
+
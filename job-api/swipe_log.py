@@ -0,0 +1,363 @@
+# swipe_log.py - Write-behind queue for swipes, backed by a durable local log
+#
+# With SWIPE_WRITE_BEHIND=1, /swipe appends the swipe to an append-only log,
+# waits for the next batched fsync and answers; a background flusher drains
+# the log into the swipes table with bulk upserts. Records that never reached
+# the database are replayed on start-up.
+#
+# Log format: one record per line, b"<crc32 as 8 hex digits> <json>\n".
+# Replay stops at the first line that is incomplete or fails its checksum (a
+# write torn by a crash) and truncates the file there. "<path>.ckpt" holds the
+# byte offset up to which records are already in the database. Once all
+# records are flushed the log is truncated back to empty; under steady traffic
+# it is compacted instead: when the flushed prefix passes SWIPE_LOG_COMPACT_BYTES
+# and is longer than the unflushed tail, the tail is copied to a new file that
+# replaces the log. "<path>.lock" keeps a second process out.
+#
+# A batch the database refuses (a bad row fails the whole statement) is
+# retried row by row; rows it still refuses go to "<path>.dead", one JSON
+# object per line, instead of blocking the queue. If the database cannot be
+# reached at all, the batch stays in the log and is retried with backoff.
+import os
+import json
+import time
+import zlib
+import fcntl
+import asyncio
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+from postgrest.exceptions import APIError
+
+from db import upsert_many, upsert_returning
+
+SWIPE_WRITE_BEHIND = os.getenv("SWIPE_WRITE_BEHIND", "").lower() in ("1", "true", "yes")
+SWIPE_LOG_PATH = os.getenv(
+    "SWIPE_LOG_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".swipe_log"),
+)
+# How long an fsync waits to collect more appends (s); acks wait at most this plus the fsync
+SWIPE_FSYNC_INTERVAL = float(os.getenv("SWIPE_FSYNC_INTERVAL", "0.005"))
+SWIPE_FLUSH_INTERVAL = float(os.getenv("SWIPE_FLUSH_INTERVAL", "0.5"))
+SWIPE_FLUSH_BATCH = int(os.getenv("SWIPE_FLUSH_BATCH", "500"))
+SWIPE_LOG_COMPACT_BYTES = int(os.getenv("SWIPE_LOG_COMPACT_BYTES", str(1 << 20)))
+MAX_FLUSH_BACKOFF = 30.0
+
+Entry = Tuple[int, Dict[str, Any]]  # (log offset just past the record, swipe row)
+
+def encode_record(row: Dict[str, Any]) -> bytes:
+    body = json.dumps(row, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(body), body)
+
+def decode_records(data: bytes) -> Tuple[List[Entry], int]:
+    """Parse log bytes; returns the intact records and the length of the intact prefix"""
+    entries: List[Entry] = []
+    pos = 0
+    while pos < len(data):
+        end = data.find(b"\n", pos)
+        if end < 0:
+            break
+        line = data[pos:end]
+        try:
+            crc, body = line[:8], line[9:]
+            if line[8:9] != b" " or int(crc, 16) != zlib.crc32(body):
+                break
+            row = json.loads(body)
+        except ValueError:
+            break
+        pos = end + 1
+        entries.append((pos, row))
+    return entries, pos
+
+class SwipeLog:
+    """Append-only record file plus a flushed-offset checkpoint (file I/O only, no asyncio)"""
+
+    def __init__(self, path: str, compact_bytes: int = SWIPE_LOG_COMPACT_BYTES):
+        self.path = path
+        self.ckpt_path = path + ".ckpt"
+        self.dead_path = path + ".dead"
+        self.compact_bytes = compact_bytes
+        self.size = 0
+        self._file = None
+        self._lock_file = None
+        self._io_lock = threading.Lock()  # sync() runs in a worker thread
+
+    def open(self) -> List[Entry]:
+        """Lock the log, cut any torn tail and return the records not yet flushed"""
+        lock = open(self.path + ".lock", "a+b")
+        try:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            raise RuntimeError(f"Swipe log {self.path} is in use by another process")
+        self._lock_file = lock
+        f = open(self.path, "a+b")
+        f.seek(0)
+        entries, intact = decode_records(f.read())
+        if intact < f.tell():
+            print(f"⚠️ Swipe log: dropping {f.tell() - intact} bytes of torn tail")
+            f.truncate(intact)
+            os.fsync(f.fileno())
+        self._file, self.size = f, intact
+        flushed = self._read_checkpoint()
+        if flushed > intact:
+            # a checkpoint for some other log (this one was removed or replaced by hand)
+            flushed = 0
+        return [e for e in entries if e[0] > flushed]
+
+    def append(self, rows: List[Dict[str, Any]]) -> List[Entry]:
+        entries = []
+        chunks = []
+        for row in rows:
+            record = encode_record(row)
+            self.size += len(record)
+            chunks.append(record)
+            entries.append((self.size, row))
+        self._file.write(b"".join(chunks))
+        return entries
+
+    def sync(self) -> None:
+        with self._io_lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def checkpoint(self, offset: int) -> int:
+        """Record that everything up to `offset` is in the database.
+
+        Returns how many bytes were cut from the front of the log: the offsets
+        of the records still in it move down by that much.
+        """
+        cut = 0
+        if offset >= self.size:
+            with self._io_lock:
+                self._file.truncate(0)
+                os.fsync(self._file.fileno())
+            cut, self.size = self.size, 0
+        elif offset >= self.compact_bytes and offset > self.size - offset:
+            cut = self._compact(offset)
+        self._write_checkpoint(offset - cut)
+        return cut
+
+    def dead_letter(self, rejected: List[Tuple[Dict[str, Any], str]]) -> None:
+        """Append rows the database refused, with its error, to the dead-letter file"""
+        with open(self.dead_path, "ab") as f:
+            for row, error in rejected:
+                f.write(json.dumps({"row": row, "error": error, "at": time.time()}).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+        if self._lock_file:
+            self._lock_file.close()  # releases the lock
+            self._lock_file = None
+
+    def _compact(self, offset: int) -> int:
+        with self._io_lock:
+            self._file.flush()
+            self._file.seek(offset)
+            tail = self._file.read()
+            tmp = self.path + ".compact"
+            with open(tmp, "wb") as f:
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            # The old checkpoint is an offset into the old log; applied to the new
+            # one it would skip unflushed records. Reset it first: a crash before
+            # the swap then only replays records that are already in the database.
+            self._write_checkpoint(0)
+            os.replace(tmp, self.path)
+            old, self._file = self._file, open(self.path, "a+b")
+            old.close()
+        self.size = len(tail)
+        return offset
+
+    def _write_checkpoint(self, offset: int) -> None:
+        tmp = self.ckpt_path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.ckpt_path)
+
+    def _read_checkpoint(self) -> int:
+        try:
+            with open(self.ckpt_path) as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+def _refused(e: Exception) -> bool:
+    """True if the database answered and refused the data (SQLSTATE class 22 or 23)"""
+    return isinstance(e, APIError) and str(e.code or "")[:2] in ("22", "23")
+
+async def write_swipes(rows: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str]]:
+    """Upsert `rows` in one statement, or row by row if the database refuses it.
+
+    Returns the rows the database refused on their own, with its error. Any
+    other failure (the database is unreachable or overloaded) is raised.
+    """
+    try:
+        await upsert_many("swipes", rows, "user_id,job_id")
+        return []
+    except Exception as e:
+        if not _refused(e):
+            raise
+        print(f"⚠️ Swipe log: batch of {len(rows)} refused ({e}), retrying row by row")
+    outcomes = await asyncio.gather(
+        *(upsert_returning("swipes", row, "user_id,job_id") for row in rows), return_exceptions=True)
+    rejected = []
+    for row, outcome in zip(rows, outcomes):
+        if isinstance(outcome, Exception):
+            if not _refused(outcome):
+                raise outcome
+            rejected.append((row, str(outcome)))
+    return rejected
+
+def collapse(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep the last swipe per (user_id, job_id), in order of last occurrence"""
+    latest: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+    for row in rows:
+        key = (row["user_id"], row["job_id"])
+        latest.pop(key, None)
+        latest[key] = row
+    return list(latest.values())
+
+class SwipeWriteBehind:
+    """Acknowledge swipes once they are fsynced locally; flush them to Supabase in batches"""
+
+    def __init__(
+        self,
+        path: str = SWIPE_LOG_PATH,
+        fsync_interval: float = SWIPE_FSYNC_INTERVAL,
+        flush_interval: float = SWIPE_FLUSH_INTERVAL,
+        batch_size: int = SWIPE_FLUSH_BATCH,
+        compact_bytes: int = SWIPE_LOG_COMPACT_BYTES,
+    ):
+        self.log = SwipeLog(path, compact_bytes)
+        self.fsync_interval = fsync_interval
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: List[Entry] = []   # on disk, not yet in the database
+        self._unsynced: List[Entry] = []  # written, waiting for the next fsync
+        self._synced: Optional[asyncio.Future] = None
+        self._tasks: List[asyncio.Task] = []
+        self._closing = False
+        self._stats = {"queued": 0, "replayed": 0, "flushed": 0, "flushes": 0, "dead_lettered": 0,
+                       "compactions": 0, "flush_errors": 0, "last_error": None, "last_flush_at": None}
+
+    async def start(self) -> None:
+        self._pending = self.log.open()
+        self._stats["replayed"] = len(self._pending)
+        if self._pending:
+            print(f"🔁 Swipe log: replaying {len(self._pending)} unflushed swipes")
+        self._sync_needed = asyncio.Event()
+        self._flush_now = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        if self._pending:
+            self._flush_now.set()
+        self._tasks = [asyncio.create_task(self._sync_loop()),
+                       asyncio.create_task(self._flush_loop())]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Sync and flush what is left, stop the background tasks and release the log"""
+        self._closing = True
+        self._sync_needed.set()
+        self._flush_now.set()
+        await asyncio.gather(*self._tasks)
+        self._tasks = []
+        try:
+            while self._pending:
+                await asyncio.wait_for(self.flush(), timeout)
+        except Exception as e:
+            print(f"⚠️ Swipe log: {len(self._pending)} swipes left for replay on next start ({e})")
+        self.log.close()
+
+    async def submit(self, rows: List[Dict[str, Any]]) -> None:
+        """Append swipe rows to the log and return once they are on disk"""
+        if not rows:
+            return
+        self._unsynced.extend(self.log.append(rows))
+        self._stats["queued"] += len(rows)
+        if self._synced is None:
+            self._synced = asyncio.get_running_loop().create_future()
+        synced = self._synced
+        self._sync_needed.set()
+        await asyncio.shield(synced)
+
+    async def flush(self) -> int:
+        """Write the oldest batch of pending swipes to the database; returns rows written"""
+        async with self._flush_lock:
+            batch = self._pending[:self.batch_size]
+            if not batch:
+                return 0
+            rows = collapse([row for _, row in batch])
+            rejected = await write_swipes(rows)
+            if rejected:
+                self.log.dead_letter(rejected)
+                self._stats["dead_lettered"] += len(rejected)
+                print(f"❌ Swipe log: database refused {len(rejected)} swipes, moved to {self.log.dead_path}")
+            del self._pending[:len(batch)]
+            cut = self.log.checkpoint(batch[-1][0])
+            if cut and (self._pending or self._unsynced):
+                self._pending = [(end - cut, row) for end, row in self._pending]
+                self._unsynced = [(end - cut, row) for end, row in self._unsynced]
+                self._stats["compactions"] += 1
+            self._stats["flushed"] += len(batch) - len(rejected)
+            self._stats["flushes"] += 1
+            self._stats["last_flush_at"] = time.time()
+            return len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats, pending=len(self._pending) + len(self._unsynced),
+                    log_bytes=self.log.size)
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await self._sync_needed.wait()
+            if not self._unsynced:
+                self._sync_needed.clear()
+                if self._closing:
+                    return
+                continue
+            if not self._closing:
+                # group commit: let concurrent swipes join this fsync
+                await asyncio.sleep(self.fsync_interval)
+            self._sync_needed.clear()
+            count = len(self._unsynced)
+            synced, self._synced = self._synced, None
+            try:
+                await asyncio.to_thread(self.log.sync)
+            except Exception as e:
+                # the bytes may still reach the disk, so they are flushed like the rest
+                synced.set_exception(e)
+            else:
+                synced.set_result(None)
+            self._pending.extend(self._unsynced[:count])
+            del self._unsynced[:count]
+            if len(self._pending) >= self.batch_size:
+                self._flush_now.set()
+            if self._closing:
+                self._sync_needed.set()
+
+    async def _flush_loop(self) -> None:
+        wait = backoff = self.flush_interval
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            if self._closing:
+                return
+            try:
+                while self._pending:
+                    await self.flush()
+                wait = backoff = self.flush_interval
+            except Exception as e:
+                self._stats["flush_errors"] += 1
+                self._stats["last_error"] = str(e)
+                wait = backoff = min(backoff * 2, MAX_FLUSH_BACKOFF)
+                print(f"⚠️ Swipe log: flush failed, retrying in {backoff:.1f}s: {str(e)}")
@@ -1,7 +1,20 @@
 #!/usr/bin/env python3
 import asyncio
 import httpx
-from job_service import remoteok, arbeitnow, adzuna
+from job_service import get_source
+
+async def fetch_source(client, name):
+    """Fetch one source through the registry, bypassing the conditional-request cache"""
+    jobs = []
+
+    async def collect(job):
+        jobs.append(job)
+
+    try:
+        await get_source(name).run(client, collect, cache=None)
+    except Exception as e:
+        print(f"   ❌ {name} failed: {e}")
+    return jobs
 
 async def test_apis():
     """Test each job API and report on the number of jobs returned"""
@@ -9,19 +22,19 @@ async def test_apis():
     
     async with httpx.AsyncClient() as client:
         print("\n📊 RemoteOK API Test:")
-        remoteok_jobs = await remoteok(client)
+        remoteok_jobs = await fetch_source(client, "remoteok")
         print(f"   Jobs found: {len(remoteok_jobs)}")
         if remoteok_jobs:
             print(f"   Sample job: {remoteok_jobs[0].get('title')} at {remoteok_jobs[0].get('company')}")
         
         print("\n📊 Arbeitnow API Test:")
-        arbeitnow_jobs = await arbeitnow(client)
+        arbeitnow_jobs = await fetch_source(client, "arbeitnow")
         print(f"   Jobs found: {len(arbeitnow_jobs)}")
         if arbeitnow_jobs:
             print(f"   Sample job: {arbeitnow_jobs[0].get('title')} at {arbeitnow_jobs[0].get('company_name')}")
         
         print("\n📊 Adzuna API Test:")
-        adzuna_jobs = await adzuna(client)
+        adzuna_jobs = await fetch_source(client, "adzuna")
         print(f"   Jobs found: {len(adzuna_jobs)}")
         if adzuna_jobs:
             print(f"   Sample job: {adzuna_jobs[0].get('title')} at {adzuna_jobs[0].get('company_display_name')}")
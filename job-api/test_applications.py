@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from keyset import NEXT_CURSOR_HEADER
+from jobs import SYNC_SINCE_HEADER
+
+ROWS = 300  # synthetic applications of "bench-user"; every 10th changed status after all were created
+
+async def _walk(http, params):
+    ids, sync, cursor = [], None, None
+    while True:
+        r = await http.get("/jobs/applications", params=dict(params, **({"cursor": cursor} if cursor else {})))
+        assert r.status_code == 200
+        ids.extend(a["id"] for a in r.json())
+        cursor = r.headers.get(NEXT_CURSOR_HEADER)
+        sync = r.headers.get(SYNC_SINCE_HEADER)
+        if not cursor:
+            return ids, sync
+
+def _client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api")
+
+def test_application_pages_and_sync(postgrest):
+    db, app, _ = postgrest(rows=ROWS)
+    params = {"profile_id": "bench-user", "limit": 50}
+    # the initial sync ends where every row was created; the rest were status changes
+    since = (datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=ROWS)).isoformat()
+
+    async def run():
+        try:
+            async with _client(app) as http:
+                return (await _walk(http, params), await _walk(http, dict(params, status="offer")),
+                        await _walk(http, dict(params, since=since)))
+        finally:
+            await db.close_db()
+
+    (everything, _), (offers, _), (changed, next_since) = asyncio.run(run())
+    assert everything == list(range(ROWS - 1, -1, -1))
+    assert offers == [i for i in everything if i % 4 == 3]
+    assert changed == [i for i in range(ROWS) if i % 10 == 0]
+    assert next_since == (datetime(2025, 1, 1, tzinfo=timezone.utc)
+                          + timedelta(seconds=ROWS + ROWS - 10)).isoformat()
+
+def test_bulk_transition_reports_each_application(postgrest):
+    db, app, base_url = postgrest(rows=ROWS)
+
+    async def run():
+        try:
+            async with _client(app) as http:
+                async def bulk(ids):
+                    r = await http.post("/jobs/applications/status", json={
+                        "profile_id": "bench-user", "status": "archived", "ids": ids})
+                    assert r.status_code == 200
+                    return r.json()["counts"]
+
+                first = await bulk(list(range(100)))
+                again = await bulk(list(range(100)))
+                unknown = await bulk([ROWS, ROWS + 1])
+                r = await http.put("/jobs/applications/100", json={"profile_id": "bench-user", "status": "archived"})
+                assert r.status_code == 200
+                r = await http.put(f"/jobs/applications/{ROWS}", json={"profile_id": "bench-user", "status": "archived"})
+                assert r.status_code == 404
+                # the old request shape: no profile_id, and ids that may not be numbers
+                r = await http.put("/jobs/applications/101", json={"status": "archived"})
+                assert r.status_code == 200 and r.json()["status"] == "archived"
+                r = await http.put("/jobs/applications/3f2b-uuid", json={"status": "archived"})
+                assert r.status_code == 404
+            stats = (await db.db().session.get(f"{base_url}/__stats")).json()
+        finally:
+            await db.close_db()
+        return first, again, unknown, stats
+
+    first, again, unknown, stats = asyncio.run(run())
+    assert first == {"changed": 100}
+    assert again == {"unchanged": 100}
+    assert unknown == {"not_found": 2}
+    assert stats["tables"]["application_status_history"] == 102
+
+def test_default_page_carries_the_job_fields_the_app_shows(postgrest):
+    """Without `limit` a page holds APPLICATION_PAGE_SIZE applications; the app follows X-Next-Cursor"""
+    from jobs import APPLICATION_PAGE_SIZE
+
+    db, app, _ = postgrest(rows=ROWS)
+
+    async def run():
+        try:
+            async with _client(app) as http:
+                first = await http.get("/jobs/applications", params={"profile_id": "bench-user"})
+                return first, await _walk(http, {"profile_id": "bench-user"})
+        finally:
+            await db.close_db()
+
+    first, (everything, _) = asyncio.run(run())
+    body = first.json()
+    assert len(body) == APPLICATION_PAGE_SIZE and first.headers[NEXT_CURSOR_HEADER]
+    assert everything == list(range(ROWS - 1, -1, -1))
+    assert all(a["job_data"]["url"] == f"https://x/jobs/{a['job_id']}" and a["job_data"]["description"]
+               for a in body)
+
+def test_database_error_is_a_server_error():
+    import db
+    import main
+
+    db.SUPABASE_URL = "http://127.0.0.1:9"  # nothing listens there
+
+    async def run():
+        try:
+            async with _client(main.app) as http:
+                return await http.get("/jobs/applications", params={"profile_id": "bench-user"})
+        finally:
+            await db.close_db()
+
+    assert asyncio.run(run()).status_code == 500
+
+def test_new_application_starts_its_status_history(postgrest):
+    db, app, base_url = postgrest()
+
+    async def run():
+        try:
+            async with _client(app) as http:
+                for job_id in ("1", "2", "1"):  # re-applying keeps the application and its history
+                    r = await http.post("/jobs/applications", json={"profile_id": "p1", "job_id": job_id})
+                    assert r.status_code == 200 and r.json()["status"] == "applying"
+            return (await db.db().session.get(f"{base_url}/__stats")).json()
+        finally:
+            await db.close_db()
+
+    stats = asyncio.run(run())
+    assert stats["tables"]["matches"] == 2
+    assert stats["tables"]["application_status_history"] == 2
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+import time
+import asyncio
+
+from catalogue_cache import CatalogueCache
+from json_response import EncodedBody
+from stand_ins import plain_request
+
+def test_page_read_before_an_invalidation_is_not_stored():
+    cache = CatalogueCache(ttl=60)
+    generation = cache.generation
+    cache.invalidate()  # an ingest run finished while the page was being read
+    cache.put("page", EncodedBody.of([1]), {}, generation)
+    assert cache.get("page") is None
+    cache.put("page", EncodedBody.of([2]), {}, cache.generation)
+    assert cache.get("page")[0].body == b"[2]"
+
+def test_entries_expire_and_are_bounded():
+    cache = CatalogueCache(ttl=0.05, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, EncodedBody.of(key), {}, cache.generation)
+    assert cache.get("a") is None and cache.get("c") is not None
+    time.sleep(0.06)
+    assert cache.get("c") is None
+    assert cache.stats()["expired"] == 1
+
+def test_ingest_invalidates_cached_listing_pages(postgrest):
+    db, _, base_url = postgrest(rows=100)
+    import jobs
+    import job_service
+    from catalogue_cache import catalogue_cache
+
+    async def run():
+        try:
+            async def requests():
+                return (await db.db().session.get(f"{base_url}/__stats")).json()["requests"]
+
+            first = (await jobs.list_jobs(plain_request(), limit=50)).body
+            before = await requests()
+            again = (await jobs.list_jobs(plain_request(), limit=50)).body
+            cached = await requests() - before
+            for listener in job_service._stored_listeners:
+                listener({"inserted": 1, "updated": 0})  # what a finished ingest run calls
+            await jobs.list_jobs(plain_request(), limit=50)
+            refetched = await requests() - before - cached
+        finally:
+            await db.close_db()
+        return first, again, cached, refetched
+
+    first, again, cached, refetched = asyncio.run(run())
+    assert again == first and cached == 0
+    assert refetched == 1
+    assert catalogue_cache.stats()["entries"] == 1
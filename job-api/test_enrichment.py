@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+from enrichment import enrich_job, enrich_jobs, DEFAULT_LOCATION
+
+def test_blank_fields_are_filled():
+    job = {"title": "Engineer", "company": "Acme", "location": " ", "logo": "", "image": "https://x/i.png",
+           "description": "short"}
+    assert enrich_job(job)
+    assert job["location"] == DEFAULT_LOCATION
+    assert job["logo"] == "https://x/i.png"
+    assert job["description"].startswith("Join Acme as a Engineer.")
+
+def test_complete_job_is_left_alone():
+    job = {"title": "Engineer", "company": "Acme", "location": "Berlin", "logo": "https://x/l.png",
+           "description": "Build things with a great team."}
+    assert not enrich_job(dict(job))
+
+def test_enriching_stored_rows_again_changes_nothing():
+    """Rows are enriched once at ingest, so a second pass (on read or by the backfill) must be a no-op"""
+    jobs = [{"id": i, "title": f"Engineer {i}", "company": f"Company {i % 7}",
+             "location": "" if i % 3 == 0 else "Berlin", "logo": "" if i % 2 else "https://x/logo.png",
+             "description": "" if i % 5 == 0 else "Build things with a great team."}
+            for i in range(100)]
+    assert enrich_jobs(jobs) == sum(1 for i in range(100) if i % 3 == 0 or i % 2 or i % 5 == 0)
+    stored = [dict(job) for job in jobs]
+    assert enrich_jobs(jobs) == 0
+    assert jobs == stored
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+import gzip
+
+from json_response import EncodedBody, negotiate, send, COMPRESS_MIN_BYTES
+from stand_ins import plain_request
+
+PAGE = [{"id": i, "title": f"Senior Engineer {i}", "description": "Own a service. " * 20} for i in range(50)]
+
+def test_negotiate_honors_q_zero():
+    assert negotiate("gzip") == "gzip"
+    assert negotiate("gzip;q=0") is None
+    assert negotiate("*;q=0.5, br;q=0") == "gzip"
+    assert negotiate("") is None
+
+def test_compressed_body_is_the_same_json():
+    encoded = EncodedBody.of(PAGE)
+    response = send(plain_request({"Accept-Encoding": "gzip"}), encoded)
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body) == encoded.body
+    assert response.headers["etag"] == encoded.etag
+
+def test_small_bodies_are_not_compressed():
+    encoded = EncodedBody.of({"ok": True})
+    assert len(encoded.body) < COMPRESS_MIN_BYTES
+    response = send(plain_request({"Accept-Encoding": "gzip"}), encoded)
+    assert "content-encoding" not in response.headers
+    assert response.body == encoded.body
+
+def test_if_none_match_revalidates_until_the_page_changes():
+    encoded = EncodedBody.of(PAGE)
+    response = send(plain_request({"If-None-Match": encoded.etag, "Accept-Encoding": "gzip"}), encoded)
+    assert response.status_code == 304 and response.body == b""
+    weak_or_strong = encoded.etag.removeprefix("W/")
+    assert send(plain_request({"If-None-Match": weak_or_strong}), encoded).status_code == 304
+    response = send(plain_request({"If-None-Match": encoded.etag}), EncodedBody.of(PAGE[1:]))
+    assert response.status_code == 200 and response.body
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+import json
+import asyncio
+
+import httpx
+import pytest
+
+from keyset import (NEXT_CURSOR_HEADER, CARD_FIELDS, CURSOR_COLUMNS, encode_cursor, decode_cursor,
+                    next_cursor, parse_fields)
+
+def test_cursor_round_trip():
+    row = {"id": 42, "created_at": "2025-01-01T00:00:00.000042+00:00"}
+    assert decode_cursor(encode_cursor(row)) == (row["created_at"], 42)
+    assert encode_cursor({"id": 42}) is None
+
+@pytest.mark.parametrize("cursor", ["not base64!", "WzEsMl0", "WyJ4IiwieSJd"])  # garbage, [1,2], ["x","y"]
+def test_foreign_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+def test_next_cursor_only_for_full_pages():
+    rows = [{"id": i, "created_at": f"2025-01-01T00:00:0{i}+00:00"} for i in range(3)]
+    assert next_cursor(rows, 3) == encode_cursor(rows[-1])
+    assert next_cursor(rows, 4) is None
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields("card") == CARD_FIELDS
+    assert parse_fields("title, company") == ["title", "company"]
+    with pytest.raises(ValueError):
+        parse_fields("title,id;drop")
+
+@pytest.mark.parametrize("fields", [None, "card"])
+def test_cursor_walk_serves_every_job_once_newest_first(postgrest, fields):
+    rows, limit = 230, 50
+    db, app, _ = postgrest(rows=rows)
+
+    async def walk():
+        ids, pages = [], []
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as http:
+                cursor = None
+                while True:
+                    params = {"limit": limit, **({"fields": fields} if fields else {}),
+                              **({"cursor": cursor} if cursor else {})}
+                    r = await http.get("/jobs/", params=params)
+                    assert r.status_code == 200
+                    pages.append(r.json())
+                    ids.extend(job["id"] for job in pages[-1])
+                    cursor = r.headers.get(NEXT_CURSOR_HEADER)
+                    if not cursor:
+                        return ids, pages
+        finally:
+            await db.close_db()
+
+    ids, pages = asyncio.run(walk())
+    assert ids == list(range(rows - 1, -1, -1))
+    if fields == "card":
+        assert all(set(job) == set(CURSOR_COLUMNS + CARD_FIELDS) for page in pages for job in page)
+
+def test_fallback_jobs_are_projected_when_the_database_fails():
+    import db
+    import jobs
+    from stand_ins import plain_request
+
+    db.SUPABASE_URL = "http://127.0.0.1:9"  # nothing listens there
+
+    async def fetch():
+        try:
+            return await jobs.list_jobs(plain_request(), limit=20, fields="card")
+        finally:
+            await db.close_db()
+
+    body = json.loads(asyncio.run(fetch()).body)
+    assert body and all(set(job) == set(CURSOR_COLUMNS + CARD_FIELDS) for job in body)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+import asyncio
+import random
+
+import httpx
+
+WRITE_PATHS = ("/swipe", "/bookmarks", "/applications", "/matches")
+
+async def _post_all(app, calls):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as http:
+        return await asyncio.gather(*(http.post(path, json=body) for path, body in calls))
+
+async def _stats(db, base_url):
+    return (await db.db().session.get(f"{base_url}/__stats")).json()
+
+def test_repeated_submits_write_one_row_per_key(postgrest):
+    """Parallel repeats of the same (profile, job) land on one row, against the real unique indexes"""
+    db, app, base_url = postgrest()
+    rnd = random.Random(11)
+    profiles, jobs, repeats = 3, 5, 4
+    calls = [(path, {"profile_id": f"p{p}", "job_id": str(j),
+                     **({"direction": rnd.choice(["left", "right"])} if path == "/swipe" else {})})
+             for path in WRITE_PATHS for p in range(profiles) for j in range(jobs) for _ in range(repeats)]
+    rnd.shuffle(calls)
+
+    async def run():
+        try:
+            responses = await _post_all(app, calls)
+            return responses, await _stats(db, base_url)
+        finally:
+            await db.close_db()
+
+    responses, stats = asyncio.run(run())
+    assert [r.status_code for r in responses] == [201] * len(calls)
+    assert stats["requests"] == len(calls)  # one round trip per submit
+    assert stats["tables"] == {"swipes": profiles * jobs, "bookmarks": profiles * jobs,
+                               "applications": profiles * jobs, "matches": profiles * jobs,
+                               "application_status_history": profiles * jobs}  # one initial status per match
+
+def test_swipe_batch_matches_single_swipes(postgrest):
+    """/swipes/batch stores the same rows as one /swipe per item, last direction winning"""
+    db, app, base_url = postgrest()
+    swipes = [{"profile_id": f"p{i % 3}", "job_id": str(i % 7), "direction": ("left", "right")[i % 2]}
+              for i in range(40)]
+
+    async def run():
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as http:
+                r = await http.post("/swipes/batch", json=swipes)
+            return r, await _stats(db, base_url)
+        finally:
+            await db.close_db()
+
+    r, stats = asyncio.run(run())
+    assert r.status_code == 200
+    assert stats["requests"] == 1
+    assert stats["tables"]["swipes"] == len({(s["profile_id"], s["job_id"]) for s in swipes})
+
+def test_swipe_batch_falls_back_to_per_item_writes(postgrest):
+    """A row the database rejects fails only itself; the rest of the batch is saved"""
+    db, app, base_url = postgrest()
+    swipes = [{"profile_id": "p1", "job_id": str(i), "direction": "right"} for i in range(5)]
+    swipes[2]["job_id"] = str(2**31)  # an integer, but out of range for swipes.job_id
+
+    async def run():
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as http:
+                r = await http.post("/swipes/batch", json=swipes)
+            return r.json(), await _stats(db, base_url)
+        finally:
+            await db.close_db()
+
+    body, stats = asyncio.run(run())
+    assert [r["status"] for r in body["results"]] == ["saved", "saved", "failed", "saved", "saved"]
+    assert all(r["id"] for r in body["results"] if r["status"] == "saved")
+    assert body["written"] == 4 and body["counts"] == {"saved": 4, "failed": 1}
+    assert stats["tables"]["swipes"] == 4
+
+def test_write_behind_swipe_is_acknowledged_with_201(postgrest, tmp_path):
+    """The app treats anything but 201 as a failed swipe, queued or not"""
+    db, app, base_url = postgrest()
+    import main
+    from swipe_log import SwipeWriteBehind
+
+    async def run():
+        main.swipe_queue = SwipeWriteBehind(str(tmp_path / "log"), flush_interval=3600)
+        await main.swipe_queue.start()
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as http:
+                ok = await http.post("/swipe", json={"profile_id": "p1", "job_id": "7", "direction": "left"})
+                bad = await http.post("/swipe", json={"profile_id": "p1", "job_id": "abc", "direction": "left"})
+                batch = await http.post("/swipes/batch", json=[
+                    {"profile_id": "p1", "job_id": "8", "direction": "left"},
+                    {"profile_id": "p1", "job_id": "x8", "direction": "left"}])
+            await main.swipe_queue.stop()
+            return ok, bad, batch, main.swipe_queue.stats()
+        finally:
+            main.swipe_queue = None
+            await db.close_db()
+
+    ok, bad, batch, stats = asyncio.run(run())
+    assert ok.status_code == 201 and ok.json()["status"] == "queued"
+    assert bad.status_code == 422  # never reaches the log
+    assert [r["status"] for r in batch.json()["results"]] == ["queued", "invalid"]
+    assert stats["queued"] == 2 and stats["flushed"] == 2
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+import asyncio
+
+import pytest
+
+from paginator import fetch_pages
+from stand_ins import FeedHandler, start_stub_server
+
+def _feed(pages, per_page=5, fail=None, repeat=None):
+    """fetch_page over `pages` pages of jobs; also tracks how many requests were in flight at once"""
+    state = {"in_flight": 0, "max_in_flight": 0, "requested": []}
+
+    async def fetch_page(page):
+        state["requested"].append(page)
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(0.001 * (pages - page % pages))  # later pages answer first
+            if page == fail:
+                raise RuntimeError("upstream 500")
+            source = repeat if repeat and page == repeat + 1 else page
+            if source > pages:
+                return []
+            return [{"external_id": f"{source}-{i}"} for i in range(per_page)]
+        finally:
+            state["in_flight"] -= 1
+
+    return fetch_page, state
+
+def _walk(fetch_page, max_pages, concurrency, discard=None):
+    emitted = []
+
+    async def emit(job):
+        emitted.append(job["external_id"])
+
+    total = asyncio.run(fetch_pages(fetch_page, emit, max_pages, concurrency, label="test", discard=discard))
+    return total, emitted
+
+@pytest.mark.parametrize("concurrency", [1, 3, 8])
+def test_jobs_are_emitted_in_page_order_with_bounded_requests(concurrency):
+    fetch_page, state = _feed(6)
+    total, emitted = _walk(fetch_page, 7, concurrency)  # page 7 is the feed's empty page
+    assert total == 30
+    assert emitted == [f"{p}-{i}" for p in range(1, 7) for i in range(5)]
+    assert state["max_in_flight"] <= concurrency
+
+def test_stops_at_a_page_with_nothing_new():
+    fetch_page, state = _feed(6, repeat=2)  # page 3 repeats page 2
+    total, emitted = _walk(fetch_page, 6, 2)
+    assert total == 10 and emitted[-1] == "2-4"
+    assert max(state["requested"]) <= 4
+
+def test_failed_later_page_keeps_earlier_jobs():
+    fetch_page, _ = _feed(6, fail=3)
+    total, emitted = _walk(fetch_page, 6, 4)
+    assert total == 10 and emitted[-1] == "2-4"
+
+def test_failed_first_page_raises():
+    fetch_page, _ = _feed(6, fail=1)
+    with pytest.raises(RuntimeError):
+        _walk(fetch_page, 6, 4)
+
+def test_pages_not_emitted_are_discarded():
+    discarded = []
+    fetch_page, state = _feed(6, repeat=2)
+    _walk(fetch_page, 6, 2, discard=discarded.extend)
+    assert 1 not in discarded and 2 not in discarded
+    assert set(state["requested"]) - {1, 2} <= set(discarded)  # also pages cancelled before their request
+
+    discarded.clear()
+    fetch_page, state = _feed(6, fail=3)
+    _walk(fetch_page, 6, 4, discard=discarded.extend)
+    assert {1, 2} | set(state["requested"]) <= set(discarded)  # pages 1-2 were emitted, but the walk failed
+
+def test_failed_page_keeps_its_source_out_of_the_feed_cache(tmp_path, monkeypatch):
+    """A transient 500 on page 2 must not leave page 1's ETag behind to answer 304 next time"""
+    import job_service
+    from http_cache import FeedCache
+
+    monkeypatch.setattr(FeedHandler, "latency", 0)
+    monkeypatch.setattr(FeedHandler, "pages", 3)
+    monkeypatch.setattr(FeedHandler, "per_page", 2)
+    monkeypatch.setattr(FeedHandler, "etags", True)
+    monkeypatch.setattr(FeedHandler, "failures", {2: 1})
+    server = start_stub_server(FeedHandler)
+    monkeypatch.setattr(job_service, "ARBEITNOW_URL", f"http://127.0.0.1:{server.server_address[1]}/")
+    monkeypatch.setattr(job_service, "feed_cache", FeedCache(str(tmp_path)))
+
+    def ingest():
+        emitted = []
+
+        async def emit(job):
+            emitted.append(job["external_id"])
+
+        _, not_modified, validators = asyncio.run(job_service._fetch_all(emit, ["arbeitnow"]))
+        validators.commit()  # as _ingest does once every row is stored
+        return emitted, not_modified
+
+    try:
+        first, second, third = ingest(), ingest(), ingest()
+    finally:
+        server.shutdown()
+    assert first == (["job-1-0", "job-1-1"], [])
+    assert second == ([f"job-{p}-{i}" for p in (1, 2, 3) for i in range(2)], [])
+    assert third == ([], ["arbeitnow"])
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+import os
+import json
+import signal
+import asyncio
+import multiprocessing
+
+import pytest
+
+from swipe_log import SwipeLog, SwipeWriteBehind, encode_record, decode_records
+
+def _swipe_log_child(path, acks):
+    """Append swipes through the write-behind queue forever, reporting each ack; killed by the parent"""
+    async def run():
+        queue = SwipeWriteBehind(path, flush_interval=3600, batch_size=10**9)  # never flushes
+        await queue.start()
+        i = 0
+        while True:
+            await queue.submit([{"user_id": f"p{i % 7}", "job_id": str(i), "direction": "right"}])
+            acks.send(i)
+            i += 1
+
+    asyncio.run(run())
+
+def _kill_after_acks(path, count):
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    child = multiprocessing.Process(target=_swipe_log_child, args=(path, sender), daemon=True)
+    child.start()
+    acked = []
+    while len(acked) < count:
+        acked.append(receiver.recv())
+    os.kill(child.pid, signal.SIGKILL)
+    child.join()
+    while receiver.poll():
+        acked.append(receiver.recv())
+    return acked
+
+def test_decode_stops_at_torn_or_corrupt_record():
+    good = encode_record({"user_id": "u", "job_id": "1", "direction": "left"})
+    bad = bytearray(encode_record({"user_id": "u", "job_id": "2", "direction": "left"}))
+    bad[-3] ^= 1
+    entries, intact = decode_records(good + bytes(bad) + good)
+    assert [row["job_id"] for _, row in entries] == ["1"]
+    assert intact == len(good)
+    entries, intact = decode_records(good + good[:-4])
+    assert len(entries) == 1 and intact == len(good)
+
+def test_open_drops_torn_tail(tmp_path):
+    path = str(tmp_path / "log")
+    with open(path, "wb") as f:
+        f.write(encode_record({"user_id": "u", "job_id": "1", "direction": "left"}))
+        f.write(b'0badc0de {"direction":"le')
+    log = SwipeLog(path)
+    entries = log.open()
+    log.close()
+    assert len(entries) == 1
+    with open(path, "rb") as f:
+        assert f.read().endswith(b"\n")
+
+def test_crash_between_compaction_and_checkpoint_replays_the_tail(tmp_path):
+    """A crash right after the log is swapped for its tail must not apply the old checkpoint to it"""
+    path = str(tmp_path / "log")
+    log = SwipeLog(path, compact_bytes=0)
+    log.open()
+    entries = log.append([{"user_id": "u", "job_id": f"{i:03d}", "direction": "left"} for i in range(100)])
+    log.sync()
+    assert log.checkpoint(entries[47][0]) == 0  # records 0..47 flushed, nothing cut yet
+
+    class Crash(Exception):
+        pass
+
+    compact = log._compact
+    def compact_then_crash(offset):
+        compact(offset)
+        raise Crash  # before checkpoint() rewrites the checkpoint for the new log
+    log._compact = compact_then_crash
+    with pytest.raises(Crash):
+        log.checkpoint(entries[51][0])  # records 48..51 flushed too, 52..99 kept
+    log.close()
+
+    log = SwipeLog(path)
+    replayed = [row["job_id"] for _, row in log.open()]
+    log.close()
+    assert replayed == [f"{i:03d}" for i in range(52, 100)]
+
+def test_crash_recovery_replays_every_acknowledged_swipe(tmp_path, postgrest):
+    path = str(tmp_path / "crash")
+    acked = _kill_after_acks(path, 600)
+    with open(path, "ab") as f:
+        f.write(b'0badc0de {"direction":"le')  # a record torn mid-write
+    db, _, base_url = postgrest()
+
+    async def recover():
+        try:
+            queue = SwipeWriteBehind(path, flush_interval=3600, batch_size=200)
+            await queue.start()
+            replayed = {int(row["job_id"]) for _, row in queue._pending}
+            # crash again after one flushed batch: only the rest may be replayed
+            await queue.flush()
+            for task in queue._tasks:
+                task.cancel()
+            queue.log.close()
+            queue = SwipeWriteBehind(path, flush_interval=3600, batch_size=200)
+            await queue.start()
+            second = len(queue._pending)
+            await queue.stop()
+            stats = (await db.db().session.get(f"{base_url}/__stats")).json()
+        finally:
+            await db.close_db()
+        return replayed, second, stats["tables"].get("swipes", 0)
+
+    replayed, second, rows = asyncio.run(recover())
+    assert set(acked) <= replayed
+    assert second == len(replayed) - 200
+    assert rows == len(replayed)
+    assert os.path.getsize(path) == 0  # compacted once everything is flushed
+
+def test_refused_rows_go_to_the_dead_letter_file(tmp_path, postgrest):
+    """One row the database refuses must not block the batch it is in"""
+    path = str(tmp_path / "log")
+    db, _, base_url = postgrest()
+    rows = [{"user_id": "u", "job_id": str(i), "direction": "left"} for i in range(5)]
+    rows[3]["job_id"] = str(2**31)  # out of range for swipes.job_id
+
+    async def run():
+        try:
+            queue = SwipeWriteBehind(path, flush_interval=3600)
+            await queue.start()
+            await queue.submit(rows)
+            await queue.stop()
+            stats = (await db.db().session.get(f"{base_url}/__stats")).json()
+        finally:
+            await db.close_db()
+        return queue.stats(), stats["tables"].get("swipes", 0)
+
+    stats, stored = asyncio.run(run())
+    assert stored == 4 and stats["pending"] == 0 and stats["dead_lettered"] == 1
+    with open(path + ".dead") as f:
+        dead = [json.loads(line) for line in f]
+    assert [d["row"]["job_id"] for d in dead] == [str(2**31)] and "22003" in dead[0]["error"]
+
+def test_unreachable_database_keeps_the_batch(tmp_path):
+    path = str(tmp_path / "log")
+    import db
+    db.SUPABASE_URL = "http://127.0.0.1:9"  # nothing listens there
+
+    async def run():
+        try:
+            queue = SwipeWriteBehind(path, flush_interval=3600)
+            await queue.start()
+            await queue.submit([{"user_id": "u", "job_id": "1", "direction": "left"}])
+            await asyncio.sleep(0.05)
+            with pytest.raises(Exception):
+                await queue.flush()
+            await queue.stop(timeout=1)
+        finally:
+            await db.close_db()
+        return queue.stats()
+
+    stats = asyncio.run(run())
+    assert stats["pending"] == 1 and stats["dead_lettered"] == 0
+    assert not os.path.exists(path + ".dead")
+    log = SwipeLog(path)
+    assert len(log.open()) == 1  # replayed on the next start
+    log.close()
+
+def test_log_is_compacted_under_steady_traffic(tmp_path, postgrest):
+    """The log never empties while swipes keep coming, so the flushed prefix is cut instead"""
+    path = str(tmp_path / "log")
+    db, _, base_url = postgrest()
+
+    async def run():
+        try:
+            queue = SwipeWriteBehind(path, flush_interval=3600, batch_size=100, compact_bytes=4096)
+            await queue.start()
+            sizes = []
+            for round in range(10):
+                await queue.submit([{"user_id": f"u{round}", "job_id": str(i), "direction": "left"}
+                                    for i in range(150)])
+                await queue.flush()  # leaves part of every round behind
+                sizes.append(os.path.getsize(path))
+            left = [row for _, row in queue._pending]
+            compactions = queue.stats()["compactions"]
+            for task in queue._tasks:
+                task.cancel()
+            queue.log.close()
+            queue = SwipeWriteBehind(path, flush_interval=3600)
+            await queue.start()
+            replayed = [row for _, row in queue._pending]
+            await queue.stop()
+            stats = (await db.db().session.get(f"{base_url}/__stats")).json()
+        finally:
+            await db.close_db()
+        return sizes, compactions, left, replayed, stats["tables"]["swipes"]
+
+    sizes, compactions, left, replayed, stored = asyncio.run(run())
+    assert compactions > 0 and max(sizes) < 4096 * 3
+    assert left and replayed == left
+    assert stored == 1500
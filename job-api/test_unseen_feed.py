@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+import asyncio
+
+import httpx
+import pytest
+
+from unseen_feed import UnseenFeed, SeenSet
+
+def test_seen_set_keeps_members_across_the_bitmap_switch():
+    seen = SeenSet([300, 100, 200])
+    assert not seen.dense
+    assert seen.window(100, 108) == 0b1
+    for slot in range(0, 5000, 2):
+        seen.add(slot)
+    assert seen.dense and seen.count == 2500
+    assert seen.window(4990, 5000) == 0b0101010101
+    assert seen.window(100, 101) == 1 and seen.window(101, 102) == 0
+
+def test_lru_evicts_idle_users():
+    feed = UnseenFeed(max_users=10)
+    for u in range(25):
+        feed.mark_seen(f"u{u}", ["1", "2"])
+    stats = feed.stats()
+    assert stats["users"] == 10 and stats["evictions"] == 15
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_swiped_cards_are_not_served_again(postgrest, cached):
+    db, app, _ = postgrest(rows=500)
+    import main
+
+    async def run():
+        served = {}
+        try:
+            if cached:
+                main.unseen_feed = UnseenFeed()
+                await main.unseen_feed.start()
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as http:
+                async def client(p):
+                    served[p] = []
+                    for _ in range(4):
+                        r = await http.get("/jobs/unseen", params={"limit": 20, "profile_id": f"u{p}"})
+                        assert r.status_code == 200
+                        ids = [str(job["id"]) for job in r.json()]
+                        served[p].extend(ids)
+                        swipes = [{"profile_id": f"u{p}", "job_id": i, "direction": "left"} for i in ids]
+                        assert (await http.post("/swipes/batch", json=swipes)).status_code == 200
+
+                await asyncio.gather(*(client(p) for p in range(10)))
+        finally:
+            if main.unseen_feed:
+                await main.unseen_feed.stop()
+            main.unseen_feed = None
+            await db.close_db()
+        return served
+
+    served = asyncio.run(run())
+    for ids in served.values():
+        assert len(ids) == 80 and len(set(ids)) == 80
@@ -0,0 +1,314 @@
+# unseen_feed.py - In-process /jobs/unseen feed served from memory
+#
+# With UNSEEN_FEED_CACHE=1 the API keeps the job catalogue in memory, every job
+# at a fixed integer slot (slots follow jobs.id, so newer jobs get higher slots),
+# plus a "seen" set of slots per user holding the jobs they swiped. An unseen
+# page is the highest active slots missing from the user's set, found with bit
+# operations a window at a time: no database query once the user is loaded.
+#
+# Seen sets are roaring-style: a sorted array of slots while the user has seen
+# few jobs, a bitmap once the array would outgrow it. Swipes handled by this
+# process update the set directly; the set is reloaded from `swipes` after
+# UNSEEN_USER_REFRESH seconds to pick up swipes served by other processes.
+# Users are evicted least recently used, once idle for UNSEEN_USER_IDLE seconds
+# or when more than UNSEEN_MAX_USERS are cached.
+import os
+import sys
+import time
+import asyncio
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Set, Iterable
+
+from db import db
+
+UNSEEN_FEED_CACHE = os.getenv("UNSEEN_FEED_CACHE", "").lower() in ("1", "true", "yes")
+UNSEEN_CATALOGUE_TTL = float(os.getenv("UNSEEN_CATALOGUE_TTL", "300"))
+UNSEEN_USER_REFRESH = float(os.getenv("UNSEEN_USER_REFRESH", "600"))
+UNSEEN_USER_IDLE = float(os.getenv("UNSEEN_USER_IDLE", "1800"))
+UNSEEN_MAX_USERS = int(os.getenv("UNSEEN_MAX_USERS", "50000"))
+
+LOAD_PAGE_SIZE = 1000  # PostgREST's default max rows per response
+WINDOW_BITS = 4096     # slots examined per bit operation when building a page
+
+class SeenSet:
+    """Set of catalogue slots: sorted uint32 array while sparse, int bitmap once dense"""
+
+    __slots__ = ("_slots", "_bits", "count")
+
+    def __init__(self, slots: Iterable[int] = ()):
+        self._slots: Optional[array] = array("I", sorted(set(slots)))
+        self._bits = 0
+        self.count = len(self._slots)
+        self._maybe_densify()
+
+    @property
+    def dense(self) -> bool:
+        return self._slots is None
+
+    def add(self, slot: int) -> None:
+        if self._slots is None:
+            mask = 1 << slot
+            if not self._bits & mask:
+                self._bits |= mask
+                self.count += 1
+            return
+        i = bisect_left(self._slots, slot)
+        if i < len(self._slots) and self._slots[i] == slot:
+            return
+        self._slots.insert(i, slot)
+        self.count += 1
+        self._maybe_densify()
+
+    def window(self, lo: int, hi: int) -> int:
+        """Members in [lo, hi) as a bitmap shifted down by lo"""
+        if self._slots is None:
+            return (self._bits >> lo) & ((1 << (hi - lo)) - 1)
+        bits = 0
+        for i in range(bisect_left(self._slots, lo), bisect_left(self._slots, hi)):
+            bits |= 1 << (self._slots[i] - lo)
+        return bits
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self._bits) if self._slots is None else sys.getsizeof(self._slots)
+
+    def _maybe_densify(self) -> None:
+        # switch once 4 bytes per slot exceed a bitmap up to the highest slot
+        if not self._slots or len(self._slots) * 4 <= self._slots[-1] // 8 + 32:
+            return
+        buf = bytearray(self._slots[-1] // 8 + 1)
+        for slot in self._slots:
+            buf[slot >> 3] |= 1 << (slot & 7)
+        self._bits = int.from_bytes(buf, "little")
+        self._slots = None
+
+class JobCatalogue:
+    """Job rows by slot, a slot per job id, and a bitmap of the slots still in the table"""
+
+    def __init__(self):
+        self.jobs: List[Optional[Dict[str, Any]]] = []
+        self.slots: Dict[str, int] = {}
+        self.active = 0
+        self.size = 0
+        self.loaded_at: Optional[float] = None
+
+    def replace(self, rows: List[Dict[str, Any]]) -> None:
+        """Swap in a full snapshot (ordered by id); known jobs keep their slot"""
+        present = set()
+        for row in rows:
+            key = str(row["id"])
+            slot = self.slots.get(key)
+            if slot is None:
+                slot = self.slots[key] = len(self.jobs)
+                self.jobs.append(row)
+            else:
+                self.jobs[slot] = row
+            present.add(slot)
+        buf = bytearray(len(self.jobs) // 8 + 1)
+        for slot in range(len(self.jobs)):
+            if slot in present:
+                buf[slot >> 3] |= 1 << (slot & 7)
+            else:
+                self.jobs[slot] = None  # gone from the table; the slot is never reused
+        self.active = int.from_bytes(buf, "little")
+        self.size = len(present)
+        self.loaded_at = time.time()
+
+    def unseen(self, seen: SeenSet, limit: int, below: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Newest active jobs whose slot is not in `seen` (and is lower than `below`)"""
+        slots: List[int] = []
+        hi = len(self.jobs) if below is None else below
+        while hi > 0 and len(slots) < limit:
+            lo = max(0, hi - WINDOW_BITS)
+            free = (self.active >> lo) & ((1 << (hi - lo)) - 1) & ~seen.window(lo, hi)
+            while free and len(slots) < limit:
+                top = free.bit_length() - 1
+                slots.append(lo + top)
+                free ^= 1 << top
+            hi = lo
+        return [self.jobs[slot] for slot in slots]
+
+class _UserFeed:
+    __slots__ = ("seen", "unresolved", "loaded_at", "used_at")
+
+    def __init__(self):
+        self.seen = SeenSet()
+        self.unresolved: Set[str] = set()  # swiped job ids not in the catalogue yet
+        self.loaded_at: Optional[float] = None
+        self.used_at = time.monotonic()
+
+    def mark(self, catalogue: JobCatalogue, job_ids: Iterable[str]) -> None:
+        for job_id in job_ids:
+            slot = catalogue.slots.get(job_id)
+            if slot is None:
+                self.unresolved.add(job_id)
+            else:
+                self.seen.add(slot)
+
+    def nbytes(self) -> int:
+        size = sys.getsizeof(self) + self.seen.nbytes()
+        if self.unresolved:
+            size += sys.getsizeof(self.unresolved) + sum(sys.getsizeof(j) for j in self.unresolved)
+        return size
+
+class UnseenFeed:
+    """Catalogue plus LRU of per-user seen sets; `page()` answers /jobs/unseen without the RPC"""
+
+    def __init__(
+        self,
+        catalogue_ttl: float = UNSEEN_CATALOGUE_TTL,
+        user_refresh: float = UNSEEN_USER_REFRESH,
+        user_idle: float = UNSEEN_USER_IDLE,
+        max_users: int = UNSEEN_MAX_USERS,
+    ):
+        self.catalogue = JobCatalogue()
+        self.catalogue_ttl = catalogue_ttl
+        self.user_refresh = user_refresh
+        self.user_idle = user_idle
+        self.max_users = max_users
+        self._users: "OrderedDict[str, _UserFeed]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._refreshing: Optional[asyncio.Task] = None
+        self._stats = {"pages": 0, "user_loads": 0, "evictions": 0,
+                       "catalogue_loads": 0, "catalogue_errors": 0, "last_error": None}
+
+    async def start(self) -> None:
+        try:
+            await self.refresh_catalogue()
+        except Exception as e:
+            # pages fall back to the RPC until a refresh succeeds
+            print(f"⚠️ Unseen feed: catalogue load failed: {str(e)}")
+
+    async def stop(self) -> None:
+        tasks = list(self._loading.values())
+        if self._refreshing:
+            tasks.append(self._refreshing)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def refresh_catalogue(self) -> None:
+        """Reload every job from the table (keyset pages on id) and swap the snapshot in"""
+        rows: List[Dict[str, Any]] = []
+        last_id = None
+        while True:
+            query = db().table("jobs").select("*").order("id").limit(LOAD_PAGE_SIZE)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            try:
+                page = (await query.execute()).data or []
+            except Exception as e:
+                self._stats["catalogue_errors"] += 1
+                self._stats["last_error"] = str(e)
+                raise
+            rows.extend(page)
+            if len(page) < LOAD_PAGE_SIZE:
+                break
+            last_id = page[-1]["id"]
+        self.catalogue.replace(rows)
+        self._stats["catalogue_loads"] += 1
+
+    async def page(self, user_id: str, limit: int, after_id: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """Up to `limit` newest jobs the user has not swiped, older than job `after_id` if given.
+
+        Returns None when the feed cannot answer: the catalogue is not loaded
+        yet, or `after_id` (from another process's cursor) is not in it.
+        Slots follow jobs.id, which orders like created_at for serial ids.
+        """
+        self._refresh_catalogue_if_stale()
+        if self.catalogue.loaded_at is None:
+            return None
+        below = None
+        if after_id is not None:
+            below = self.catalogue.slots.get(str(after_id))
+            if below is None:
+                return None
+        user = await self._user(user_id)
+        if user.unresolved:
+            pending, user.unresolved = user.unresolved, set()
+            user.mark(self.catalogue, pending)
+        self._stats["pages"] += 1
+        return self.catalogue.unseen(user.seen, limit, below)
+
+    def mark_seen(self, user_id: str, job_ids: Iterable[str]) -> None:
+        """Record swipes served by this process (the user is kept even before their first page)"""
+        user = self._users.get(user_id)
+        if user is None:
+            user = self._users[user_id] = _UserFeed()
+        user.used_at = time.monotonic()
+        self._users.move_to_end(user_id)
+        user.mark(self.catalogue, (str(j) for j in job_ids))
+        self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        sizes = [u.nbytes() for u in self._users.values()]
+        return dict(
+            self._stats,
+            catalogue_jobs=self.catalogue.size,
+            catalogue_slots=len(self.catalogue.jobs),
+            catalogue_loaded_at=self.catalogue.loaded_at,
+            users=len(sizes),
+            dense_users=sum(1 for u in self._users.values() if u.seen.dense),
+            seen_bytes=sum(sizes),
+            bytes_per_user=round(sum(sizes) / len(sizes)) if sizes else 0,
+            max_user_bytes=max(sizes, default=0),
+        )
+
+    def _refresh_catalogue_if_stale(self) -> None:
+        loaded_at = self.catalogue.loaded_at
+        if self._refreshing or (loaded_at and time.time() - loaded_at < self.catalogue_ttl):
+            return
+
+        async def refresh() -> None:
+            try:
+                await self.refresh_catalogue()
+            except Exception as e:
+                print(f"⚠️ Unseen feed: catalogue refresh failed: {str(e)}")
+            finally:
+                self._refreshing = None
+
+        # current requests keep using the old snapshot meanwhile
+        self._refreshing = asyncio.create_task(refresh())
+
+    async def _user(self, user_id: str) -> _UserFeed:
+        user = self._users.get(user_id)
+        if user is None:
+            user = self._users[user_id] = _UserFeed()
+        user.used_at = time.monotonic()
+        self._users.move_to_end(user_id)
+        self._evict()
+        if user.loaded_at is None or time.time() - user.loaded_at > self.user_refresh:
+            task = self._loading.get(user_id)
+            if task is None:
+                task = self._loading[user_id] = asyncio.create_task(self._load_user(user_id, user))
+            await asyncio.shield(task)
+        return user
+
+    async def _load_user(self, user_id: str, user: _UserFeed) -> None:
+        """Add every swiped job to the user's set (swipes are never undone, so merging is safe)"""
+        try:
+            last_id = None
+            while True:
+                query = (db().table("swipes").select("id,job_id").eq("user_id", user_id)
+                         .order("id").limit(LOAD_PAGE_SIZE))
+                if last_id is not None:
+                    query = query.gt("id", last_id)
+                page = (await query.execute()).data or []
+                user.mark(self.catalogue, (str(r["job_id"]) for r in page))
+                if len(page) < LOAD_PAGE_SIZE:
+                    break
+                last_id = page[-1]["id"]
+            user.loaded_at = time.time()
+            self._stats["user_loads"] += 1
+        finally:
+            self._loading.pop(user_id, None)
+
+    def _evict(self) -> None:
+        idle_before = time.monotonic() - self.user_idle
+        while self._users:
+            user_id, user = next(iter(self._users.items()))
+            if len(self._users) <= self.max_users and user.used_at >= idle_before:
+                break
+            del self._users[user_id]
+            self._stats["evictions"] += 1